@@ -2,6 +2,8 @@ import click
 
 from prism_api.cli.commands import (
     cancel_workflows,
+    migrate_store,
+    rebuild_store_indexes,
     refresh_workflows,
 )
 
@@ -12,6 +14,8 @@ def main():
 
 
 main.add_command(cancel_workflows)
+main.add_command(migrate_store)
+main.add_command(rebuild_store_indexes)
 main.add_command(refresh_workflows)
 
 
@@ -1,13 +1,25 @@
+import asyncio
 import logging
 import sys
 
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
 
 from prism_api import services, settings
 from prism_api.callback.app import app as callback_app
 from prism_api.graphql.app import app as graphql_app
 from prism_api.state_manager.router import router as state_router
+from rexflow_ui import api as rexflow
+from rexflow_ui import settings as rexflow_settings
+from rexflow_ui.store import redis_connection
+from rexflow_ui.tracing import tracer
 
 logging.basicConfig(stream=sys.stdout, level=settings.LOG_LEVEL)
 
@@ -30,14 +42,14 @@ async def health():  # pragma: no cover
 
 @app.get('/health/status')
 async def liveness():  # pragma: no cover
-    services_status = services.check_status()
+    services_status = await services.check_status()
     response_status = 200
 
     response = []
-    for name, status in services_status.items():
-        if status is False:
+    for name, service_status in services_status.items():
+        if service_status.status is False:
             response_status = 503
-        response.append(f'{name}: {status}')
+        response.append(f'{name}: {service_status}')
 
     return Response(
         content='\n'.join(response),
@@ -46,6 +58,55 @@ async def liveness():  # pragma: no cover
     )
 
 
+def get_metrics_registry() -> CollectorRegistry:
+    """Metrics of every worker in multiprocess mode, else of this process"""
+    if settings.PROMETHEUS_MULTIPROC_DIR is None:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@app.get('/metrics')
+async def metrics():  # pragma: no cover
+    return Response(
+        content=generate_latest(get_metrics_registry()),
+        media_type=CONTENT_TYPE_LATEST,
+    )
+
+
+@app.on_event('startup')
+async def startup():  # pragma: no cover
+    app.state.background_tasks = [
+        asyncio.create_task(rexflow.run_workflow_status_listener()),
+        asyncio.create_task(rexflow.migrate_store_on_startup()),
+    ]
+    reaper_interval = rexflow_settings.REXFLOW_STORE_REAPER_INTERVAL_SEC
+    if reaper_interval > 0:
+        app.state.background_tasks.append(asyncio.create_task(
+            rexflow.run_store_reaper(reaper_interval),
+        ))
+    health_check_interval = rexflow_settings.REDIS_HEALTH_CHECK_INTERVAL_SEC
+    if health_check_interval > 0:
+        app.state.background_tasks.append(asyncio.create_task(
+            redis_connection.run_health_check(health_check_interval),
+        ))
+    refresh_interval = rexflow_settings.REXFLOW_REFRESH_INTERVAL_SEC
+    if refresh_interval > 0:
+        app.state.background_tasks.append(asyncio.create_task(
+            rexflow.run_workflow_refresher(refresh_interval),
+        ))
+
+
+@app.on_event('shutdown')
+async def shutdown():  # pragma: no cover
+    for task in app.state.background_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
+    await rexflow.close_connections()
+    await asyncio.get_running_loop().run_in_executor(None, tracer.flush)
+
+
 app.mount('/callback', callback_app)
 app.mount('/query', graphql_app)
 app.include_router(state_router)
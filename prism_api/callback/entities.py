@@ -6,6 +6,7 @@ from rexflow_ui.entities.types import (
     OperationStatus,
     TaskId,
     WorkflowInstanceId,
+    WorkflowStatus,
 )
 
 
@@ -32,3 +33,13 @@ class CompleteWorkflowInput(BaseModel):
 class CompleteWorkflowPayload(BaseModel):
     status: OperationStatus
     errors: Optional[List[Problem]]
+
+
+class UpdateWorkflowInput(BaseModel):
+    iid: WorkflowInstanceId
+    status: WorkflowStatus
+
+
+class UpdateWorkflowPayload(BaseModel):
+    status: OperationStatus
+    errors: Optional[List[Problem]]
@@ -8,6 +8,8 @@ from .entities import (
     Problem,
     StartTaskInput,
     StartTaskPayload,
+    UpdateWorkflowInput,
+    UpdateWorkflowPayload,
 )
 from rexflow_ui import api
 from rexflow_ui.errors import BridgeNotReachableError
@@ -79,3 +81,21 @@ class WorkflowMutations:
         return CompleteWorkflowPayload(
             status=OperationStatus.SUCCESS,
         )
+
+    @validate_arguments
+    async def update(self, info, input: UpdateWorkflowInput):
+        try:
+            logger.info(f'Workflow {input.iid} changed to {input.status}')
+            await api.notify_workflow_status(input.iid, input.status)
+        except Exception as ex:
+            logger.exception('Error when notifying workflow status')
+            return UpdateWorkflowPayload(
+                status=OperationStatus.FAILURE,
+                errors=[
+                    Problem(message=str(ex))
+                ]
+            )
+
+        return UpdateWorkflowPayload(
+            status=OperationStatus.SUCCESS,
+        )
@@ -10,11 +10,16 @@ async def _a_cancel_workflows():
     await rexflow.refresh_workflows()
     click.echo('Canceling running workflows')
     running_workflows = await rexflow.get_active_workflows()
+    results = await rexflow.cancel_workflows([
+        workflow.iid for workflow in running_workflows
+    ])
     count = 0
-    for workflow in running_workflows:
-        click.echo(f'Canceling workflow {workflow.iid}')
-        await rexflow.cancel_workflow(workflow.iid)
-        count = count + 1
+    for iid, canceled in results.items():
+        if canceled:
+            click.echo(f'Canceled workflow {iid}')
+            count = count + 1
+        else:
+            click.echo(f'Could not cancel workflow {iid}')
 
     click.echo(f'{count} workflows canceled')
 
@@ -27,9 +32,19 @@ def cancel_workflows():
         click.echo('This command can only be executed on debug mode')
 
 
+def _echo_refresh_progress(report):
+    click.echo(f'Refreshing {report.name}: {report.done}/{report.total}')
+
+
 async def _a_refresh_workflows():
     click.echo('Refreshing workflows')
-    await rexflow.refresh_workflows()
+    reports = await rexflow.refresh_workflows(
+        on_progress=_echo_refresh_progress,
+    )
+    for report in reports:
+        click.echo(str(report))
+        for name, error in report.failed.items():
+            click.echo(f'  {name}: {error}')
     running_workflows = await rexflow.get_active_workflows()
     click.echo(str(running_workflows))
 
@@ -40,3 +55,15 @@ def refresh_workflows():
         asyncio.run(_a_refresh_workflows())
     else:
         click.echo('This command can only be executed on debug mode')
+
+
+@click.command()
+def rebuild_store_indexes():
+    count = asyncio.run(rexflow.rebuild_store_indexes())
+    click.echo(f'{count} workflows indexed')
+
+
+@click.command()
+def migrate_store():
+    count = asyncio.run(rexflow.migrate_store())
+    click.echo(f'{count} workflows migrated')
@@ -1,7 +1,270 @@
+"""GraphQL app that reuses the documents of repeated operations
+
+Clients send the same few operations over and over. Each query is hashed
+with SHA-256 and its parsed and validated document is kept in an LRU cache,
+so repeated operations skip parsing and validation. Clients may also send
+the hash alone, following the automatic persisted queries protocol:
+https://github.com/apollographql/apollo-link-persisted-queries
+"""
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from inspect import isawaitable
+from typing import Any, Dict, List, Optional, Tuple
+
 from ariadne.asgi import GraphQL
+from ariadne.exceptions import HttpError
+from ariadne.extensions import ExtensionManager
+from ariadne.graphql import (
+    handle_graphql_errors,
+    handle_query_result,
+    parse_query,
+    validate_operation_name,
+    validate_query,
+    validate_query_body,
+    validate_variables,
+)
+from ariadne.types import GraphQLResult
+from graphql import (
+    DocumentNode,
+    ExecutionContext,
+    GraphQLError,
+    execute,
+    get_operation_ast,
+)
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 
+from .metrics import resolver_metrics
 from .schema import schema
+from .validation import COST_KEY, validation_rules
 from prism_api import settings
+from rexflow_ui.tracing import (
+    TRACEPARENT_HEADER,
+    parse_traceparent,
+    start_span,
+)
+
+logger = logging.getLogger(__name__)
+
+PERSISTED_QUERY_NOT_FOUND = 'PersistedQueryNotFound'
+
+
+@dataclass
+class CachedDocument:
+    query: str
+    document: DocumentNode
+    # Estimated cost found when the document was validated
+    cost: Optional[int] = None
+
+
+class DocumentCache:
+    """Least recently used documents, by the SHA-256 hash of their query"""
+
+    def __init__(self, max_size: int = settings.GRAPHQL_DOCUMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._documents: 'OrderedDict[str, CachedDocument]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def get(self, query_hash: str) -> Optional[CachedDocument]:
+        cached = self._documents.get(query_hash)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._documents.move_to_end(query_hash)
+        return cached
+
+    def put(self, query_hash: str, cached: CachedDocument) -> None:
+        self._documents[query_hash] = cached
+        self._documents.move_to_end(query_hash)
+        while len(self._documents) > self.max_size:
+            self._documents.popitem(last=False)
+
+    def clear(self) -> None:
+        self._documents.clear()
+
+
+def hash_query(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def _log_cost(document: DocumentNode, data: Dict, context_value: Any) -> None:
+    operation = get_operation_ast(document, data.get('operationName'))
+    name = 'anonymous'
+    if operation is not None and operation.name is not None:
+        name = operation.name.value
+    cost = None
+    if isinstance(context_value, dict):
+        cost = context_value.get(COST_KEY)
+    logger.info(f'GraphQL operation {name} costs {cost}')
+
+
+def _get_persisted_query_hash(data: Dict) -> Optional[str]:
+    extensions = data.get('extensions') or {}
+    persisted_query = extensions.get('persistedQuery') or {}
+    return persisted_query.get('sha256Hash')
+
+
+class CachedGraphQL(GraphQL):
+    """GraphQL app that caches validated documents
+
+    Documents are only cached once valid, and with the cost the validation
+    found, so it can be put in the context of later requests.
+    """
+
+    def __init__(self, *args, documents: DocumentCache = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.documents = documents or DocumentCache()
+
+    async def graphql_http_server(self, request: Request) -> Response:
+        try:
+            data = await self.extract_data_from_request(request)
+        except HttpError as error:
+            return PlainTextResponse(
+                error.message or error.status,
+                status_code=400,
+            )
+
+        context_value = await self.get_context_for_request(request)
+        extensions = await self.get_extensions_for_request(
+            request,
+            context_value,
+        )
+        middleware = await self.get_middleware_for_request(
+            request,
+            context_value,
+        )
+
+        operation_name = None
+        if isinstance(data, dict):
+            operation_name = data.get('operationName')
+        with start_span(
+            'graphql',
+            parent=parse_traceparent(request.headers.get(TRACEPARENT_HEADER)),
+            operation=operation_name,
+        ):
+            success, response = await self.execute_query(
+                data,
+                context_value,
+                extensions,
+                middleware,
+            )
+        status_code = 200 if success else 400
+        return JSONResponse(response, status_code=status_code)
+
+    def get_document(
+        self,
+        data: Any,
+        context_value: Any,
+    ) -> Tuple[Optional[DocumentNode], List[GraphQLError]]:
+        """Cached document of the operation, or the errors found in it"""
+        if not isinstance(data, dict):
+            raise GraphQLError('Operation data should be a JSON object')
+        validate_variables(data.get('variables'))
+        validate_operation_name(data.get('operationName'))
+
+        query = data.get('query')
+        persisted_hash = _get_persisted_query_hash(data)
+        if query is None and persisted_hash is not None:
+            cached = self.documents.get(persisted_hash)
+            if cached is None:
+                raise GraphQLError(
+                    PERSISTED_QUERY_NOT_FOUND,
+                    extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'},
+                )
+        else:
+            validate_query_body(query)
+            query_hash = hash_query(query)
+            if persisted_hash is not None and persisted_hash != query_hash:
+                raise GraphQLError('Persisted query hash does not match')
+            cached = self.documents.get(query_hash)
+
+        if cached is not None:
+            if isinstance(context_value, dict):
+                context_value[COST_KEY] = cached.cost
+            return cached.document, []
+
+        document = parse_query(query)
+        rules = self.validation_rules
+        if callable(rules):
+            rules = rules(context_value, document, data)
+        errors = validate_query(
+            self.schema,
+            document,
+            rules,
+            enable_introspection=self.introspection,
+        )
+        if errors:
+            return None, errors
+
+        cost = None
+        if isinstance(context_value, dict):
+            cost = context_value.get(COST_KEY)
+        self.documents.put(query_hash, CachedDocument(
+            query=query,
+            document=document,
+            cost=cost,
+        ))
+        return document, []
+
+    async def execute_query(
+        self,
+        data: Any,
+        context_value: Any,
+        extensions: Any,
+        middleware: Any,
+    ) -> GraphQLResult:
+        """Same as ariadne.graphql, with documents from the cache"""
+        extension_manager = ExtensionManager(extensions, context_value)
+        error_options = dict(
+            logger=self.logger,
+            error_formatter=self.error_formatter,
+            debug=self.debug,
+            extension_manager=extension_manager,
+        )
+
+        with extension_manager.request():
+            try:
+                document, errors = self.get_document(data, context_value)
+                if errors:
+                    return handle_graphql_errors(errors, **error_options)
+                # Logged here so that cached documents are logged too
+                _log_cost(document, data, context_value)
+
+                root_value = self.root_value
+                if callable(root_value):
+                    root_value = root_value(context_value, document)
+                    if isawaitable(root_value):
+                        root_value = await root_value
+
+                result = execute(
+                    self.schema,
+                    document,
+                    root_value=root_value,
+                    context_value=context_value,
+                    variable_values=data.get('variables'),
+                    operation_name=data.get('operationName'),
+                    execution_context_class=ExecutionContext,
+                    middleware=extension_manager.as_middleware_manager(
+                        middleware,
+                    ),
+                )
+                if isawaitable(result):
+                    result = await result
+            except GraphQLError as error:
+                return handle_graphql_errors([error], **error_options)
+            return handle_query_result(result, **error_options)
 
 
-app = GraphQL(schema, debug=settings.DEBUG)
+app = CachedGraphQL(
+    schema,
+    debug=settings.DEBUG,
+    validation_rules=validation_rules,
+    middleware=[resolver_metrics],
+)
@@ -1,12 +1,15 @@
+import asyncio
 import logging
 from functools import wraps
 
 from graphql.type.definition import GraphQLResolveInfo
 from jose.exceptions import JWTError
 from pydantic.error_wrappers import ValidationError
+from starlette.requests import Request
 
 from .errors import HttpUnauthorizedError
 from prism_api import settings
+from prism_api.okta.entities import Token
 from prism_api.okta.actions import (
     get_access_token,
     validate_access_token,
@@ -14,20 +17,17 @@ from prism_api.okta.actions import (
 
 logger = logging.getLogger(__name__)
 
+TOKEN_VALIDATION_KEY = 'access_token_validation'
 
-async def _verify_access_token(info: GraphQLResolveInfo):
-    if settings.DISABLE_AUTHENTICATION:
-        info.context['access_token'] = None
-        info.context['session_id'] = 'anon'
-        return
 
-    access_token = get_access_token(info.context['request'])
+async def _validate_request_token(request: Request) -> Token:
+    access_token = get_access_token(request)
 
     if access_token is None:
         raise HttpUnauthorizedError('Missing access token')
 
     try:
-        token = await validate_access_token(access_token)
+        return await validate_access_token(access_token)
     except ValidationError as e:
         logger.exception('Wrong token format')
         raise HttpUnauthorizedError from e
@@ -35,6 +35,22 @@ async def _verify_access_token(info: GraphQLResolveInfo):
         logger.exception('Invalid Token')
         raise HttpUnauthorizedError from e
 
+
+async def _verify_access_token(info: GraphQLResolveInfo):
+    if settings.DISABLE_AUTHENTICATION:
+        info.context['access_token'] = None
+        info.context['session_id'] = 'anon'
+        return
+
+    # Every resolver of a request shares a single validation
+    validation = info.context.get(TOKEN_VALIDATION_KEY)
+    if validation is None:
+        validation = asyncio.ensure_future(
+            _validate_request_token(info.context['request']),
+        )
+        info.context[TOKEN_VALIDATION_KEY] = validation
+    token = await asyncio.shield(validation)
+
     info.context['access_token'] = token
     info.context['session_id'] = token.sub
 
@@ -0,0 +1,106 @@
+"""Batch the lookups made while resolving a single GraphQL request"""
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    TypeVar,
+)
+
+from graphql.type.definition import GraphQLResolveInfo
+
+from prism_api.state_manager import store
+from rexflow_ui import api as rexflow
+from rexflow_ui.entities.types import Task, WorkflowInstanceId
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+LOADERS_KEY = 'loaders'
+
+
+class DataLoader(Generic[K, V]):
+    """Coalesce the loads requested in the same event loop iteration
+
+    Keys requested while resolvers run are collected, then `batch_load`
+    receives them all at once and returns their values in the same order.
+    Values are kept for the life of the loader, which is one request.
+    """
+
+    def __init__(self, batch_load: Callable[[List[K]], Awaitable[List[V]]]):
+        self.batch_load = batch_load
+        self._futures: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+
+    def load(self, key: K) -> 'asyncio.Future[V]':
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            if not self._queue:
+                # Runs after the resolvers that are ready to run
+                loop.call_soon(self._dispatch)
+            self._queue.append(key)
+        return future
+
+    def prime(self, key: K, value: V) -> None:
+        """Use a value that was already loaded by other means"""
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def clear(self, key: K) -> None:
+        """Forget a value that changed, so it is loaded again"""
+        future = self._futures.get(key)
+        if future is not None and future.done():
+            del self._futures[key]
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        asyncio.ensure_future(self._load(keys))
+
+    async def _load(self, keys: List[K]) -> None:
+        try:
+            values = await self.batch_load(keys)
+            if len(values) != len(keys):
+                raise ValueError(
+                    f'Loaded {len(values)} values for {len(keys)} keys',
+                )
+        except Exception as ex:
+            # Failures are not kept, so a later load tries again
+            for key in keys:
+                self._futures.pop(key).set_exception(ex)
+            return
+        for key, value in zip(keys, values):
+            self._futures[key].set_result(value)
+
+
+async def _load_workflow_tasks(
+    iids: List[WorkflowInstanceId],
+) -> List[List[Task]]:
+    tasks = await rexflow.get_workflows_tasks(iids)
+    return [tasks.get(iid, []) for iid in iids]
+
+
+async def _load_session_states(session_ids: List[str]) -> List[str]:
+    return await store.read_raw_states(session_ids)
+
+
+class Loaders:
+    """Loaders shared by the resolvers of one request"""
+
+    def __init__(self):
+        self.workflow_tasks = DataLoader(_load_workflow_tasks)
+        self.session_states = DataLoader(_load_session_states)
+
+
+def get_loaders(info: GraphQLResolveInfo) -> Loaders:
+    loaders = info.context.get(LOADERS_KEY)
+    if loaders is None:
+        loaders = info.context[LOADERS_KEY] = Loaders()
+    return loaders
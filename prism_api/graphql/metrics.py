@@ -0,0 +1,34 @@
+"""Prometheus metrics of the GraphQL resolvers"""
+import time
+from inspect import isawaitable
+
+from graphql.type.definition import GraphQLResolveInfo
+from prometheus_client import Histogram
+
+RESOLVER_SECONDS = Histogram(
+    'prism_graphql_resolver_seconds',
+    'Time taken by asynchronous GraphQL resolvers',
+    ['field'],
+)
+
+
+async def _observe(result, field: str):
+    start = time.perf_counter()
+    try:
+        return await result
+    finally:
+        RESOLVER_SECONDS.labels(field=field).observe(
+            time.perf_counter() - start,
+        )
+
+
+def resolver_metrics(resolve, parent, info: GraphQLResolveInfo, **kwargs):
+    """Middleware timing the resolvers that return awaitables
+
+    Synchronous resolvers, e.g. the fallback ones, are not timed, so the
+    overhead is only paid by resolvers that wait on other services.
+    """
+    result = resolve(parent, info, **kwargs)
+    if isawaitable(result):
+        return _observe(result, f'{info.parent_type.name}.{info.field_name}')
+    return result
@@ -6,6 +6,7 @@ from pydantic.decorator import validate_arguments
 
 
 from .decorators import resolver_verify_token
+from .loaders import get_loaders
 from .entities.wrappers import (
     CancelWorkflowInput,
     CancelWorkflowPayload,
@@ -53,12 +54,19 @@ def resolve_problem_interface_type(obj: Problem, *_):
     return obj.resolve_type()
 
 
+def _prime_workflow_tasks(info, workflows: List[Workflow]) -> None:
+    """Resolve the tasks of workflows with those read along with them"""
+    workflow_tasks = get_loaders(info).workflow_tasks
+    for workflow in workflows:
+        workflow_tasks.prime(workflow.iid, workflow.tasks)
+
+
 # Query resolvers
 
 @resolver_verify_token
 async def resolve_session(_, info: GraphQLResolveInfo):
     session_id = info.context['session_id']
-    state = await store.read_raw_state(session_id)
+    state = await get_loaders(info).session_states.load(session_id)
     return Session(
         id=session_id,
         state=state,
@@ -84,20 +92,17 @@ class WorkflowResolver:
                 'session_id': session_id,
             },
         )
+        _prime_workflow_tasks(info, workflows)
         return workflows
 
     @resolver_verify_token
     async def available(self, *_):
-        available_workflows = await rexflow.get_available_workflows(
-            refresh=True
-        )
+        available_workflows = await rexflow.get_available_workflows()
         return available_workflows
 
     @resolver_verify_token
     async def deployments(self, *_):
-        available_workflows = await rexflow.get_available_workflows(
-            refresh=True
-        )
+        available_workflows = await rexflow.get_available_workflows()
         deployments = []
         for workflow in available_workflows:
             if workflow.deployments:
@@ -107,14 +112,12 @@ class WorkflowResolver:
 
     @resolver_verify_token
     async def directory(self, *_):
-        available_workflows = await rexflow.get_available_workflows(
-            refresh=True
-        )
+        available_workflows = await rexflow.get_available_workflows()
 
         workflow_directory = {}
         for workflow in available_workflows:
             if workflow.deployments:
-                deployment = workflow.deployments.pop()
+                deployment = workflow.deployments[-1]
                 workflow_directory[workflow.name] = deployment
 
         return workflow_directory
@@ -127,15 +130,16 @@ async def resolve_workflow_tasks(
     info,
     filter: Optional[TaskFilter] = None,
 ):
+    tasks = await get_loaders(info).workflow_tasks.load(workflow.iid)
     if filter:
         return [
             task
-            for task in workflow.tasks
+            for task in tasks
             if task.tid in filter.ids
             or filter.ids == []
         ]
     else:
-        return workflow.tasks
+        return tasks
 
 
 class TalkTrackResolver:
@@ -143,7 +147,7 @@ class TalkTrackResolver:
         pass
 
     async def list(self, *_) -> List[WorkflowDeployment]:
-        workflows = await rexflow.get_available_workflows(refresh=True)
+        workflows = await rexflow.get_available_workflows()
         talktracks = [
             deployment
             for deployment in workflows
@@ -160,6 +164,9 @@ class StateMutations:
     async def update(self, info, input: UpdateStateInput):
         session_id = info.context['session_id']
         state = await store.save_raw_state(session_id, input.state)
+        session_states = get_loaders(info).session_states
+        session_states.clear(session_id)
+        session_states.prime(session_id, state)
         return UpdateStatePayload(
             status=OperationStatus.SUCCESS,
             state=state,
@@ -345,6 +352,7 @@ class WorkflowMutations:
                 )]
             )
 
+        _prime_workflow_tasks(info, [workflow])
         return StartWorkflowPayload(
             status=OperationStatus.SUCCESS,
             iid=workflow.iid,
@@ -388,6 +396,7 @@ class WorkflowMutations:
                 )]
             )
 
+        _prime_workflow_tasks(info, [workflow])
         return StartWorkflowByNamePayload(
             status=OperationStatus.SUCCESS,
             did=workflow.did,
@@ -403,8 +412,8 @@ class WorkflowMutations:
 
         successful_iids = []
         errors = []
-        for iid in input.iid:
-            success = await rexflow.cancel_workflow(iid)
+        results = await rexflow.cancel_workflows(input.iid)
+        for iid, success in results.items():
             if success:
                 successful_iids.append(iid)
             else:
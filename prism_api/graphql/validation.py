@@ -0,0 +1,163 @@
+"""Limits on the depth and estimated cost of GraphQL operations
+
+Operations are checked before they are executed, so a client cannot nest
+expensive fields, e.g. through the `query` field of mutation payloads, to
+load the active workflows many times in a single request.
+"""
+from typing import Dict, List, Optional, Set, Type
+
+from ariadne.validation.query_cost import CostValidator
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+)
+from graphql.validation import ValidationContext
+from graphql.validation.rules import ASTValidationRule, ValidationRule
+
+from prism_api import settings
+
+COST_KEY = 'query_cost'
+
+# Fields that are not listed cost 1
+COST_MAP = {
+    'Query': {
+        'session': {'complexity': 5},
+    },
+    'WorkflowQuery': {
+        'active': {'complexity': 50},
+        'available': {'complexity': 5},
+        'deployments': {'complexity': 5},
+        'directory': {'complexity': 5},
+    },
+    'TalkTrackQuery': {
+        'list': {'complexity': 5},
+    },
+    'StateMutations': {
+        'update': {'complexity': 5},
+    },
+    'WorkflowMutations': {
+        'start': {'complexity': 50},
+        'startByName': {'complexity': 50},
+        'cancel': {'complexity': 20},
+    },
+    'TasksMutations': {
+        'validate': {'complexity': 20},
+        'save': {'complexity': 20},
+        'complete': {'complexity': 20},
+    },
+}
+
+
+def _get_operation_name(node: OperationDefinitionNode) -> str:
+    return node.name.value if node.name else 'anonymous'
+
+
+class DepthValidator(ValidationRule):
+    """Reject operations with selections nested deeper than max_depth
+
+    Introspection fields are not counted, so tools can read the schema.
+    """
+    max_depth: int
+
+    def _get_depth(
+        self,
+        selection_set: Optional[SelectionSetNode],
+        fragment_names: Set[str],
+    ) -> int:
+        if selection_set is None:
+            return 0
+        depth = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                if selection.name.value.startswith('__'):
+                    continue
+                depth = max(depth, 1 + self._get_depth(
+                    selection.selection_set,
+                    fragment_names,
+                ))
+            elif isinstance(selection, InlineFragmentNode):
+                depth = max(depth, self._get_depth(
+                    selection.selection_set,
+                    fragment_names,
+                ))
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.context.get_fragment(name)
+                # Fragment cycles are reported by another rule
+                if fragment is None or name in fragment_names:
+                    continue
+                depth = max(depth, self._get_depth(
+                    fragment.selection_set,
+                    fragment_names | {name},
+                ))
+        return depth
+
+    def enter_operation_definition(self, node, *_):
+        depth = self._get_depth(node.selection_set, set())
+        if depth > self.max_depth:
+            self.report_error(GraphQLError(
+                f'Operation {_get_operation_name(node)} has a depth of '
+                f'{depth}, the maximum is {self.max_depth}',
+                node,
+            ))
+
+
+class ContextCostValidator(CostValidator):
+    """Cost validator that keeps the cost in the GraphQL context
+
+    The cost is logged by the app on every request, including those whose
+    document was cached.
+    """
+    graphql_context: Dict
+
+    def leave_operation_definition(self, node, *args):
+        self.graphql_context[COST_KEY] = self.cost
+        super().leave_operation_definition(node, *args)
+
+
+def depth_validator(max_depth: int) -> Type[ASTValidationRule]:
+    class _DepthValidator(DepthValidator):
+        pass
+
+    _DepthValidator.max_depth = max_depth
+    return _DepthValidator
+
+
+def cost_validator(
+    max_cost: int,
+    context: Dict,
+    variables: Optional[Dict] = None,
+) -> Type[ASTValidationRule]:
+    class _CostValidator(ContextCostValidator):
+        graphql_context = context
+
+        def __init__(self, validation_context: ValidationContext):
+            super().__init__(
+                validation_context,
+                maximum_cost=max_cost,
+                default_cost=1,
+                variables=variables,
+                cost_map=COST_MAP,
+            )
+
+    return _CostValidator
+
+
+def validation_rules(
+    context: Dict,
+    document,
+    data: Dict,
+) -> List[Type[ASTValidationRule]]:
+    """Rules checked on each request besides those of the specification"""
+    return [
+        depth_validator(settings.GRAPHQL_MAX_DEPTH),
+        cost_validator(
+            settings.GRAPHQL_MAX_COST,
+            context,
+            data.get('variables'),
+        ),
+    ]
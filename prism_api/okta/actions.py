@@ -1,8 +1,8 @@
 import logging
-from typing import Union
+from typing import Dict, Union
 
 from httpx import AsyncClient, ConnectError
-from jose import jwk, jwt
+from jose import jwt
 from starlette.requests import Request
 
 from .settings import (
@@ -15,9 +15,11 @@ from .settings import (
 from .entities import (
     IdToken,
     Token,
+    JWKS,
     JWKSResponse,
     TokenHeader,
 )
+from .cache import JsonWebKeyCache, token_cache
 from .errors import OktaError
 from .store import Store
 
@@ -36,9 +38,12 @@ def get_id_token(request: Request) -> Union[str, None]:
 
 
 async def validate_access_token(access_token: str) -> Token:  # noqa E501 pragma: no cover
+    token = token_cache.get(access_token)
+    if token is not None:
+        return token
+
     headers = TokenHeader(**jwt.get_unverified_header(access_token))
-    keys = await get_json_web_keys()
-    key = jwk.construct(keys[headers.kid].dict())
+    key = await key_cache.get_key(headers.kid)
     decoded = jwt.decode(
         access_token,
         key,
@@ -46,13 +51,13 @@ async def validate_access_token(access_token: str) -> Token:  # noqa E501 pragma
         audience=AUDIENCE,
     )
     token = Token(**decoded)
+    token_cache.put(access_token, token)
     return token
 
 
 async def validate_id_token(id_token: str, access_token: str):  # noqa E501 pragma: no cover
     headers = TokenHeader(**jwt.get_unverified_header(id_token))
-    keys = await get_json_web_keys()
-    key = jwk.construct(keys[headers.kid].dict())
+    key = await key_cache.get_key(headers.kid)
     decoded = jwt.decode(
         id_token,
         key,
@@ -64,16 +69,28 @@ async def validate_id_token(id_token: str, access_token: str):  # noqa E501 prag
     return token
 
 
-async def get_json_web_keys():
-    response = Store.get_jwks()
+async def fetch_json_web_keys() -> Dict[str, JWKS]:
+    """Keys from Okta, saved for the other workers"""
+    endpoint = f'{BASE_URI}/v1/keys?client_id={CLIENT_ID}'
+    async with AsyncClient() as client:
+        try:
+            result = await client.get(endpoint)
+        except ConnectError as e:
+            logger.exception('Could not connect to Okta')
+            raise OktaError from e
+    response = JWKSResponse(**result.json())
+    await Store.save_jwks(response)
+    return {key.kid: key for key in response.keys}
+
+
+async def get_json_web_keys() -> Dict[str, JWKS]:
+    response = await Store.get_jwks()
     if response is None:
-        endpoint = f'{BASE_URI}/v1/keys?client_id={CLIENT_ID}'
-        async with AsyncClient() as client:
-            try:
-                result = await client.get(endpoint)
-            except ConnectError as e:
-                logger.exception('Could not connect to Okta')
-                raise OktaError from e
-        response = JWKSResponse(**result.json())
-        Store.save_jwks(response)
+        return await fetch_json_web_keys()
     return {key.kid: key for key in response.keys}
+
+
+key_cache = JsonWebKeyCache(
+    load_keys=get_json_web_keys,
+    fetch_keys=fetch_json_web_keys,
+)
@@ -0,0 +1,142 @@
+"""In-process caches of verified tokens and verification keys"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from jose import jwk
+from jose.backends.base import Key
+from jose.exceptions import JWTError
+
+from .entities import JWKS, Token
+from .settings import (
+    JWKS_MIN_REFRESH_SEC,
+    JWKS_REFRESH_SEC,
+    TOKEN_CACHE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """Least recently used verified tokens, each kept until it expires
+
+    Tokens are keyed by their hash, so raw tokens are not held in memory.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._tokens: OrderedDict[str, Token] = OrderedDict()
+
+    @staticmethod
+    def _get_key(raw_token: str) -> str:
+        return hashlib.sha256(raw_token.encode()).hexdigest()
+
+    def get(self, raw_token: str) -> Optional[Token]:
+        key = self._get_key(raw_token)
+        token = self._tokens.get(key)
+        if token is None:
+            return None
+        if token.exp <= time.time():
+            del self._tokens[key]
+            return None
+        self._tokens.move_to_end(key)
+        return token
+
+    def put(self, raw_token: str, token: Token) -> None:
+        if self.maxsize <= 0 or token.exp <= time.time():
+            return
+        key = self._get_key(raw_token)
+        self._tokens[key] = token
+        self._tokens.move_to_end(key)
+        while len(self._tokens) > self.maxsize:
+            self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+
+token_cache = TokenCache()
+
+
+class JsonWebKeyCache:
+    """Verification keys constructed once and kept by key id
+
+    Keys come from `load_keys` on cold start, which may use a shared copy,
+    and from `fetch_keys`, which asks Okta, when they are older than
+    `refresh_sec` or a token names an unknown key. Okta is asked at most
+    once every `min_refresh_sec` and concurrent loads share one request,
+    so a key rotation does not stampede it.
+    """
+
+    def __init__(
+        self,
+        load_keys: Callable[[], Awaitable[Dict[str, JWKS]]],
+        fetch_keys: Callable[[], Awaitable[Dict[str, JWKS]]],
+        refresh_sec: float = JWKS_REFRESH_SEC,
+        min_refresh_sec: float = JWKS_MIN_REFRESH_SEC,
+    ):
+        self.load_keys = load_keys
+        self.fetch_keys = fetch_keys
+        self.refresh_sec = refresh_sec
+        self.min_refresh_sec = min_refresh_sec
+        self._keys: Dict[str, Key] = {}
+        self._loaded_at: Optional[float] = None
+        self._fetched_at = float('-inf')
+        self._loading: Optional[asyncio.Future] = None
+
+    def _is_loading(self) -> bool:
+        return self._loading is not None and not self._loading.done()
+
+    async def _load(self, load_keys) -> None:
+        keys = await load_keys()
+        self._keys = {
+            kid: jwk.construct(key.dict())
+            for kid, key in keys.items()
+        }
+        self._loaded_at = time.monotonic()
+
+    def _can_fetch(self) -> bool:
+        return time.monotonic() - self._fetched_at > self.min_refresh_sec
+
+    def _fetch(self) -> asyncio.Future:
+        self._fetched_at = time.monotonic()
+        self._loading = asyncio.ensure_future(self._load(self.fetch_keys))
+        return self._loading
+
+    @staticmethod
+    def _log_refresh_error(loading: asyncio.Future) -> None:
+        if not loading.cancelled() and loading.exception() is not None:
+            logger.error(
+                'Could not refresh the JSON web keys',
+                exc_info=loading.exception(),
+            )
+
+    async def get_key(self, kid: str) -> Key:
+        if self._loaded_at is None:
+            if not self._is_loading():
+                self._loading = asyncio.ensure_future(
+                    self._load(self.load_keys),
+                )
+            await asyncio.shield(self._loading)
+
+        is_old = time.monotonic() - self._loaded_at > self.refresh_sec
+        if is_old and not self._is_loading() and self._can_fetch():
+            # Keep using the current keys while new ones are fetched
+            self._fetch().add_done_callback(self._log_refresh_error)
+
+        key = self._keys.get(kid)
+        if key is None:
+            if self._is_loading():
+                await asyncio.shield(self._loading)
+            elif self._can_fetch():
+                await asyncio.shield(self._fetch())
+            key = self._keys.get(kid)
+        if key is None:
+            raise JWTError(f'Unknown JSON web key {kid}')
+        return key
@@ -11,3 +11,9 @@ ID_TOKEN_HEADER = os.getenv('APP_ID_TOKEN_HEADER', 'x-id-token')
 AUTHORIZATION_HEADER = os.getenv('APP_AUTHORIZATION_HEADER', 'authorization')
 
 JWKS_EXPIRATION_SEC = int(os.getenv('OKTA_JWKS_EXPIRATION_SEC', 24 * 60 * 60))
+# Verified access tokens kept in memory until they expire
+TOKEN_CACHE_SIZE = int(os.getenv('OKTA_TOKEN_CACHE_SIZE', 1024))
+# Keys are fetched again from Okta once they are this old, and at most once
+# per JWKS_MIN_REFRESH_SEC when a token is signed with an unknown key
+JWKS_REFRESH_SEC = int(os.getenv('OKTA_JWKS_REFRESH_SEC', JWKS_EXPIRATION_SEC * 3 // 4))  # noqa E501
+JWKS_MIN_REFRESH_SEC = int(os.getenv('OKTA_JWKS_MIN_REFRESH_SEC', 60))
@@ -1,6 +1,7 @@
+import json
 from typing import Union
 
-from rexredis import RexRedis
+from rexflow_ui.store import redis_connection
 
 from .entities import JWKSResponse
 from .settings import JWKS_EXPIRATION_SEC
@@ -9,29 +10,23 @@ JWKS_KEY = 'okta:jwks'
 
 
 class Store:
-    _redis = None
-
-    @classmethod
-    def _get_redis(cls):  # pragma: no cover
-        if cls._redis is None or cls._redis.ping() is False:
-            cls._redis = RexRedis()
-        return cls._redis
-
     @classmethod
-    def save_jwks(cls, jwks: JWKSResponse):  # pragma: no cover
-        redis = cls._get_redis()
-        redis.set_val(
-            JWKS_KEY,
-            jwks.json(),
-            ex=JWKS_EXPIRATION_SEC,
+    async def save_jwks(cls, jwks: JWKSResponse):  # pragma: no cover
+        await redis_connection.execute(
+            lambda redis: redis.set(
+                JWKS_KEY,
+                jwks.json(),
+                ex=JWKS_EXPIRATION_SEC,
+            ),
         )
 
     @classmethod
-    def get_jwks(cls) -> Union[JWKSResponse, None]:  # pragma: no cover
-        redis = cls._get_redis()
-        data = redis.get_from_json(JWKS_KEY)
+    async def get_jwks(cls) -> Union[JWKSResponse, None]:  # pragma: no cover
+        data = await redis_connection.execute(
+            lambda redis: redis.get(JWKS_KEY),
+        )
         if data:
-            jwks = JWKSResponse(**data)
+            jwks = JWKSResponse(**json.loads(data))
             return jwks
         else:
             return None
@@ -1,36 +1,115 @@
 """Check the system dependency on other services"""
-import httpx
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Union
 
-from rexredis import RexRedis
+import httpx
 
 from prism_api import settings
+from rexflow_ui import settings as rexflow_settings
+from rexflow_ui.store import redis_connection
+
+logger = logging.getLogger(__name__)
+
+Status = Union[bool, str]
+
 
+@dataclass
+class ServiceStatus:
+    status: Status
+    latency_ms: float
 
-def _check_redis_service():  # pragma: no cover
-    redis = RexRedis()
-    return redis.ping()
+    def __str__(self) -> str:
+        return f'{self.status} ({self.latency_ms:.1f}ms)'
 
 
-def _check_rexflow_service():  # pragma: no cover
-    if not settings.REXFLOW_FLOWD_HOST:
+async def _check_redis_service() -> Status:  # pragma: no cover
+    return await redis_connection.check_health()
+
+
+async def _check_rexflow_service() -> Status:  # pragma: no cover
+    if not rexflow_settings.REXFLOW_FLOWD_HOST:
         return 'Not Configured'
 
     try:
-        res = httpx.get(settings.REXFLOW_FLOWD_HOST + '/health')
+        async with httpx.AsyncClient() as client:
+            res = await client.get(
+                rexflow_settings.REXFLOW_FLOWD_HOST + '/health',
+            )
         return res.status_code == 200
-    except httpx.ConnectError:
+    except httpx.HTTPError:
         return False
 
 
-services = {
+services: Dict[str, Callable[[], Awaitable[Status]]] = {
     'redis': _check_redis_service,
     'rexflow-bridge': _check_rexflow_service,
 }
 
 
-def check_status():  # pragma: no cover
-    results = {}
-    for name, status in services.items():
-        results[name] = status()
+async def _check_service(
+    check: Callable[[], Awaitable[Status]],
+    timeout: float,
+) -> ServiceStatus:
+    start = time.perf_counter()
+    try:
+        status = await asyncio.wait_for(check(), timeout)
+    except asyncio.TimeoutError:
+        status = False
+    except Exception:
+        logger.exception('Could not check service')
+        status = False
+    return ServiceStatus(
+        status=status,
+        latency_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+class StatusCache:
+    """Status of the services, checked at most once every `ttl` seconds
+
+    Services are checked concurrently, each for up to `timeout` seconds.
+    Requests arriving while a check runs wait for it, so probes do not
+    multiply the load on the services.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.HEALTH_STATUS_CACHE_SEC,
+        timeout: float = settings.HEALTH_CHECK_TIMEOUT_SEC,
+    ):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._results: Dict[str, ServiceStatus] = {}
+        self._checked_at: Optional[float] = None
+        self._checking: Optional[asyncio.Future] = None
+
+    async def _check(self) -> Dict[str, ServiceStatus]:
+        names = list(services)
+        statuses = await asyncio.gather(*[
+            _check_service(services[name], self.timeout)
+            for name in names
+        ])
+        self._results = dict(zip(names, statuses))
+        self._checked_at = time.monotonic()
+        return self._results
+
+    async def get(self) -> Dict[str, ServiceStatus]:
+        is_fresh = (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at <= self.ttl
+        )
+        if is_fresh:
+            return self._results
+        if self._checking is None or self._checking.done():
+            self._checking = asyncio.ensure_future(self._check())
+        return await asyncio.shield(self._checking)
+
+
+status_cache = StatusCache()
+
 
-    return results
+async def check_status() -> Dict[str, ServiceStatus]:
+    return await status_cache.get()
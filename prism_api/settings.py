@@ -21,3 +21,20 @@ if APP_HOST and rexflow_settings.REXUI_CALLBACK_HOST is None:
     rexflow_settings.REXUI_CALLBACK_HOST = f'http://{APP_HOST}/callback/'
 
 TALKTRACK_WORKFLOWS = list([s.strip() for s in os.getenv('APP_TALKTRACK_WORKFLOWS', '').split(',')])  # noqa E501
+
+# Deepest selection and highest estimated cost accepted for a GraphQL
+# operation, see prism_api/graphql/validation.py for the cost of each field
+GRAPHQL_MAX_DEPTH = int(os.getenv('APP_GRAPHQL_MAX_DEPTH', 12))
+GRAPHQL_MAX_COST = int(os.getenv('APP_GRAPHQL_MAX_COST', 500))
+# Parsed and validated GraphQL documents kept in memory, also used to answer
+# persisted queries sent by their hash only
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(os.getenv('APP_GRAPHQL_DOCUMENT_CACHE_SIZE', 500))  # noqa E501
+
+# Seconds each dependency may take to answer a health check, and seconds
+# the results of the checks are reused by /health/status
+HEALTH_CHECK_TIMEOUT_SEC = float(os.getenv('APP_HEALTH_CHECK_TIMEOUT_SEC', 2))
+HEALTH_STATUS_CACHE_SEC = float(os.getenv('APP_HEALTH_STATUS_CACHE_SEC', 5))
+
+# Directory where the workers of a multiprocess server, e.g. gunicorn, write
+# their Prometheus metrics, so /metrics reports those of every worker
+PROMETHEUS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
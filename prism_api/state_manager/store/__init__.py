@@ -2,5 +2,6 @@ from .api import (  # noqa: F401
     read_state,
     save_state,
     read_raw_state,
+    read_raw_states,
     save_raw_state,
 )
@@ -1,6 +1,8 @@
 import abc
+import asyncio
+from typing import List
 
-from rexredis import RexRedis
+from rexflow_ui.store import redis_connection
 
 
 class StoreABC(abc.ABC):
@@ -13,23 +15,31 @@ class StoreABC(abc.ABC):
     async def save(self, state: str) -> str:
         raise NotImplementedError
 
-
-class RedisStore(StoreABC):
-    _redis = None
-
     @classmethod
-    def _get_redis(cls):
-        if cls._redis is None or cls._redis.ping() is False:
-            cls._redis = RexRedis()
-        return cls._redis
+    async def read_many(cls, client_ids: List[str]) -> List[str]:
+        """States of several clients, at once if the store can"""
+        return await asyncio.gather(*[
+            cls(client_id).read()
+            for client_id in client_ids
+        ])
 
-    def __init__(self, client_id: str):
-        super().__init__(client_id)
-        self.redis = self._get_redis()
 
+class RedisStore(StoreABC):
     async def read(self) -> str:
-        return self.redis.get_val(self.client_id) or '{}'
+        state = await redis_connection.execute(
+            lambda redis: redis.get(self.client_id),
+        )
+        return state or '{}'
 
     async def save(self, state: str) -> str:
-        self.redis.set_val(self.client_id, state)
+        await redis_connection.execute(
+            lambda redis: redis.set(self.client_id, state),
+        )
         return await self.read()
+
+    @classmethod
+    async def read_many(cls, client_ids: List[str]) -> List[str]:
+        states = await redis_connection.execute(
+            lambda redis: redis.mget(client_ids),
+        )
+        return [state or '{}' for state in states]
@@ -1,5 +1,6 @@
 """Manages saving application state"""
 import json
+from typing import List
 
 from .adapters import RedisStore as Store
 
@@ -33,3 +34,7 @@ async def save_raw_state(client_id, state: str) -> str:
 async def read_raw_state(client_id) -> str:
     store = Store(client_id)
     return await store.read()
+
+
+async def read_raw_states(client_ids: List[str]) -> List[str]:
+    return await Store.read_many(client_ids)
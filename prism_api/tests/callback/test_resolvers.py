@@ -18,9 +18,12 @@ from prism_api.callback.entities import (
     CompleteWorkflowPayload,
     StartTaskInput,
     StartTaskPayload,
+    UpdateWorkflowInput,
+    UpdateWorkflowPayload,
 )
 from rexflow_ui.entities.types import (
     OperationStatus,
+    WorkflowStatus,
 )
 from rexflow_ui.errors import BridgeNotReachableError
 from rexflow_ui.tests.mocks import rexflow_api
@@ -65,6 +68,19 @@ class TestCallBackResolvers(unittest.TestCase):
         self.assertIsInstance(response, CompleteWorkflowPayload)
         self.assertEqual(response.status, OperationStatus.SUCCESS)
 
+    @run_async
+    async def test_update_workflow_callback(self):
+        mutations = WorkflowCallbackMutations()
+        response = await mutations.update(
+            MockInfo(),
+            input=UpdateWorkflowInput(
+                iid=MOCK_IID,
+                status=WorkflowStatus.RUNNING,
+            ),
+        )
+        self.assertIsInstance(response, UpdateWorkflowPayload)
+        self.assertEqual(response.status, OperationStatus.SUCCESS)
+
 
 @pytest.mark.ci
 class TestCallBackResolversErrors(unittest.TestCase):
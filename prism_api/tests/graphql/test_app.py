@@ -0,0 +1,109 @@
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+import pytest
+
+from prism_api.graphql import app as graphql_app
+from prism_api.graphql.app import (
+    CachedDocument,
+    CachedGraphQL,
+    DocumentCache,
+    hash_query,
+)
+from prism_api.graphql.schema import schema
+from prism_api.graphql.validation import validation_rules
+
+QUERY = 'query Typename { __typename }'
+
+
+def persisted_query(query_hash):
+    return {'persistedQuery': {'version': 1, 'sha256Hash': query_hash}}
+
+
+@pytest.mark.ci
+class TestDocumentCache(unittest.TestCase):
+    def test_least_recently_used(self):
+        cache = DocumentCache(max_size=2)
+        for key in ['a', 'b']:
+            cache.put(key, CachedDocument(query=key, document=None))
+        self.assertEqual(cache.get('a').query, 'a')
+
+        cache.put('c', CachedDocument(query='c', document=None))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+
+@pytest.mark.ci
+class TestCachedGraphQL(unittest.TestCase):
+    def setUp(self):
+        self.app = CachedGraphQL(schema, validation_rules=validation_rules)
+        self.client = TestClient(self.app)
+
+    def post(self, **data):
+        return self.client.post('/', json=data)
+
+    def test_repeated_query(self):
+        with mock.patch.object(
+            graphql_app,
+            'parse_query',
+            wraps=graphql_app.parse_query,
+        ) as parse_query:
+            for _ in range(3):
+                response = self.post(query=QUERY)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json(),
+                    {'data': {'__typename': 'Query'}},
+                )
+        parse_query.assert_called_once()
+        self.assertEqual(self.app.documents.hits, 2)
+
+    def test_cost_logged(self):
+        for _ in range(2):
+            with self.assertLogs('prism_api.graphql.app', 'INFO') as logs:
+                response = self.post(query=QUERY)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(logs.output, [
+                'INFO:prism_api.graphql.app:'
+                'GraphQL operation Typename costs 0',
+            ])
+        self.assertEqual(self.app.documents.hits, 1)
+
+    def test_invalid_query_not_cached(self):
+        for _ in range(2):
+            response = self.post(query='{ unknown }')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.app.documents), 0)
+
+    def test_persisted_query(self):
+        query_hash = hash_query(QUERY)
+        response = self.post(extensions=persisted_query(query_hash))
+        self.assertEqual(response.status_code, 400)
+        error, = response.json()['errors']
+        self.assertEqual(error['message'], 'PersistedQueryNotFound')
+        self.assertEqual(
+            error['extensions']['code'],
+            'PERSISTED_QUERY_NOT_FOUND',
+        )
+
+        response = self.post(
+            query=QUERY,
+            extensions=persisted_query(query_hash),
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.post(extensions=persisted_query(query_hash))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'data': {'__typename': 'Query'}})
+
+    def test_persisted_query_mismatch(self):
+        response = self.post(
+            query=QUERY,
+            extensions=persisted_query(hash_query('{ other }')),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.app.documents), 0)
@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import pytest
+
+from ..mocks.graphql_info import MockInfo
+from ..utils import run_async
+from prism_api.graphql.loaders import DataLoader, get_loaders
+
+
+@pytest.mark.ci
+class TestDataLoader(unittest.TestCase):
+    def setUp(self):
+        async def batch_load(keys):
+            return [key * 2 for key in keys]
+        self.batch_load = mock.AsyncMock(side_effect=batch_load)
+        self.loader = DataLoader(self.batch_load)
+
+    @run_async
+    async def test_coalesce_loads(self):
+        values = await asyncio.gather(*[
+            self.loader.load(key)
+            for key in [1, 2, 1, 3]
+        ])
+        self.assertEqual(values, [2, 4, 2, 6])
+        self.batch_load.assert_called_once_with([1, 2, 3])
+
+        self.assertEqual(await self.loader.load(2), 4)
+        self.batch_load.assert_called_once()
+
+    @run_async
+    async def test_prime_and_clear(self):
+        self.loader.prime(1, 10)
+        self.assertEqual(await self.loader.load(1), 10)
+        self.batch_load.assert_not_called()
+
+        self.loader.clear(1)
+        self.assertEqual(await self.loader.load(1), 2)
+        self.batch_load.assert_called_once_with([1])
+
+    @run_async
+    async def test_failed_load(self):
+        self.batch_load.side_effect = ConnectionError
+        with self.assertRaises(ConnectionError):
+            await self.loader.load(1)
+
+        self.batch_load.side_effect = None
+        self.batch_load.return_value = [5]
+        self.assertEqual(await self.loader.load(1), 5)
+
+    @run_async
+    async def test_missing_values(self):
+        self.batch_load.side_effect = None
+        self.batch_load.return_value = [5]
+        results = await asyncio.wait_for(asyncio.gather(
+            self.loader.load(1),
+            self.loader.load(2),
+            return_exceptions=True,
+        ), 1)
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+
+    def test_loaders_per_request(self):
+        info = MockInfo()
+        self.assertIs(get_loaders(info), get_loaders(info))
+        self.assertIsNot(get_loaders(info), get_loaders(MockInfo()))
@@ -0,0 +1,43 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from ..utils import run_async
+from prism_api.graphql.metrics import resolver_metrics
+
+
+def get_count(field):
+    return REGISTRY.get_sample_value(
+        'prism_graphql_resolver_seconds_count',
+        {'field': field},
+    ) or 0
+
+
+@pytest.mark.ci
+class TestResolverMetrics(unittest.TestCase):
+    def get_info(self, field_name):
+        info = mock.Mock(field_name=field_name)
+        info.parent_type.name = 'Test'
+        return info
+
+    @run_async
+    async def test_async_resolver(self):
+        async def resolve(parent, info, **kwargs):
+            await asyncio.sleep(0)
+            return kwargs['value']
+
+        count = get_count('Test.async')
+        result = resolver_metrics(resolve, None, self.get_info('async'), value=1)  # noqa E501
+        self.assertEqual(await result, 1)
+        self.assertEqual(get_count('Test.async'), count + 1)
+
+    def test_sync_resolver(self):
+        def resolve(parent, info):
+            return 'value'
+
+        result = resolver_metrics(resolve, None, self.get_info('sync'))
+        self.assertEqual(result, 'value')
+        self.assertEqual(get_count('Test.sync'), 0)
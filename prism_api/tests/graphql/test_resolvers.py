@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from unittest import mock
 from typing import List
@@ -14,6 +15,7 @@ from ..mocks import (
 from ..mocks.graphql_info import MockInfo
 from ..mocks.state_store import FakeStore
 from ..utils import run_async
+from prism_api.graphql.loaders import get_loaders
 from prism_api.graphql.resolvers import (
     TalkTrackResolver,
     resolve_session,
@@ -44,6 +46,7 @@ from rexflow_ui.entities.types import (
     OperationStatus,
     Workflow,
     WorkflowDeployment,
+    WorkflowStatus,
 )
 from rexflow_ui.tests.mocks import rexflow_api
 from rexflow_ui.tests.mocks.rexflow_entities import mock_workflow
@@ -99,6 +102,10 @@ class TestSessionResolvers(unittest.TestCase):
     'prism_api.graphql.resolvers.rexflow',
     rexflow_api,
 )
+@mock.patch(
+    'prism_api.graphql.loaders.rexflow',
+    rexflow_api,
+)
 @mock.patch(
     'prism_api.graphql.decorators._verify_access_token',
     dummy_verification,
@@ -107,12 +114,21 @@ class TestRexflowResolvers(unittest.TestCase):
     @run_async
     async def test_active_workflows(self):
         resolver = WorkflowResolver()
-        response = await resolver.active(
-            MockInfo(),
-        )
+        info = MockInfo()
+        response = await resolver.active(info)
         self.assertIsInstance(response, List)
-        for workflow in response:
-            self.assertIsInstance(workflow, Workflow)
+        with mock.patch.object(
+            rexflow_api,
+            'get_workflows_tasks',
+        ) as get_workflows_tasks:
+            for workflow in response:
+                self.assertIsInstance(workflow, Workflow)
+                self.assertEqual(
+                    await resolve_workflow_tasks(workflow, info),
+                    workflow.tasks,
+                )
+        # Tasks are read along with the workflows
+        get_workflows_tasks.assert_not_called()
 
     @run_async
     async def test_available_workflows(self):
@@ -145,18 +161,43 @@ class TestRexflowResolvers(unittest.TestCase):
     async def test_workflow_tasks(self):
         task_number = 5
         workflow = mock_workflow(task_number=task_number)
+        info = MockInfo()
+        # Tasks read along with the workflow by another resolver
+        get_loaders(info).workflow_tasks.prime(workflow.iid, workflow.tasks)
         for task in workflow.tasks:
             result = await resolve_workflow_tasks(
                 workflow,
-                MockInfo(),
+                info,
                 TaskFilter(ids=[task.tid]),
             )
             self.assertEqual(1, len(result))
             self.assertIn(task, result)
-        result = await resolve_workflow_tasks(workflow, MockInfo())
+        result = await resolve_workflow_tasks(workflow, info)
         self.assertEqual(result, workflow.tasks)
         self.assertEqual(task_number, len(result))
 
+    @run_async
+    async def test_workflow_tasks_loaded_once(self):
+        # Workflows read without their tasks
+        workflows = [
+            Workflow(iid=f'{MOCK_IID}-{i}', status=WorkflowStatus.RUNNING)
+            for i in range(3)
+        ]
+        info = MockInfo()
+        with mock.patch.object(
+            rexflow_api,
+            'get_workflows_tasks',
+            wraps=rexflow_api.get_workflows_tasks,
+        ) as get_workflows_tasks:
+            results = await asyncio.gather(*[
+                resolve_workflow_tasks(workflow, info)
+                for workflow in workflows
+            ])
+        get_workflows_tasks.assert_called_once_with([
+            workflow.iid for workflow in workflows
+        ])
+        self.assertTrue(all(len(tasks) == 1 for tasks in results))
+
     @run_async
     async def test_talktracks_list(self):
         resolver = TalkTrackResolver()
@@ -177,14 +218,24 @@ class TestRexflowResolvers(unittest.TestCase):
     @run_async
     async def test_start_workflow(self):
         mutations = WorkflowMutations()
+        info = MockInfo()
         response = await mutations.start(
-            MockInfo(),
+            info,
             input=StartWorkflowInput(
                 did=MOCK_DID,
             )
         )
         self.assertIsInstance(response, StartWorkflowPayload)
         self.assertEqual(response.status, OperationStatus.SUCCESS)
+        with mock.patch.object(
+            rexflow_api,
+            'get_workflows_tasks',
+        ) as get_workflows_tasks:
+            self.assertEqual(
+                await resolve_workflow_tasks(response.workflow, info),
+                response.workflow.tasks,
+            )
+        get_workflows_tasks.assert_not_called()
 
     @run_async
     async def test_start_workflow_by_name(self):
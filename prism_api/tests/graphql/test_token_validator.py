@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from unittest import mock
 
@@ -82,3 +83,19 @@ class TestTokenValidator(unittest.TestCase):
     async def test_jwt_error(self):
         with self.assertRaises(HttpUnauthorizedError):
             await _verify_access_token(mock_info_with_token())
+
+    @run_async
+    async def test_verify_access_token_once_per_request(self):
+        validate = mock.AsyncMock(side_effect=mock_validate_access_token)
+        info = mock_info_with_token()
+        with mock.patch(
+            'prism_api.graphql.decorators.validate_access_token',
+            validate,
+        ):
+            await asyncio.gather(*[
+                _verify_access_token(info)
+                for _ in range(3)
+            ])
+            await _verify_access_token(info)
+        validate.assert_called_once()
+        self.assertEqual(info.context['session_id'], mock_token().sub)
@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+
+import pytest
+from graphql import parse, validate
+
+from prism_api.graphql.schema import schema
+from prism_api.graphql.validation import COST_KEY, validation_rules
+
+WORKFLOWS_QUERY = '''
+query Workflows {
+    workflows {
+        active {
+            iid
+            tasks {
+                tid
+            }
+        }
+    }
+}
+'''
+
+NESTED_QUERY = '''
+mutation Nested {
+    workflow {
+        cancel(input: {iid: ["1"]}) {
+            query {
+                workflows {
+                    active {
+                        iid
+                    }
+                }
+            }
+        }
+    }
+}
+'''
+
+FRAGMENT_QUERY = '''
+query Fragments {
+    ...Workflows
+}
+
+fragment Workflows on Query {
+    workflows {
+        ... on WorkflowQuery {
+            active {
+                iid
+            }
+        }
+    }
+}
+'''
+
+
+@pytest.mark.ci
+class TestValidationRules(unittest.TestCase):
+    def validate(self, query, context=None, variables=None):
+        context = {} if context is None else context
+        document = parse(query)
+        rules = validation_rules(
+            context,
+            document,
+            {'query': query, 'variables': variables},
+        )
+        return validate(schema, document, rules)
+
+    def test_accepted(self):
+        context = {}
+        errors = self.validate(WORKFLOWS_QUERY, context)
+        self.assertEqual(errors, [])
+        # workflows, active, iid, tasks and tid
+        self.assertEqual(context[COST_KEY], 1 + 50 + 1 + 1 + 1)
+
+    @mock.patch('prism_api.settings.GRAPHQL_MAX_DEPTH', 4)
+    def test_max_depth(self):
+        self.assertEqual(self.validate(WORKFLOWS_QUERY), [])
+
+        errors = self.validate(NESTED_QUERY)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('has a depth of 6', errors[0].message)
+
+    @mock.patch('prism_api.settings.GRAPHQL_MAX_DEPTH', 2)
+    def test_max_depth_fragments(self):
+        errors = self.validate(FRAGMENT_QUERY)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('has a depth of 3', errors[0].message)
+
+    @mock.patch('prism_api.settings.GRAPHQL_MAX_DEPTH', 1)
+    def test_introspection_depth(self):
+        errors = self.validate('{ __schema { types { name } } }')
+        self.assertEqual(errors, [])
+
+    @mock.patch('prism_api.settings.GRAPHQL_MAX_COST', 60)
+    def test_max_cost(self):
+        self.assertEqual(self.validate(WORKFLOWS_QUERY), [])
+
+        errors = self.validate(NESTED_QUERY)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('maximum cost of 60', errors[0].message)
@@ -11,10 +11,10 @@ from prism_api.okta.entities import JWKSResponse
 class Store:
     has_stored_keys = True
 
-    save_jwks = mock.Mock()
+    save_jwks = mock.AsyncMock()
 
     @classmethod
-    def get_jwks(cls) -> Union[JWKSResponse, None]:
+    async def get_jwks(cls) -> Union[JWKSResponse, None]:
         if cls.has_stored_keys:
             return mock_jwks_response()
 
@@ -0,0 +1,97 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import pytest
+from jose.backends.base import Key
+from jose.exceptions import JWTError
+
+from ..mocks.okta_entities import mock_jwks, mock_token
+from ..utils import run_async
+from prism_api.okta.cache import JsonWebKeyCache, TokenCache
+
+
+def mock_valid_token(expires_in: int = 60):
+    return mock_token().copy(update={'exp': int(time.time()) + expires_in})
+
+
+@pytest.mark.ci
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = TokenCache(maxsize=2)
+
+    def test_get_verified_token(self):
+        token = mock_valid_token()
+        self.assertIsNone(self.cache.get('MOCK_TOKEN'))
+        self.cache.put('MOCK_TOKEN', token)
+        self.assertEqual(self.cache.get('MOCK_TOKEN'), token)
+        self.assertIsNone(self.cache.get('OTHER_TOKEN'))
+
+    def test_expired_token(self):
+        self.cache.put('MOCK_TOKEN', mock_valid_token(expires_in=0))
+        self.assertIsNone(self.cache.get('MOCK_TOKEN'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_token_is_evicted(self):
+        self.cache.put('FIRST_TOKEN', mock_valid_token())
+        self.cache.put('SECOND_TOKEN', mock_valid_token())
+        self.cache.get('FIRST_TOKEN')
+        self.cache.put('THIRD_TOKEN', mock_valid_token())
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNotNone(self.cache.get('FIRST_TOKEN'))
+        self.assertIsNone(self.cache.get('SECOND_TOKEN'))
+
+
+async def mock_keys():
+    jwks = mock_jwks()
+    return {jwks.kid: jwks}
+
+
+@pytest.mark.ci
+class TestJsonWebKeyCache(unittest.TestCase):
+    def setUp(self):
+        self.kid = mock_jwks().kid
+        self.load_keys = mock.AsyncMock(side_effect=mock_keys)
+        self.fetch_keys = mock.AsyncMock(side_effect=mock_keys)
+        self.cache = JsonWebKeyCache(
+            load_keys=self.load_keys,
+            fetch_keys=self.fetch_keys,
+            refresh_sec=60,
+            min_refresh_sec=10,
+        )
+
+    @run_async
+    async def test_cold_start(self):
+        keys = await asyncio.gather(*[
+            self.cache.get_key(self.kid)
+            for _ in range(3)
+        ])
+        self.assertIsInstance(keys[0], Key)
+        self.assertTrue(all(key is keys[0] for key in keys))
+        self.load_keys.assert_called_once()
+        self.fetch_keys.assert_not_called()
+
+    @run_async
+    async def test_unknown_key(self):
+        await self.cache.get_key(self.kid)
+        with self.assertRaises(JWTError):
+            await asyncio.gather(*[
+                self.cache.get_key('unknown')
+                for _ in range(3)
+            ])
+        self.fetch_keys.assert_called_once()
+
+        # Okta is not asked again right after a refresh
+        with self.assertRaises(JWTError):
+            await self.cache.get_key('unknown')
+        self.fetch_keys.assert_called_once()
+
+    @run_async
+    async def test_refresh_old_keys(self):
+        key = await self.cache.get_key(self.kid)
+        self.cache._loaded_at -= 120
+        self.assertIs(await self.cache.get_key(self.kid), key)
+        await self.cache._loading
+        self.fetch_keys.assert_called_once()
+        self.assertIsNot(await self.cache.get_key(self.kid), key)
@@ -4,10 +4,12 @@ import unittest
 from unittest import mock
 
 import pytest
-from rexredis import RexRedis
+from fakeredis.aioredis import FakeRedis
 
 from ..mocks.state_store import FakeStore
+from ..utils import run_async
 from prism_api.state_manager.store import api as store
+from rexflow_ui.store import RedisConnection
 
 
 FakeStore.sleep_time = 0.1
@@ -59,23 +61,47 @@ class TestStateStore(unittest.TestCase):
 
 @pytest.mark.ci
 class TestRedisStore(unittest.TestCase):
-    def get_mock_instance(self):
-        mockInstance = mock.MagicMock(spec=RexRedis)
-        mockInstance.get_val.return_value = json.dumps(fake_state)
-        return mockInstance
-
-    def test_save_redis(self):
-        with mock.patch(
-            'prism_api.state_manager.store.adapters.RexRedis',
-            return_value=self.get_mock_instance(),
-        ):
-            state = asyncio.run(store.save_state(client_id, fake_state))
-            self.assertEqual(state, fake_state)
-
-    def test_read_redis(self):
-        with mock.patch(
-            'prism_api.state_manager.store.adapters.RexRedis',
-            return_value=self.get_mock_instance(),
-        ):
-            state = asyncio.run(store.read_state(client_id))
-            self.assertEqual(state, fake_state)
+    def setUp(self):
+        self.redis_connection = RedisConnection(retries=0)
+        patcher = mock.patch(
+            'prism_api.state_manager.store.adapters.redis_connection',
+            self.redis_connection,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use_fake_redis(self):
+        # The client must be created inside the test event loop
+        self.redis_connection._redis = FakeRedis(decode_responses=True)
+
+    @run_async
+    async def test_save_redis(self):
+        self.use_fake_redis()
+        state = await store.save_state(client_id, fake_state)
+        self.assertEqual(state, fake_state)
+
+    @run_async
+    async def test_read_redis(self):
+        self.use_fake_redis()
+        state = await store.read_state(client_id)
+        self.assertEqual(state, {})
+
+        await self.redis_connection.client.set(
+            client_id,
+            json.dumps(fake_state),
+        )
+        state = await store.read_state(client_id)
+        self.assertEqual(state, fake_state)
+
+    @run_async
+    async def test_read_many_redis(self):
+        self.use_fake_redis()
+        await store.save_state(client_id, fake_state)
+        with mock.patch.object(
+            self.redis_connection,
+            'execute',
+            wraps=self.redis_connection.execute,
+        ) as execute:
+            states = await store.read_raw_states([client_id, 'unknown'])
+        self.assertEqual(states, [json.dumps(fake_state), '{}'])
+        execute.assert_called_once()
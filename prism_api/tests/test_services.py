@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import pytest
+
+from .utils import run_async
+from prism_api.services import StatusCache
+
+
+@pytest.mark.ci
+class TestStatusCache(unittest.TestCase):
+    def setUp(self):
+        async def check_redis():
+            await asyncio.sleep(0.01)
+            return True
+
+        async def check_bridge():
+            await asyncio.sleep(1)
+            return True
+
+        self.check_redis = mock.AsyncMock(side_effect=check_redis)
+        self.check_bridge = mock.AsyncMock(side_effect=check_bridge)
+        patcher = mock.patch.dict(
+            'prism_api.services.services',
+            {'redis': self.check_redis, 'rexflow-bridge': self.check_bridge},
+            clear=True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = StatusCache(ttl=60, timeout=0.1)
+
+    @run_async
+    async def test_concurrent_checks(self):
+        results = await asyncio.gather(*[
+            self.cache.get()
+            for _ in range(3)
+        ])
+        self.assertTrue(all(result is results[0] for result in results))
+        status = results[0]
+        self.assertIs(status['redis'].status, True)
+        self.assertGreater(status['redis'].latency_ms, 0)
+        # Timed out
+        self.assertIs(status['rexflow-bridge'].status, False)
+        self.assertLess(status['rexflow-bridge'].latency_ms, 1000)
+        self.check_redis.assert_called_once()
+
+        self.assertIs(await self.cache.get(), status)
+        self.check_redis.assert_called_once()
+
+    @run_async
+    async def test_expired(self):
+        self.cache.ttl = 0
+        self.check_bridge.side_effect = ConnectionError
+        with self.assertLogs('prism_api.services', 'ERROR'):
+            status = await self.cache.get()
+        self.assertIs(status['rexflow-bridge'].status, False)
+        await asyncio.sleep(0.01)
+        await self.cache.get()
+        self.assertEqual(self.check_redis.call_count, 2)
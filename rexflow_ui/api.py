@@ -1,16 +1,20 @@
 """Interface to interact with REXFlow"""
 import asyncio
 import logging
+import os
+import socket
 from collections import defaultdict
-from typing import Dict, List, Optional
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional
 
-import backoff
 from pydantic import validate_arguments
 
 from .bridge import (
+    connection_pool,
     get_deployments,
     REXFlowBridge,
 )
+from .cache import DeploymentCache
 from .entities.types import (
     MetaData,
     Task,
@@ -25,48 +29,98 @@ from .entities.wrappers import (
     TaskChange,
     TaskOperationResults
 )
-from .errors import BridgeNotReachableError, REXFlowError
+from .errors import (
+    BridgeNotReachableError,
+    REXFlowError,
+    REXFlowNotReachable,
+)
+from .events import workflow_events
+from .metrics import STORE_RECLAIMED
+from .refresh import RefreshEngine, RefreshJob, RefreshReport
+from .settings import REXFLOW_START_POLL_SEC, REXFLOW_START_TIMEOUT_SEC
 from .store import Store, WorkflowNotFoundError
+from .tracing import traced
 
 logger = logging.getLogger()
 
+# Holder of the leases taken by this process
+LEASE_HOLDER = f'{socket.gethostname()}:{os.getpid()}'
 
-async def get_available_workflows(refresh=False) -> List[WorkflowDeployment]:
-    deployments = Store.get_deployments()
-    if refresh or len(deployments) == 0:
-        deployments = await get_deployments()
-        Store.save_deployments(deployments)
-    return deployments
+# Seconds other processes starting meanwhile skip the store migration
+STORE_MIGRATION_LEASE_SEC = 600
 
+# Statuses of finished workflows, which are kept in the store until they
+# expire even after their bridge forgets them
+FINISHED_STATUSES = {
+    WorkflowStatus.COMPLETED,
+    WorkflowStatus.CANCELED,
+    WorkflowStatus.ERROR,
+}
 
-async def find_workflow_deployment(
-    deployment_id: WorkflowDeploymentId,
-) -> Optional[WorkflowDeployment]:
-    workflows = await get_available_workflows()
-    for workflow in workflows:
-        if deployment_id in workflow.deployments:
-            return workflow
 
-    return None
+async def _load_deployments() -> List[WorkflowDeployment]:
+    try:
+        deployments = await get_deployments()
+    except REXFlowNotReachable:
+        # Fall back to the last deployments seen by any instance
+        deployments = await Store.get_deployments()
+        if len(deployments) == 0:
+            raise
+        logger.exception('Using stored deployments, flowd is not reachable')
+    else:
+        await Store.save_deployments(deployments)
+    return deployments
 
 
-def backoff_giveup(details: dict):
-    raise REXFlowError(
-        'Gave up on retrying getting a succesful update on REXFlow'
-    )
+deployment_cache = DeploymentCache(load_deployments=_load_deployments)
 
 
-@backoff.on_predicate(
-    backoff.fibo,
-    lambda workflow: workflow.status == WorkflowStatus.STARTING,
-    max_value=13,
-    logger=logger,
-    on_giveup=backoff_giveup,
-)
-async def _update_workflow(bridge: REXFlowBridge) -> Workflow:
-    return await bridge.update_workflow_data()
+async def get_available_workflows(refresh=False) -> List[WorkflowDeployment]:
+    """Deployed workflows, from memory unless refresh is requested
+
+    Nothing in this service deploys workflows, so the deployments in memory
+    are only replaced once their TTL passes or when refresh is requested.
+    The returned list is shared between callers and must not be modified.
+    """
+    if refresh:
+        return await deployment_cache.refresh()
+    return await deployment_cache.get()
 
 
+async def find_workflow_deployment(
+    deployment_id: WorkflowDeploymentId,
+) -> Optional[WorkflowDeployment]:
+    return await deployment_cache.get_by_did(deployment_id)
+
+
+async def _wait_until_started(bridge: REXFlowBridge) -> Workflow:
+    """Read the new workflow from the bridge once it leaves STARTING
+
+    The bridge is read again as soon as a status notification arrives for
+    the workflow, or every REXFLOW_START_POLL_SEC in case it never does.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + REXFLOW_START_TIMEOUT_SEC
+    # Subscribe before reading so a notification in between is not missed
+    with workflow_events.subscribe(bridge.workflow.iid) as status_changed:
+        while True:
+            status_changed.clear()
+            workflow = await bridge.update_workflow_data()
+            if workflow.status != WorkflowStatus.STARTING:
+                return workflow
+
+            timeout = min(REXFLOW_START_POLL_SEC, deadline - loop.time())
+            if timeout <= 0:
+                raise REXFlowError(
+                    f'Workflow {workflow.iid} did not start in time'
+                )
+            try:
+                await asyncio.wait_for(status_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+@traced()
 async def start_workflow(
     deployment_id: WorkflowDeploymentId,
     workflow_name: str = None,
@@ -86,40 +140,37 @@ async def start_workflow(
     except BridgeNotReachableError:
         logger.error('Trying to connect to an unreacheable bridge')
         raise
-    Store.add_workflow(workflow)
+    await Store.add_workflow(workflow)
     # refresh new workflow until running with metadata
     bridge = REXFlowBridge(workflow)
-    workflow = await _update_workflow(bridge)
+    workflow = await _wait_until_started(bridge)
     # prune workflow if started with error
     if workflow.status == WorkflowStatus.ERROR:
         logger.error(f'Error when starting workflow: {workflow}')
-        Store.delete_workflow(workflow.iid)
+        await Store.delete_workflow(workflow.iid)
         raise REXFlowError(
             f'Workflow {workflow.name} returned with ERROR status',
         )
 
-    Store.add_workflow(workflow)
+    await Store.add_workflow(workflow)
     return workflow
 
 
+@traced()
 async def start_workflow_by_name(
     workflow_name: str,
     metadata: List[MetaData] = [],
 ) -> Workflow:
-    deployments = await get_available_workflows()
-    try:
-        deployment_ids = [
-            deployment.deployments for deployment in deployments
-            if deployment.name == workflow_name
-        ].pop()
-    except IndexError:
-        logger.exception(f'Could not find a deployment for {workflow_name}')
+    deployment = await deployment_cache.get_by_name(workflow_name)
+    if deployment is None:
+        logger.error(f'Could not find a deployment for {workflow_name}')
         raise REXFlowError(f'Workflow {workflow_name} cannot be started')
 
+    deployment_ids = deployment.deployments
     if deployment_ids:
         # Start first deployment
         return await start_workflow(
-            deployment_ids.pop(),
+            deployment_ids[-1],
             workflow_name=workflow_name,
             metadata=metadata,
         )
@@ -128,43 +179,89 @@ async def start_workflow_by_name(
         raise REXFlowError(f'Workflow {workflow_name} cannot be started')
 
 
-async def _refresh_instance(
-    workflow_name: str,
-    did: WorkflowDeploymentId,
-    bridge_url: str,
-):
-    try:
-        instances = await REXFlowBridge.get_instances(bridge_url)
-    except BridgeNotReachableError:
-        logger.exception('Trying to connect to an unreacheable bridge')
-        instances = []
+@traced()
+async def _refresh_instance(deployment: WorkflowDeployment) -> Dict[str, int]:
+    """Save the changes to the instances of a deployment on its bridge
+
+    Only instances that are new or changed their status or metadata are
+    written, and unfinished stored instances the bridge no longer has are
+    removed.
+    """
+    # Read the stored instances first, so instances started while the bridge
+    # is asked are not taken as removed
+    stored_iids = set()
+    for did in deployment.deployments:
+        stored_iids.update(await Store.find_workflows(deployment_id=did))
+    instances = await REXFlowBridge.get_instances(deployment.bridge_url)
+
+    incoming_iids = {instance.iid for instance in instances}
+    stored = {
+        workflow.iid: workflow
+        for workflow in await Store.get_workflow_list(
+            list(stored_iids | incoming_iids),
+        )
+    } if stored_iids or incoming_iids else {}
+    removed_iids = {
+        iid
+        for iid in stored_iids - incoming_iids
+        if iid not in stored or stored[iid].status not in FINISHED_STATUSES
+    }
+
+    counts = {'added': 0, 'updated': 0, 'removed': 0}
     for instance in instances:
-        workflow = Workflow(
-            did=did,
-            iid=instance.iid,
-            name=workflow_name,
-            status=instance.iid_status,
-            metadata_dict={
-                data.key: data.value
-                for data in instance.meta_data
-            } if instance.meta_data else {},
-            bridge_url=bridge_url,
+        metadata_dict = {
+            data.key: data.value
+            for data in instance.meta_data
+        } if instance.meta_data else {}
+        workflow = stored.get(instance.iid)
+        if workflow is None:
+            workflow = Workflow(
+                # Instances are listed by bridge, the latest deployment is
+                # the one started by start_workflow_by_name
+                did=deployment.deployments[-1] if deployment.deployments else None,  # noqa E501
+                iid=instance.iid,
+                name=deployment.name,
+                status=instance.iid_status,
+                metadata_dict=metadata_dict,
+                bridge_url=deployment.bridge_url,
+            )
+            counts['added'] += 1
+        elif (
+            workflow.status != instance.iid_status
+            or workflow.metadata_dict != metadata_dict
+            or workflow.name != deployment.name
+            or workflow.bridge_url != deployment.bridge_url
+        ):
+            workflow = workflow.copy(update={
+                'status': instance.iid_status,
+                'metadata_dict': metadata_dict,
+                'name': deployment.name,
+                'bridge_url': deployment.bridge_url,
+            })
+            counts['updated'] += 1
+        else:
+            continue
+        await Store.add_workflow(workflow)
+
+    for iid in removed_iids:
+        await Store.delete_workflow(iid)
+    counts['removed'] = len(removed_iids)
+    return counts
+
+
+async def _refresh_instances(
+    engine: Optional[RefreshEngine] = None,
+) -> RefreshReport:
+    if engine is None:
+        engine = RefreshEngine()
+    return await engine.run('instances', [
+        RefreshJob(
+            name=deployment.name,
+            bridge_url=deployment.bridge_url,
+            run=partial(_refresh_instance, deployment),
         )
-        Store.add_workflow(workflow)
-
-
-async def _refresh_instances():
-    workflows = await get_available_workflows()
-    async_tasks = []
-    for workflow in workflows:
-        for did in workflow.deployments:
-            async_tasks.append(_refresh_instance(
-                workflow.name,
-                did,
-                workflow.bridge_url,
-            ))
-
-    await asyncio.gather(*async_tasks)
+        for deployment in await get_available_workflows()
+    ])
 
 
 async def _refresh_workflow(workflow: Workflow):
@@ -176,72 +273,178 @@ async def _refresh_workflow(workflow: Workflow):
         ])
     except BridgeNotReachableError:
         logger.exception('Trying to connect to the wrong bridge')
-        Store.delete_workflow(workflow.iid)
+        await Store.delete_workflow(workflow.iid)
     else:
         workflow.tasks = []
-        for task in tasks:
-            Store.add_task(task)
+        try:
+            for task in tasks:
+                await Store.add_task(task)
+        except WorkflowNotFoundError:
+            logger.info('Workflow %s deleted while refreshing', workflow.iid)
+
+
+@traced()
+async def refresh_workflows(
+    on_progress: Optional[Callable[[RefreshReport], None]] = None,
+) -> List[RefreshReport]:
+    """Refresh the instances of every deployment and the tasks of every
+    stored workflow, a few bridge requests at a time
+
+    Returns a report of the instances refresh and one of the workflows
+    refresh, which list the deployments and workflows that failed.
+    """
+    engine = RefreshEngine(on_progress=on_progress)
+    instances_report = await _refresh_instances(engine)
+    workflows_report = await engine.run('workflows', [
+        RefreshJob(
+            name=workflow.iid,
+            bridge_url=workflow.bridge_url,
+            run=partial(_refresh_workflow, workflow),
+        )
+        for workflow in await Store.get_workflow_list()
+    ])
+    return [instances_report, workflows_report]
 
 
-async def refresh_workflows() -> None:
-    """Asyncrhonously refresh all workflows tasks"""
-    await _refresh_instances()
-    await asyncio.gather(*[
-        _refresh_workflow(workflow)
-        for workflow in Store.get_workflow_list()
-    ])
+async def _refresh_and_report() -> None:
+    for report in await refresh_workflows():
+        logger.info(f'Workflow refresher {report}')
+
 
+async def run_workflow_refresher(interval: float) -> None:
+    """Refresh every workflow every interval seconds until cancelled
 
+    Only one of the processes sharing the store refreshes them, so bridges
+    are not queried once per process, and processes do not race to delete
+    the same workflows.
+    """
+    await _run_leased('workflow_refresher', interval, _refresh_and_report)
+
+
+@traced()
 async def get_active_workflows(
     iids: List[WorkflowInstanceId] = [],
     metadata: Dict = {},
 ) -> List[Workflow]:
+    active_iids = await Store.find_workflows(
+        status=WorkflowStatus.RUNNING,
+        session_id=metadata.get('session_id'),
+    )
+    if iids:
+        active_iids = set(active_iids)
+        active_iids = [iid for iid in iids if iid in active_iids]
+    if not active_iids:
+        return []
+
+    # Indexes may lag behind the stored workflow, so check it again
     workflows = [
         workflow
-        for workflow in Store.get_workflow_list(iids)
+        for workflow in await Store.get_workflow_list(active_iids)
         if workflow.status == WorkflowStatus.RUNNING
         and workflow.verify_metadata(metadata)
     ]
 
-    for workflow in workflows:
-        tasks = Store.get_workflow_tasks(workflow.iid)
-        workflow.tasks = list(tasks.values())
-
     return workflows
 
 
+@traced()
+async def get_workflows_tasks(
+    iids: List[WorkflowInstanceId],
+) -> Dict[WorkflowInstanceId, List[Task]]:
+    """Tasks of several workflows, read from the store at once"""
+    if not iids:
+        return {}
+    return {
+        workflow.iid: workflow.tasks
+        for workflow in await Store.get_workflow_list(iids)
+    }
+
+
 async def complete_workflow(
     instance_id: WorkflowInstanceId,
 ) -> None:
-    workflow = Store.get_workflow(instance_id)
+    workflow = await Store.get_workflow(instance_id)
     workflow.status = WorkflowStatus.COMPLETED
-    Store.add_workflow(workflow)
+    await Store.add_workflow(workflow)
 
 
 async def cancel_workflow(
     instance_id: WorkflowInstanceId,
 ) -> bool:
-    workflow = Store.get_workflow(instance_id)
+    workflow = await Store.get_workflow(instance_id)
     bridge = REXFlowBridge(workflow)
     result = await bridge.cancel_workflow()
 
     if result:
         workflow.status = WorkflowStatus.CANCELED
-        Store.add_workflow(workflow)
+        await Store.add_workflow(workflow)
 
     return result
 
 
+async def _cancel_bridge_workflows(
+    bridge_url: str,
+    workflows: List[Workflow],
+) -> List[bool]:
+    try:
+        return await REXFlowBridge.cancel_workflows(
+            bridge_url,
+            [workflow.iid for workflow in workflows],
+        )
+    except BridgeNotReachableError:
+        logger.exception('Trying to connect to an unreacheable bridge')
+        return [False for _ in workflows]
+
+
+@traced()
+async def cancel_workflows(
+    instance_ids: List[WorkflowInstanceId],
+) -> Dict[WorkflowInstanceId, bool]:
+    """Cancel several workflows, with one batched request per bridge
+
+    Returns whether each workflow was canceled, workflows that are not in
+    the store are not.
+    """
+    # Repeated workflows are only canceled once
+    instance_ids = list(dict.fromkeys(instance_ids))
+    results = {iid: False for iid in instance_ids}
+    if not instance_ids:
+        return results
+
+    bridge_workflows = defaultdict(list)
+    for workflow in await Store.get_workflow_list(instance_ids):
+        bridge_workflows[workflow.bridge_url].append(workflow)
+    bridge_results = await asyncio.gather(*[
+        _cancel_bridge_workflows(bridge_url, workflows)
+        for bridge_url, workflows in bridge_workflows.items()
+    ])
+
+    canceled = []
+    for workflows, canceled_list in zip(
+        bridge_workflows.values(),
+        bridge_results,
+    ):
+        for workflow, result in zip(workflows, canceled_list):
+            results[workflow.iid] = result
+            if result:
+                canceled.append(workflow.copy(update={
+                    'status': WorkflowStatus.CANCELED,
+                }))
+    await Store.add_workflows(canceled)
+    return results
+
+
+@traced()
 @validate_arguments
 async def start_tasks(
     iid: WorkflowInstanceId,
     tasks: List[TaskId]
 ) -> List[Task]:
     try:
-        workflow = Store.get_workflow(iid)
+        workflow = await Store.get_workflow(iid)
     except WorkflowNotFoundError:
         await _refresh_instances()
-        workflow = Store.get_workflow(iid)
+        workflow = await Store.get_workflow(iid)
     bridge = REXFlowBridge(workflow)
     created_tasks = []
     # Get tasks with initial values
@@ -253,26 +456,28 @@ async def start_tasks(
     # Save initial values
     await bridge.save_task_data(created_tasks)
     for task in created_tasks:
-        Store.add_task(task)
+        await Store.add_task(task)
     return created_tasks
 
 
+@traced()
 @validate_arguments
 async def get_task(iid: WorkflowInstanceId, tid: TaskId) -> Task:
-    bridge = REXFlowBridge(Store.get_workflow(iid))
+    bridge = REXFlowBridge(await Store.get_workflow(iid))
     task = (await bridge.get_task_data([tid])).pop()
-    Store.update_task(task)
+    await Store.update_task(task)
     return task
 
 
+@traced()
 async def _validate_tasks(
     iid: WorkflowInstanceId,
     tasks: List[TaskChange],
 ) -> TaskOperationResults:
-    bridge = REXFlowBridge(Store.get_workflow(iid))
+    bridge = REXFlowBridge(await Store.get_workflow(iid))
     updated_tasks = []
     for task_input in tasks:
-        task = Store.get_task(iid, task_input.tid)
+        task = await Store.get_task(iid, task_input.tid)
         task_data = task.get_data_dict()
         for task_data_input in task_input.data:
             task_data[task_data_input.dataId].data = task_data_input.data
@@ -289,6 +494,7 @@ async def _validate_tasks(
     return result
 
 
+@traced()
 @validate_arguments
 async def validate_tasks(tasks: List[TaskChange]) -> TaskOperationResults:
     workflow_instances = defaultdict(list)
@@ -307,14 +513,15 @@ async def validate_tasks(tasks: List[TaskChange]) -> TaskOperationResults:
     return final_result
 
 
+@traced()
 async def _save_tasks(
     iid: WorkflowInstanceId,
     tasks: List[TaskChange],
 ) -> TaskOperationResults:
-    bridge = REXFlowBridge(Store.get_workflow(iid))
+    bridge = REXFlowBridge(await Store.get_workflow(iid))
     updated_tasks = []
     for task_input in tasks:
-        task = Store.get_task(iid, task_input.tid)
+        task = await Store.get_task(iid, task_input.tid)
         task_data = task.get_data_dict()
         for task_data_input in task_input.data:
             task_data[task_data_input.dataId].data = task_data_input.data
@@ -331,6 +538,7 @@ async def _save_tasks(
     return result
 
 
+@traced()
 @validate_arguments
 async def save_tasks(tasks: List[TaskChange]) -> TaskOperationResults:
     workflow_instances = defaultdict(list)
@@ -349,12 +557,13 @@ async def save_tasks(tasks: List[TaskChange]) -> TaskOperationResults:
     return final_result
 
 
+@traced()
 async def _complete_tasks(
     iid: WorkflowInstanceId,
     tasks: List[TaskChange],
 ) -> TaskOperationResults:
     updated_tasks = await _save_tasks(iid, tasks)
-    bridge = REXFlowBridge(Store.get_workflow(iid))
+    bridge = REXFlowBridge(await Store.get_workflow(iid))
 
     try:
         result = await bridge.complete_task(updated_tasks.successful)
@@ -366,10 +575,11 @@ async def _complete_tasks(
 
     result.errors.extend(updated_tasks.errors)
     for task in result.successful:
-        Store.delete_task(iid, task.tid)
+        await Store.delete_task(iid, task.tid)
     return result
 
 
+@traced()
 @validate_arguments
 async def complete_tasks(
     tasks: List[TaskChange],
@@ -391,3 +601,104 @@ async def complete_tasks(
         final_result.errors.extend(result.errors)
 
     return final_result
+
+
+async def rebuild_store_indexes() -> int:
+    """Index the workflows saved before the store kept indexes"""
+    return await Store.rebuild_indexes()
+
+
+async def migrate_store() -> int:
+    """Move workflows saved with an earlier layout and index them"""
+    migrated = await Store.migrate()
+    await Store.rebuild_indexes()
+    return migrated
+
+
+async def migrate_store_on_startup() -> int:
+    """Migrate the store from one of the processes starting together
+
+    Workflows saved with an earlier layout, e.g. by processes of the
+    previous version, cannot be read until they are migrated. Migrating is
+    idempotent, so it runs on every start, but only in the process that
+    takes the lease.
+    """
+    try:
+        if not await Store.acquire_lease(
+            'store_migration',
+            LEASE_HOLDER,
+            STORE_MIGRATION_LEASE_SEC,
+        ):
+            return 0
+        migrated = await Store.migrate()
+        if migrated:
+            await Store.rebuild_indexes()
+    except Exception:
+        logger.exception('Store migration failed')
+        return 0
+    logger.info(f'Store migration moved {migrated} workflows')
+    return migrated
+
+
+async def reap_store() -> Dict[str, int]:
+    """Remove expired and orphaned workflows from the store"""
+    reclaimed = await Store.reap()
+    for kind, count in reclaimed.items():
+        STORE_RECLAIMED.labels(kind=kind).inc(count)
+    logger.info(
+        'Store reaper reclaimed '
+        + ', '.join(f'{count} {name}' for name, count in reclaimed.items())
+    )
+    return reclaimed
+
+
+async def _run_leased(
+    name: str,
+    interval: float,
+    job: Callable[[], Awaitable],
+) -> None:
+    """Run job every interval seconds in a single process until cancelled
+
+    Processes sharing the store compete for the lease name, which lasts
+    two intervals, so its holder renews it before it expires, and another
+    process takes over if the holder stops.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await Store.acquire_lease(name, LEASE_HOLDER, interval * 2):
+                await job()
+        except Exception:
+            logger.exception(f'Leased job {name} failed')
+
+
+async def run_store_reaper(interval: float) -> None:
+    """Reap the store every interval seconds in one process until cancelled"""
+    await _run_leased('store_reaper', interval, reap_store)
+
+
+async def notify_workflow_status(
+    iid: WorkflowInstanceId,
+    status: WorkflowStatus,
+) -> None:
+    """Wake the tasks of every process waiting on the workflow status"""
+    workflow_events.notify(iid)
+    await Store.publish_workflow_status(iid, status)
+
+
+async def run_workflow_status_listener(retry_interval: float = 1) -> None:
+    """Relay status changes published by other processes until cancelled"""
+    while True:
+        try:
+            async for iid, _ in Store.listen_workflow_status():
+                workflow_events.notify(iid)
+            return
+        except Exception:
+            logger.exception('Workflow status listener failed')
+        await asyncio.sleep(retry_interval)
+
+
+async def close_connections() -> None:
+    """Release connections kept open to REXFlow bridges and the store"""
+    await connection_pool.close()
+    await Store.close()
@@ -1,2 +1,3 @@
 from .deployments import get_deployments  # noqa F401
 from .gql import REXFlowBridgeGQL as REXFlowBridge  # noqa F401
+from .gql import connection_pool  # noqa F401
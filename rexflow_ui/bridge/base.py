@@ -27,6 +27,15 @@ class REXFlowBridgeABC(abc.ABC):
     ) -> List[WorkflowInstanceId]:
         raise NotImplementedError
 
+    @classmethod
+    @abc.abstractmethod
+    async def cancel_workflows(
+        cls,
+        bridge_url: str,
+        iids: List[WorkflowInstanceId],
+    ) -> List[bool]:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def __init__(self, workflow: Workflow) -> None:
         self.workflow = workflow
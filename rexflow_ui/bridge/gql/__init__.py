@@ -1 +1,2 @@
 from .bridge import REXFlowBridgeGQL  # noqa F501
+from .pool import connection_pool  # noqa F501
@@ -0,0 +1,110 @@
+"""Merge several runs of an operation into a single GraphQL document
+
+A batch of size 2 for `mutation ($input: Input!) { tasks { form(input:
+$input) } }` becomes `mutation ($input_0: Input!, $input_1: Input!) {
+tasks_0: tasks { form(input: $input_0) } tasks_1: tasks { form(input:
+$input_1) } }`, so the bridge receives one request instead of two.
+"""
+from copy import copy
+from typing import Dict, List, Tuple
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    NameNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    VariableNode,
+    Visitor,
+    parse,
+    print_ast,
+    visit,
+)
+
+from .documents import validate_document
+
+
+class _RenameVariables(Visitor):
+    def __init__(self, suffix: str):
+        super().__init__()
+        self.suffix = suffix
+
+    def enter_variable(self, node: VariableNode, *_):
+        return VariableNode(name=NameNode(value=node.name.value + self.suffix))
+
+
+class BatchDocument:
+    """Document that runs the operation of `document` `size` times"""
+
+    def __init__(self, document: DocumentNode, size: int):
+        if len(document.definitions) != 1:
+            raise ValueError('Only documents with one operation can batch')
+        operation = document.definitions[0]
+        if not isinstance(operation, OperationDefinitionNode):
+            raise ValueError('Only documents with one operation can batch')
+
+        self.size = size
+        self.response_keys = []
+        for selection in operation.selection_set.selections:
+            if not isinstance(selection, FieldNode):
+                raise ValueError('Only field selections can be batched')
+            key = selection.alias or selection.name
+            self.response_keys.append(key.value)
+
+        variable_definitions = []
+        selections = []
+        for i in range(size):
+            suffix = f'_{i}'
+            renamed = visit(operation, _RenameVariables(suffix))
+            variable_definitions.extend(renamed.variable_definitions)
+            for key, selection in zip(
+                self.response_keys,
+                renamed.selection_set.selections,
+            ):
+                aliased = copy(selection)
+                aliased.alias = NameNode(value=key + suffix)
+                selections.append(aliased)
+
+        name = operation.name.value if operation.name else 'Operation'
+        batch_document = DocumentNode(definitions=[
+            OperationDefinitionNode(
+                operation=operation.operation,
+                name=NameNode(value=f'{name}Batch'),
+                variable_definitions=variable_definitions,
+                directives=operation.directives,
+                selection_set=SelectionSetNode(selections=selections),
+            ),
+        ])
+        # Parse the printed document to get the same nodes the parser makes
+        self.document = parse(print_ast(batch_document))
+        validate_document(self.document)
+
+    def merge_params(self, params_list: List[Dict]) -> Dict:
+        """Variables for the batch, from the variables of each run"""
+        return {
+            f'{name}_{i}': value
+            for i, params in enumerate(params_list)
+            for name, value in (params or {}).items()
+        }
+
+    def split_result(self, result: Dict) -> List[Dict]:
+        """Result of each run, as if they had been executed one by one"""
+        return [
+            {key: result[f'{key}_{i}'] for key in self.response_keys}
+            for i in range(self.size)
+        ]
+
+
+_batch_documents: Dict[Tuple[int, int], Tuple[DocumentNode, BatchDocument]] = {}  # noqa E501
+
+
+def get_batch_document(document: DocumentNode, size: int) -> BatchDocument:
+    """Build a batch document once and reuse it afterwards"""
+    key = (id(document), size)
+    try:
+        _, batch = _batch_documents[key]
+    except KeyError:
+        batch = BatchDocument(document, size)
+        # keep a reference to the document so its id is not reused
+        _batch_documents[key] = (document, batch)
+    return batch
@@ -1,11 +1,7 @@
-import asyncio
 import logging
-from typing import List
+from typing import Dict, List, Tuple
 
-from gql import gql
-from pydantic import validate_arguments
-
-from . import queries
+from . import documents
 from .client import GQLClient
 from ..base import REXFlowBridgeABC
 from ...entities.types import (
@@ -18,6 +14,7 @@ from ...entities.types import (
     TaskStatus,
     Validator,
     Workflow,
+    WorkflowInstanceId,
     WorkflowInstanceInfo,
     WorkflowStatus,
 )
@@ -39,21 +36,37 @@ from ...entities.wrappers import (
     TaskValidatePayload,
 )
 from ...errors import ValidationErrorDetails
+from ...metrics import BRIDGE_SECONDS, get_host, instrument
+from ...tracing import trace_methods
 from ...settings import REXUI_CALLBACK_HOST
 
 
 logger = logging.getLogger(__name__)
 
 
+def _get_labels(
+    bridge,
+    operation: str,
+    args: Tuple,
+    kwargs: Dict,
+) -> Dict[str, str]:
+    if isinstance(bridge, REXFlowBridgeGQL):
+        bridge_url = bridge.workflow.bridge_url
+    else:
+        bridge_url = kwargs.get('bridge_url', args[0] if args else '')
+    return {'host': get_host(bridge_url), 'operation': operation}
+
+
+@instrument(BRIDGE_SECONDS, _get_labels)
+@trace_methods('bridge.', _get_labels)
 class REXFlowBridgeGQL(REXFlowBridgeABC):
     @classmethod
-    @validate_arguments
     async def start_workflow(
         cls,
         bridge_url: str,
         metadata: List[MetaData] = [],
     ) -> Workflow:
-        query = gql(queries.START_WORKFLOW_MUTATION)
+        query = documents.START_WORKFLOW_MUTATION
         params = {
             'createWorkflow': CreateWorkflowInstanceInput(
                 graphqlUri=REXUI_CALLBACK_HOST,
@@ -81,12 +94,11 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
         )
 
     @classmethod
-    @validate_arguments
     async def get_instances(
         cls,
         bridge_url: str,
     ) -> List[WorkflowInstanceInfo]:
-        query = gql(queries.GET_INSTANCES_QUERY)
+        query = documents.GET_INSTANCES_QUERY
 
         client = GQLClient(bridge_url)
         result = await client.execute(query)
@@ -94,13 +106,40 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
         payload = GetInstancePayload(**result['getInstances'])
         return payload.iid_list
 
-    @validate_arguments
+    @classmethod
+    async def cancel_workflows(
+        cls,
+        bridge_url: str,
+        iids: List[WorkflowInstanceId],
+    ) -> List[bool]:
+        """Cancel several workflows of a bridge in as few requests as possible
+
+        Returns whether each workflow was canceled, in the order of iids.
+        """
+        client = GQLClient(bridge_url)
+        results = await client.execute_batch(
+            documents.CANCEL_WORKFLOW_QUERY,
+            [
+                {
+                    'cancelWorkflow': CancelWorkflowInstanceInput(
+                        iid=iid,
+                    ).dict(),
+                }
+                for iid in iids
+            ],
+        )
+        return [
+            CancelInstancePayload(
+                **result['cancelInstance'],
+            ).status == OperationStatus.SUCCESS
+            for result in results
+        ]
+
     def __init__(self, workflow: Workflow) -> None:
         self.workflow = workflow
 
-    @validate_arguments
     async def update_workflow_data(self) -> Workflow:
-        query = gql(queries.GET_WORKFLOW_QUERY)
+        query = documents.GET_WORKFLOW_QUERY
 
         client = GQLClient(self.workflow.bridge_url)
         result = await client.execute(
@@ -129,7 +168,6 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
         self.workflow = workflow
         return workflow
 
-    @validate_arguments
     async def get_task_data(
         self,
         task_ids: List[TaskId] = [],
@@ -139,25 +177,19 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
         if len(task_ids) == 0:
             return []
 
-        query = gql(queries.GET_TASK_DATA_QUERY)
+        query = documents.GET_TASK_DATA_QUERY
 
         client = GQLClient(self.workflow.bridge_url)
-
-        async_tasks = []
-        for task_id in task_ids:
-            params = {
+        results = await client.execute_batch(query, [
+            {
                 'formInput': TaskMutationFormInput(
                     iid=self.workflow.iid,
                     tid=task_id,
                     reset=reset_values,
                 ).dict(),
             }
-            async_tasks.append(client.execute(
-                query,
-                params,
-            ))
-
-        results = await asyncio.gather(*async_tasks)
+            for task_id in task_ids
+        ])
 
         tasks = []
         for result in results:
@@ -188,17 +220,15 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
             tasks.append(task)
         return tasks
 
-    @validate_arguments
     async def validate_task_data(
         self,
         tasks: List[Task],
     ) -> TaskOperationResults:
-        query = gql(queries.VALIDATE_TASK_DATA_MUTATION)
+        query = documents.VALIDATE_TASK_DATA_MUTATION
 
         client = GQLClient(self.workflow.bridge_url)
-        async_tasks = []
-        for task in tasks:
-            params = {
+        async_results = await client.execute_batch(query, [
+            {
                 'validateTaskInput': TaskMutationValidateInput(
                     iid=self.workflow.iid,
                     tid=task.tid,
@@ -211,12 +241,8 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
                     ],
                 ).dict(),
             }
-            async_tasks.append(client.execute(
-                query,
-                params,
-            ))
-
-        async_results = await asyncio.gather(*async_tasks)
+            for task in tasks
+        ])
 
         tasks_dict = {task.tid: task for task in tasks}
         results = TaskOperationResults()
@@ -235,17 +261,15 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
 
         return results
 
-    @validate_arguments
     async def save_task_data(
         self,
         tasks: List[Task],
     ) -> TaskOperationResults:
-        query = gql(queries.SAVE_TASK_DATA_MUTATION)
+        query = documents.SAVE_TASK_DATA_MUTATION
 
         client = GQLClient(self.workflow.bridge_url)
-        async_tasks = []
-        for task in tasks:
-            params = {
+        async_results = await client.execute_batch(query, [
+            {
                 'saveTaskInput': TaskMutationSaveInput(
                     iid=self.workflow.iid,
                     tid=task.tid,
@@ -258,12 +282,8 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
                     ],
                 ).dict(),
             }
-            async_tasks.append(client.execute(
-                query,
-                params,
-            ))
-
-        async_results = await asyncio.gather(*async_tasks)
+            for task in tasks
+        ])
 
         tasks_dict = {task.tid: task for task in tasks}
         results = TaskOperationResults()
@@ -282,28 +302,22 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
 
         return results
 
-    @validate_arguments
     async def complete_task(
         self,
         tasks: List[Task],
     ) -> TaskOperationResults:
-        query = gql(queries.COMPLETE_TASK_MUTATION)
+        query = documents.COMPLETE_TASK_MUTATION
 
         client = GQLClient(self.workflow.bridge_url)
-        async_tasks = []
-        for task in tasks:
-            params = {
+        async_results = await client.execute_batch(query, [
+            {
                 'completeTaskInput': TaskMutationCompleteInput(
                     iid=self.workflow.iid,
                     tid=task.tid,
                 ).dict(),
             }
-            async_tasks.append(client.execute(
-                query,
-                params,
-            ))
-
-        async_results = await asyncio.gather(*async_tasks)
+            for task in tasks
+        ])
 
         tasks_dict = {task.tid: task for task in tasks}
         results = TaskOperationResults()
@@ -318,9 +332,8 @@ class REXFlowBridgeGQL(REXFlowBridgeABC):
 
         return results
 
-    @validate_arguments
     async def cancel_workflow(self) -> bool:
-        query = gql(queries.CANCEL_WORKFLOW_QUERY)
+        query = documents.CANCEL_WORKFLOW_QUERY
         params = {
             'cancelWorkflow': CancelWorkflowInstanceInput(
                 iid=self.workflow.iid,
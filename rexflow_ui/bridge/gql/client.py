@@ -1,6 +1,7 @@
+import asyncio
 import logging
 from urllib.parse import urljoin
-from typing import Dict
+from typing import Dict, List
 
 import backoff
 from aiohttp.client_exceptions import ClientError
@@ -8,13 +9,18 @@ from gql import Client
 from gql.client import AsyncClientSession
 from gql.transport import aiohttp
 from gql.transport.exceptions import TransportError, TransportServerError
+from graphql import DocumentNode
 
-from .schema import schema
+from .batch import get_batch_document
+from .pool import connection_pool
 from ...errors import (
     BridgeNotReachableError,
 )
+from ...metrics import BRIDGE_NOT_REACHABLE, count_backoff, get_host
+from ...tracing import get_trace_headers, start_span
 from ...settings import (
     LOG_LEVEL,
+    REXFLOW_BRIDGE_BATCH_SIZE,
     REXFLOW_EXECUTION_TIMEOUT,
 )
 
@@ -30,21 +36,29 @@ class GQLClient:
         self.url = url
         self.path = path
 
-    def _get_transport(self):
+    @property
+    def graphql_url(self) -> str:
         if '?' in self.url:
             # Do not set path when url has a query string
             # This is required for mock bridge
-            graphql_url = self.url
-        else:
-            graphql_url = urljoin(self.url, self.path)
+            return self.url
+        return urljoin(self.url, self.path)
+
+    def _get_transport(self):
         transport = aiohttp.AIOHTTPTransport(
-            url=graphql_url,
+            url=self.graphql_url,
+            headers=get_trace_headers(),
+            client_session_args={
+                'connector': connection_pool.get_connector(self.graphql_url),
+                # the connector is shared, closing the session must keep it
+                'connector_owner': False,
+            },
         )
         return transport
 
     def _get_client(self):
+        # Documents are validated beforehand, no schema is needed here
         return Client(
-            schema=schema,
             transport=self._get_transport(),
             execute_timeout=REXFLOW_EXECUTION_TIMEOUT,
         )
@@ -54,11 +68,12 @@ class GQLClient:
         TransportServerError,
         max_tries=3,
         logger=logger,
+        on_backoff=count_backoff,
     )
     async def _execute(
         self,
         session: AsyncClientSession,
-        query: str,
+        query: DocumentNode,
         params: Dict,
     ) -> Dict:
         try:
@@ -67,15 +82,50 @@ class GQLClient:
             logger.exception('We had an exception!')
             raise
 
-    async def execute(self, query: str, params: Dict = None) -> Dict:
-        client = self._get_client()
-        try:
-            async with client as session:
-                result = await self._execute(session, query, params)
-            logger.debug(result)
-        except (ClientError, TransportError) as e:
-            raise BridgeNotReachableError from e
-        finally:
-            await client.transport.close()
+    async def execute(self, query: DocumentNode, params: Dict = None) -> Dict:
+        with start_span('bridge.execute', url=self.url):
+            await connection_pool.evict_idle()
+            client = self._get_client()
+            try:
+                async with client as session:
+                    result = await self._execute(session, query, params)
+                logger.debug(result)
+            except (ClientError, TransportError) as e:
+                BRIDGE_NOT_REACHABLE.labels(host=get_host(self.url)).inc()
+                raise BridgeNotReachableError from e
+            finally:
+                await client.transport.close()
 
         return result
+
+    async def _execute_chunk(
+        self,
+        query: DocumentNode,
+        params_list: List[Dict],
+    ) -> List[Dict]:
+        if len(params_list) == 1:
+            return [await self.execute(query, params_list[0])]
+
+        batch = get_batch_document(query, len(params_list))
+        result = await self.execute(
+            batch.document,
+            batch.merge_params(params_list),
+        )
+        return batch.split_result(result)
+
+    async def execute_batch(
+        self,
+        query: DocumentNode,
+        params_list: List[Dict],
+    ) -> List[Dict]:
+        """Execute query once for each params in as few requests as possible
+
+        Runs are merged into requests of up to REXFLOW_BRIDGE_BATCH_SIZE
+        operations, results are returned in the same order as params_list.
+        """
+        batch_size = max(REXFLOW_BRIDGE_BATCH_SIZE, 1)
+        chunks = await asyncio.gather(*[
+            self._execute_chunk(query, params_list[i:i + batch_size])
+            for i in range(0, len(params_list), batch_size)
+        ])
+        return [result for chunk in chunks for result in chunk]
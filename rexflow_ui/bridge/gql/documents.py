@@ -0,0 +1,44 @@
+"""Parsed GraphQL documents for the queries sent to the bridge
+
+Documents are parsed and validated against the bridge schema once, when
+this module is imported, so requests can send them without doing it again.
+"""
+from graphql import DocumentNode, parse, validate
+
+from . import queries
+from .schema import schema
+
+
+def validate_document(document: DocumentNode) -> None:
+    """Raise the first error found validating against the bridge schema"""
+    errors = validate(schema, document)
+    if errors:
+        raise errors[0]
+
+
+def compile_document(source: str) -> DocumentNode:
+    """Parse a query and validate it against the bridge schema"""
+    document = parse(source)
+    validate_document(document)
+    return document
+
+
+START_WORKFLOW_MUTATION = compile_document(queries.START_WORKFLOW_MUTATION)
+
+CANCEL_WORKFLOW_QUERY = compile_document(queries.CANCEL_WORKFLOW_QUERY)
+
+GET_INSTANCES_QUERY = compile_document(queries.GET_INSTANCES_QUERY)
+
+GET_WORKFLOW_QUERY = compile_document(queries.GET_WORKFLOW_QUERY)
+
+GET_TASK_LIST_QUERY = compile_document(queries.GET_TASK_LIST_QUERY)
+
+GET_TASK_DATA_QUERY = compile_document(queries.GET_TASK_DATA_QUERY)
+
+VALIDATE_TASK_DATA_MUTATION = compile_document(
+    queries.VALIDATE_TASK_DATA_MUTATION,
+)
+
+SAVE_TASK_DATA_MUTATION = compile_document(queries.SAVE_TASK_DATA_MUTATION)
+
+COMPLETE_TASK_MUTATION = compile_document(queries.COMPLETE_TASK_MUTATION)
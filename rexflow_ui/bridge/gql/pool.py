@@ -0,0 +1,96 @@
+"""Keep-alive connections shared by all requests to a bridge"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict
+from urllib.parse import urlsplit
+
+from aiohttp import TCPConnector
+
+from ...settings import (
+    REXFLOW_BRIDGE_CONNECTION_LIMIT,
+    REXFLOW_BRIDGE_IDLE_SEC,
+    REXFLOW_BRIDGE_KEEPALIVE_SEC,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PoolEntry:
+    connector: TCPConnector
+    loop: asyncio.AbstractEventLoop
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class BridgeConnectionPool:
+    """Registry of aiohttp connectors, one per bridge host
+
+    Every request to a bridge uses the connector of its host, so sockets
+    are kept alive and reused between requests instead of opening a new
+    connection each time. Connectors that have not been used for
+    `idle_timeout` seconds are closed, so it must be longer than any request.
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = REXFLOW_BRIDGE_CONNECTION_LIMIT,
+        keepalive_timeout: float = REXFLOW_BRIDGE_KEEPALIVE_SEC,
+        idle_timeout: float = REXFLOW_BRIDGE_IDLE_SEC,
+    ):
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, _PoolEntry] = {}
+
+    @staticmethod
+    def _get_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    def _create_entry(self, loop: asyncio.AbstractEventLoop) -> _PoolEntry:
+        connector = TCPConnector(
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        return _PoolEntry(connector=connector, loop=loop)
+
+    def get_connector(self, url: str) -> TCPConnector:
+        """Connector for the host of url"""
+        key = self._get_key(url)
+        loop = asyncio.get_running_loop()
+        entry = self._entries.get(key)
+        # Connectors are bound to the event loop that created them
+        if entry is None or entry.loop is not loop or entry.connector.closed:
+            logger.debug(f'Opening connection pool for {key}')
+            entry = self._create_entry(loop)
+            self._entries[key] = entry
+        entry.last_used = time.monotonic()
+        return entry.connector
+
+    async def _close_entry(self, entry: _PoolEntry) -> None:
+        if entry.loop is asyncio.get_running_loop():
+            await entry.connector.close()
+
+    async def evict_idle(self) -> None:
+        """Close connectors that have not been used recently"""
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if now - entry.last_used > self.idle_timeout:
+                logger.debug(f'Closing idle connection pool for {key}')
+                del self._entries[key]
+                await self._close_entry(entry)
+
+    async def close(self) -> None:
+        """Close every connector, used on application shutdown"""
+        entries = list(self._entries.values())
+        self._entries = {}
+        for entry in entries:
+            await self._close_entry(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+connection_pool = BridgeConnectionPool()
@@ -0,0 +1,107 @@
+"""In-process cache of the workflows deployed on REXFlow"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .entities.types import WorkflowDeployment, WorkflowDeploymentId
+from .settings import (
+    REXFLOW_DEPLOYMENTS_MAX_STALE_SEC,
+    REXFLOW_DEPLOYMENTS_TTL_SEC,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DeploymentCache:
+    """Available workflows kept in memory between queries
+
+    Deployments from `load_deployments` are served for `ttl` seconds. Once
+    older, they are still served while a refresh runs in the background,
+    until they are `max_stale` seconds old and callers wait for it instead.
+    Concurrent refreshes share one call to `load_deployments`. Lookups by
+    deployment id and by name use maps built once per load.
+
+    The same list is returned to every caller, so it must not be modified.
+    """
+
+    def __init__(
+        self,
+        load_deployments: Callable[[], Awaitable[List[WorkflowDeployment]]],
+        ttl: float = REXFLOW_DEPLOYMENTS_TTL_SEC,
+        max_stale: float = REXFLOW_DEPLOYMENTS_MAX_STALE_SEC,
+    ):
+        self.load_deployments = load_deployments
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._deployments: List[WorkflowDeployment] = []
+        self._by_did: Dict[WorkflowDeploymentId, WorkflowDeployment] = {}
+        self._by_name: Dict[str, WorkflowDeployment] = {}
+        self._loaded_at: Optional[float] = None
+        self._loading: Optional[asyncio.Future] = None
+        # Bumped on invalidation, so loads started before it are not fresh
+        self._generation = 0
+
+    def _is_loading(self) -> bool:
+        return self._loading is not None and not self._loading.done()
+
+    async def _load(self) -> List[WorkflowDeployment]:
+        generation = self._generation
+        deployments = await self.load_deployments()
+        if generation == self._generation:
+            self._deployments = deployments
+            self._by_did = {}
+            self._by_name = {}
+            for deployment in deployments:
+                for did in deployment.deployments:
+                    self._by_did.setdefault(did, deployment)
+                # Names deployed more than once resolve to the last one
+                self._by_name[deployment.name] = deployment
+            self._loaded_at = time.monotonic()
+        return deployments
+
+    @staticmethod
+    def _log_refresh_error(loading: asyncio.Future) -> None:
+        if not loading.cancelled() and loading.exception() is not None:
+            logger.error(
+                'Could not refresh the available workflows',
+                exc_info=loading.exception(),
+            )
+
+    def _refresh(self) -> asyncio.Future:
+        if not self._is_loading():
+            self._loading = asyncio.ensure_future(self._load())
+        return self._loading
+
+    async def refresh(self) -> List[WorkflowDeployment]:
+        """Load the deployments now, joining a refresh already running"""
+        return await asyncio.shield(self._refresh())
+
+    async def get(self) -> List[WorkflowDeployment]:
+        if self._loaded_at is None:
+            return await self.refresh()
+
+        age = time.monotonic() - self._loaded_at
+        if age > self.max_stale:
+            return await self.refresh()
+        if age > self.ttl and not self._is_loading():
+            # Keep serving the current deployments while they are refreshed
+            self._refresh().add_done_callback(self._log_refresh_error)
+        return self._deployments
+
+    async def get_by_did(
+        self,
+        deployment_id: WorkflowDeploymentId,
+    ) -> Optional[WorkflowDeployment]:
+        await self.get()
+        return self._by_did.get(deployment_id)
+
+    async def get_by_name(self, name: str) -> Optional[WorkflowDeployment]:
+        await self.get()
+        return self._by_name.get(name)
+
+    def invalidate(self) -> None:
+        """Make the next get wait for deployments loaded after this call"""
+        self._generation += 1
+        self._loaded_at = None
+        self._loading = None
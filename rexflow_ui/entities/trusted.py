@@ -0,0 +1,88 @@
+"""Load entities from JSON written by this package, without validating it
+
+Data saved by the store was validated when the entities were created, so
+reading it back only needs its enums restored. Models are built with
+`construct`, which is several times faster than parsing them. Data that
+does not have the expected shape, e.g. written by an older version, is
+parsed with validation instead, which raises ValidationError if it is
+invalid, as parse_raw does.
+"""
+import json
+from typing import Dict
+
+from .types import (
+    DataType,
+    Task,
+    TaskFieldData,
+    TaskStatus,
+    TextVariant,
+    Validator,
+    ValidatorEnum,
+    Workflow,
+    WorkflowStatus,
+)
+
+# Errors raised when trusted data does not have the expected shape
+SHAPE_ERRORS = (KeyError, TypeError, ValueError)
+
+
+def _construct_validator(data: Dict) -> Validator:
+    return Validator.construct(
+        type=ValidatorEnum(data['type']),
+        constraint=data.get('constraint'),
+    )
+
+
+def _construct_task_field_data(data: Dict) -> TaskFieldData:
+    variant = data.get('variant')
+    return TaskFieldData.construct(
+        data_id=data['data_id'],
+        type=DataType(data['type']),
+        order=data['order'],
+        label=data.get('label'),
+        data=data.get('data'),
+        variant=TextVariant(variant) if variant is not None else None,
+        encrypted=data.get('encrypted', False),
+        validators=[
+            _construct_validator(validator)
+            for validator in data.get('validators', [])
+        ],
+    )
+
+
+def _construct_task(data: Dict) -> Task:
+    return Task.construct(
+        iid=data['iid'],
+        tid=data['tid'],
+        data=[
+            _construct_task_field_data(field_data)
+            for field_data in data.get('data', [])
+        ],
+        status=TaskStatus(data.get('status', TaskStatus.UP)),
+    )
+
+
+def _construct_workflow(data: Dict) -> Workflow:
+    return Workflow.construct(
+        iid=data['iid'],
+        did=data.get('did'),
+        name=data.get('name'),
+        status=WorkflowStatus(data['status']),
+        tasks=[_construct_task(task) for task in data.get('tasks', [])],
+        metadata_dict=dict(data.get('metadata_dict', {})),
+        bridge_url=data.get('bridge_url'),
+    )
+
+
+def load_task(raw: str) -> Task:
+    try:
+        return _construct_task(json.loads(raw))
+    except SHAPE_ERRORS:
+        return Task.parse_raw(raw)
+
+
+def load_workflow(raw: str) -> Workflow:
+    try:
+        return _construct_workflow(json.loads(raw))
+    except SHAPE_ERRORS:
+        return Workflow.parse_raw(raw)
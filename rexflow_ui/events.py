@@ -0,0 +1,37 @@
+"""Wake the tasks waiting for a workflow to change status"""
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+from .entities.types import WorkflowInstanceId
+
+
+class WorkflowStatusEvents:
+    """Events of the tasks waiting on each workflow of this process
+
+    Notifications only say a workflow changed, waiters read its new status
+    from the bridge, so a notification can be repeated without harm.
+    """
+
+    def __init__(self):
+        self._events: Dict[WorkflowInstanceId, Set[asyncio.Event]] = defaultdict(set)  # noqa E501
+
+    @contextmanager
+    def subscribe(self, iid: WorkflowInstanceId) -> Iterator[asyncio.Event]:
+        """Event set whenever iid is notified while in the context"""
+        event = asyncio.Event()
+        self._events[iid].add(event)
+        try:
+            yield event
+        finally:
+            self._events[iid].discard(event)
+            if not self._events[iid]:
+                del self._events[iid]
+
+    def notify(self, iid: WorkflowInstanceId) -> None:
+        for event in self._events.get(iid, ()):
+            event.set()
+
+
+workflow_events = WorkflowStatusEvents()
@@ -0,0 +1,91 @@
+"""Prometheus metrics of the calls made to bridges and to the store"""
+import time
+from functools import wraps
+from inspect import isawaitable, isfunction
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.metrics import MetricWrapperBase
+
+T = TypeVar('T')
+
+# Labels of a call, from the class or instance, method name and arguments
+GetLabels = Callable[[Any, str, Tuple, Dict], Dict[str, str]]
+
+BRIDGE_SECONDS = Histogram(
+    'rexflow_bridge_request_seconds',
+    'Time taken by REXFlow bridge operations',
+    ['host', 'operation'],
+)
+BRIDGE_NOT_REACHABLE = Counter(
+    'rexflow_bridge_not_reachable_total',
+    'REXFlow bridge requests that could not reach the bridge',
+    ['host'],
+)
+STORE_SECONDS = Histogram(
+    'rexflow_store_operation_seconds',
+    'Time taken by workflow store operations',
+    ['operation'],
+)
+STORE_RECLAIMED = Counter(
+    'rexflow_store_reclaimed_total',
+    'Workflows, instances and index entries reclaimed by the store reaper',
+    ['kind'],
+)
+BACKOFF_RETRIES = Counter(
+    'rexflow_backoff_retries_total',
+    'Calls retried by backoff decorators',
+    ['function'],
+)
+
+
+def get_host(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+def count_backoff(details: Dict) -> None:
+    """on_backoff handler of backoff decorators"""
+    BACKOFF_RETRIES.labels(function=details['target'].__qualname__).inc()
+
+
+async def _observe(awaitable: Awaitable[T], metric: MetricWrapperBase) -> T:
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        metric.observe(time.perf_counter() - start)
+
+
+def _wrap(
+    method: Callable,
+    histogram: Histogram,
+    get_labels: GetLabels,
+) -> Callable:
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(owner, *args, **kwargs):
+        result = method(owner, *args, **kwargs)
+        # Only coroutines are timed, async generators are left as they are
+        if not isawaitable(result):
+            return result
+        labels = get_labels(owner, name, args, kwargs)
+        return _observe(result, histogram.labels(**labels))
+    return wrapper
+
+
+def instrument(histogram: Histogram, get_labels: GetLabels):
+    """Class decorator timing the coroutines of public methods"""
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if name.startswith('_'):
+                continue
+            if isinstance(attr, classmethod):
+                setattr(cls, name, classmethod(
+                    _wrap(attr.__func__, histogram, get_labels),
+                ))
+            elif isfunction(attr):
+                setattr(cls, name, _wrap(attr, histogram, get_labels))
+        return cls
+    return decorate
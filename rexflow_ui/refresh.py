@@ -0,0 +1,108 @@
+"""Refresh data from REXFlow bridges without overwhelming them"""
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .settings import (
+    REXFLOW_REFRESH_BRIDGE_CONCURRENCY,
+    REXFLOW_REFRESH_CONCURRENCY,
+    REXFLOW_REFRESH_TIMEOUT_SEC,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshJob:
+    """Refresh of a single item, e.g. a deployment or a workflow"""
+    name: str
+    bridge_url: str
+    # May return counts of what it changed, which are added to the report
+    run: Callable[[], Awaitable[Optional[Dict[str, int]]]]
+
+
+@dataclass
+class RefreshReport:
+    """Progress and outcome of a refresh, failures are kept by job name"""
+    name: str
+    total: int
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def done(self) -> int:
+        return len(self.succeeded) + len(self.failed)
+
+    def __str__(self) -> str:
+        counts = ''.join(
+            f', {count} {name}' for name, count in self.counts.items()
+        )
+        return (
+            f'{self.name}: {len(self.succeeded)} refreshed, '
+            f'{len(self.failed)} failed of {self.total}{counts}'
+        )
+
+
+class RefreshEngine:
+    """Run refresh jobs with bounded concurrency
+
+    At most `max_concurrency` jobs run at once, and at most `max_per_bridge`
+    of them against the same bridge. Each job may take `timeout` seconds.
+    A failing job is recorded in the report instead of raising, so the
+    other jobs complete. `on_progress` is called after each job finishes.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = REXFLOW_REFRESH_CONCURRENCY,
+        max_per_bridge: int = REXFLOW_REFRESH_BRIDGE_CONCURRENCY,
+        timeout: float = REXFLOW_REFRESH_TIMEOUT_SEC,
+        on_progress: Optional[Callable[[RefreshReport], None]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_per_bridge = max_per_bridge
+        self.timeout = timeout
+        self.on_progress = on_progress
+
+    async def run(
+        self,
+        name: str,
+        jobs: Iterable[RefreshJob],
+    ) -> RefreshReport:
+        jobs = list(jobs)
+        report = RefreshReport(name=name, total=len(jobs))
+        # Semaphores are bound to the loop of the run that creates them
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        bridge_semaphores = defaultdict(
+            lambda: asyncio.Semaphore(self.max_per_bridge),
+        )
+
+        async def run_job(job: RefreshJob):
+            # Wait for the bridge first, so jobs of a busy bridge do not
+            # hold slots that jobs of other bridges could use
+            async with bridge_semaphores[job.bridge_url], semaphore:
+                try:
+                    counts = await asyncio.wait_for(job.run(), self.timeout)
+                except asyncio.TimeoutError:
+                    report.failed[job.name] = (
+                        f'timed out after {self.timeout}s'
+                    )
+                except Exception as ex:
+                    logger.exception(f'Could not refresh {job.name}')
+                    report.failed[job.name] = str(ex) or type(ex).__name__
+                else:
+                    report.succeeded.append(job.name)
+                    for count_name, count in (counts or {}).items():
+                        report.counts[count_name] = (
+                            report.counts.get(count_name, 0) + count
+                        )
+            if self.on_progress is not None:
+                self.on_progress(report)
+
+        await asyncio.gather(*[run_job(job) for job in jobs])
+        if report.failed:
+            logger.warning(str(report))
+        return report
@@ -6,3 +6,58 @@ LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 REXUI_CALLBACK_HOST = os.getenv('REX_REXUI_SERVER_CALLBACK_HOST')
 REXFLOW_FLOWD_HOST = os.getenv('REX_REXFLOW_FLOWD_HOST')
 REXFLOW_EXECUTION_TIMEOUT = int(os.getenv('REX_REXFLOW_EXECUTION_TIMEOUT', 30))
+
+# Seconds a new workflow may take to start, and between checks of its status
+# on the bridge when no status notification arrives
+REXFLOW_START_TIMEOUT_SEC = float(os.getenv('REX_REXFLOW_START_TIMEOUT_SEC', 60))  # noqa E501
+REXFLOW_START_POLL_SEC = float(os.getenv('REX_REXFLOW_START_POLL_SEC', 5))
+
+# Keep-alive connections shared by every request to the same bridge
+REXFLOW_BRIDGE_CONNECTION_LIMIT = int(os.getenv('REX_REXFLOW_BRIDGE_CONNECTION_LIMIT', 20))  # noqa E501
+REXFLOW_BRIDGE_KEEPALIVE_SEC = float(os.getenv('REX_REXFLOW_BRIDGE_KEEPALIVE_SEC', 30))  # noqa E501
+REXFLOW_BRIDGE_IDLE_SEC = float(os.getenv('REX_REXFLOW_BRIDGE_IDLE_SEC', 300))
+# Operations on several tasks are merged into requests of up to this size
+REXFLOW_BRIDGE_BATCH_SIZE = int(os.getenv('REX_REXFLOW_BRIDGE_BATCH_SIZE', 10))
+
+# Bridge requests made at once when refreshing workflows, in total and to
+# the same bridge, and seconds each of them may take
+REXFLOW_REFRESH_CONCURRENCY = int(os.getenv('REX_REXFLOW_REFRESH_CONCURRENCY', 20))  # noqa E501
+REXFLOW_REFRESH_BRIDGE_CONCURRENCY = int(os.getenv('REX_REXFLOW_REFRESH_BRIDGE_CONCURRENCY', 4))  # noqa E501
+REXFLOW_REFRESH_TIMEOUT_SEC = float(os.getenv('REX_REXFLOW_REFRESH_TIMEOUT_SEC', 30))  # noqa E501
+# Seconds between refreshes of every workflow, 0 disables them
+REXFLOW_REFRESH_INTERVAL_SEC = int(os.getenv('REX_REXFLOW_REFRESH_INTERVAL_SEC', 0))  # noqa E501
+
+# Connection pool shared by the stores
+REDIS_HOST = os.getenv('REX_DS_REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.getenv('REX_DS_REDIS_PORT', 6379))
+REDIS_MAX_CONNECTIONS = int(os.getenv('REX_DS_REDIS_MAX_CONNECTIONS', 50))
+# Seconds an operation waits for a connection once all of them are in use
+REDIS_POOL_TIMEOUT_SEC = float(os.getenv('REX_DS_REDIS_POOL_TIMEOUT_SEC', 5))
+# Seconds between pings of the pool, and seconds a connection may stay idle
+# before it is pinged on its next use, 0 disables them
+REDIS_HEALTH_CHECK_INTERVAL_SEC = int(os.getenv('REX_DS_REDIS_HEALTH_CHECK_INTERVAL_SEC', 30))  # noqa E501
+# Attempts of a retried operation after connection errors, and seconds
+# waited before the first retry, doubled on each of the next ones
+REDIS_RETRIES = int(os.getenv('REX_DS_REDIS_RETRIES', 3))
+REDIS_RETRY_BACKOFF_SEC = float(os.getenv('REX_DS_REDIS_RETRY_BACKOFF_SEC', 0.1))  # noqa E501
+
+# Seconds workflows are kept after finishing with these statuses, 0 keeps
+# them forever
+REXFLOW_WORKFLOW_TTL_SEC = {
+    status: int(os.getenv(f'REX_REXFLOW_{status}_WORKFLOW_TTL_SEC', 604800))
+    for status in ['COMPLETED', 'CANCELED', 'ERROR']
+}
+# Seconds between removals of expired and orphaned store data, 0 disables it
+REXFLOW_STORE_REAPER_INTERVAL_SEC = int(os.getenv('REX_REXFLOW_STORE_REAPER_INTERVAL_SEC', 600))  # noqa E501
+
+# Seconds available workflows are served from memory before refreshing them
+# in the background, and seconds stale ones may still be served meanwhile;
+# new deployments are only seen once these pass
+REXFLOW_DEPLOYMENTS_TTL_SEC = float(os.getenv('REX_REXFLOW_DEPLOYMENTS_TTL_SEC', 60))  # noqa E501
+REXFLOW_DEPLOYMENTS_MAX_STALE_SEC = float(os.getenv('REX_REXFLOW_DEPLOYMENTS_MAX_STALE_SEC', 3600))  # noqa E501
+
+# File where trace spans are written as JSON lines, with the pid of each
+# worker added before its extension, tracing is disabled when it is not set,
+# and spans buffered before each write to it
+REXFLOW_TRACE_FILE = os.getenv('REX_REXFLOW_TRACE_FILE')
+REXFLOW_TRACE_BATCH_SIZE = int(os.getenv('REX_REXFLOW_TRACE_BATCH_SIZE', 100))
@@ -4,4 +4,5 @@ from .errors import (  # noqa FQ401
     TaskNotFoundError,
 )
 
+from .connection import RedisConnection, redis_connection  # noqa FQ401
 from .redis import Store  # noqa FQ401
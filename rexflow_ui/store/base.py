@@ -1,40 +1,48 @@
 """Abstract base class for Store adapter"""
 import abc
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from ..entities.types import (
     Task,
     TaskId,
     Workflow,
     WorkflowDeployment,
+    WorkflowDeploymentId,
     WorkflowInstanceId,
+    WorkflowStatus,
 )
 
 
 class StoreABC(abc.ABC):
     @classmethod
     @abc.abstractmethod
-    def save_deployments(cls, deployments: List[WorkflowDeployment]):
+    async def save_deployments(cls, deployments: List[WorkflowDeployment]):
         raise NotImplementedError
 
     @classmethod
     @abc.abstractmethod
-    def get_deployments(cls) -> List[WorkflowDeployment]:
+    async def get_deployments(cls) -> List[WorkflowDeployment]:
         raise NotImplementedError
 
     @classmethod
     @abc.abstractmethod
-    def add_workflow(cls, workflow: Workflow):
+    async def add_workflow(cls, workflow: Workflow):
         raise NotImplementedError
 
+    @classmethod
+    async def add_workflows(cls, workflows: List[Workflow]):
+        """Save several workflows, at once if the store can"""
+        for workflow in workflows:
+            await cls.add_workflow(workflow)
+
     @classmethod
     @abc.abstractmethod
-    def get_workflow(cls, workflow_id: WorkflowInstanceId) -> Workflow:
+    async def get_workflow(cls, workflow_id: WorkflowInstanceId) -> Workflow:
         raise NotImplementedError
 
     @classmethod
     @abc.abstractmethod
-    def get_workflow_list(
+    async def get_workflow_list(
         cls,
         iids: List[WorkflowInstanceId] = [],
     ) -> List[Workflow]:
@@ -42,17 +50,32 @@ class StoreABC(abc.ABC):
 
     @classmethod
     @abc.abstractmethod
-    def delete_workflow(cls, workflow_id: WorkflowInstanceId):
+    async def find_workflows(
+        cls,
+        status: Optional[WorkflowStatus] = None,
+        session_id: Optional[str] = None,
+        deployment_id: Optional[WorkflowDeploymentId] = None,
+    ) -> List[WorkflowInstanceId]:
+        """Instance ids of workflows with a status, owned by a session and
+        instanced from a deployment
+
+        Filters that are None match every workflow.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    async def delete_workflow(cls, workflow_id: WorkflowInstanceId):
         raise NotImplementedError
 
     @classmethod
     @abc.abstractmethod
-    def add_task(cls, task: Task):
+    async def add_task(cls, task: Task):
         raise NotImplementedError
 
     @classmethod
     @abc.abstractmethod
-    def update_task(cls, task: Task):
+    async def update_task(cls, task: Task):
         """Updates an existing task
 
         Updates task information if it already exists in storage, but if it
@@ -62,7 +85,7 @@ class StoreABC(abc.ABC):
 
     @classmethod
     @abc.abstractmethod
-    def get_workflow_tasks(
+    async def get_workflow_tasks(
         cls,
         workflow_id: WorkflowInstanceId,
     ) -> Dict[TaskId, Task]:
@@ -70,7 +93,7 @@ class StoreABC(abc.ABC):
 
     @classmethod
     @abc.abstractmethod
-    def get_task(
+    async def get_task(
         cls,
         workflow_id: WorkflowInstanceId,
         task_id: TaskId,
@@ -79,9 +102,68 @@ class StoreABC(abc.ABC):
 
     @classmethod
     @abc.abstractmethod
-    def delete_task(
+    async def delete_task(
         cls,
         workflow_id: WorkflowInstanceId,
         task_id: TaskId,
     ) -> None:
         raise NotImplementedError
+
+    @classmethod
+    async def close(cls) -> None:
+        """Release the connections held by the store"""
+
+    @classmethod
+    async def rebuild_indexes(cls) -> int:
+        """Build the lookup indexes again from the stored workflows
+
+        Returns the number of indexed workflows. Stores that look workflows
+        up without indexes have nothing to rebuild.
+        """
+        return len(await cls.find_workflows())
+
+    @classmethod
+    async def migrate(cls) -> int:
+        """Move data saved with an earlier layout to the current one
+
+        Returns the number of migrated workflows.
+        """
+        return 0
+
+    @classmethod
+    async def reap(cls) -> Dict[str, int]:
+        """Remove data that expired or can no longer be reached
+
+        Returns how many entries of each kind were reclaimed.
+        """
+        return {}
+
+    @classmethod
+    async def acquire_lease(cls, name: str, holder: str, ttl: float) -> bool:
+        """Hold the lease name for ttl seconds, or renew it for its holder
+
+        Returns whether holder has the lease, which only one of the
+        processes sharing the store has at a time. Stores that are not
+        shared between processes give it to every caller.
+        """
+        return True
+
+    @classmethod
+    async def publish_workflow_status(
+        cls,
+        workflow_id: WorkflowInstanceId,
+        status: WorkflowStatus,
+    ) -> None:
+        """Tell the other processes sharing the store about a status change"""
+
+    @classmethod
+    async def listen_workflow_status(
+        cls,
+    ) -> AsyncIterator[Tuple[WorkflowInstanceId, WorkflowStatus]]:
+        """Status changes published by the processes sharing the store
+
+        Stores that are not shared between processes have none, so this
+        ends right away.
+        """
+        return
+        yield
@@ -0,0 +1,210 @@
+"""Redis connections shared by the stores of this process"""
+import asyncio
+import logging
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import aioredis
+from aioredis.connection import Connection
+from aioredis.exceptions import ConnectionError, TimeoutError
+
+from ..settings import (
+    REDIS_HEALTH_CHECK_INTERVAL_SEC,
+    REDIS_HOST,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_POOL_TIMEOUT_SEC,
+    REDIS_PORT,
+    REDIS_RETRIES,
+    REDIS_RETRY_BACKOFF_SEC,
+)
+from ..tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Errors after which the connection is dropped and the operation retried
+RETRIED_ERRORS = (ConnectionError, TimeoutError, OSError)
+
+# Messages of the ConnectionError raised by aioredis pools, blocking or not,
+# when all of their connections are in use
+POOL_EXHAUSTED_MESSAGES = ('No connection available.', 'Too many connections')
+
+
+def _is_pool_exhausted(ex: Exception) -> bool:
+    """Whether ex was raised by the pool rather than by Redis"""
+    return (
+        isinstance(ex, ConnectionError)
+        and str(ex) in POOL_EXHAUSTED_MESSAGES
+    )
+
+
+def _get_pool_connections(
+    pool: aioredis.ConnectionPool,
+) -> Tuple[List[Connection], List[Connection]]:
+    """Connections created by the pool, and those idle in it
+
+    aioredis does not expose them, so they are read from private attributes
+    of its pools, blocking or not, and none are found if those change.
+    """
+    if hasattr(pool, '_connections'):
+        # Blocking pools queue their idle connections, and None for each
+        # connection they may still open
+        queue = getattr(getattr(pool, 'pool', None), '_queue', ())
+        idle = [connection for connection in queue if connection is not None]
+        return list(pool._connections), idle
+    idle = list(getattr(pool, '_available_connections', ()))
+    in_use = list(getattr(pool, '_in_use_connections', ()))
+    return idle + in_use, idle
+
+
+class RedisConnection:
+    """Client with a pool of connections opened as they are needed
+
+    Once max_connections are open, operations wait up to pool_timeout
+    seconds for one of them to be released.
+
+    Operations are not preceded by a PING. Connections that fail are
+    dropped by the pool and reopened on their next use, and `execute`
+    retries operations after connection errors, unless they are marked as
+    not idempotent. Whether Redis is reachable is checked out of band by
+    `run_health_check`, and after failed operations.
+    """
+
+    def __init__(
+        self,
+        host: str = REDIS_HOST,
+        port: int = REDIS_PORT,
+        max_connections: int = REDIS_MAX_CONNECTIONS,
+        pool_timeout: float = REDIS_POOL_TIMEOUT_SEC,
+        health_check_interval: float = REDIS_HEALTH_CHECK_INTERVAL_SEC,
+        retries: int = REDIS_RETRIES,
+        retry_backoff: float = REDIS_RETRY_BACKOFF_SEC,
+    ):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.health_check_interval = health_check_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.healthy: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self.failures = 0
+        self.retried = 0
+        self._redis: Optional[aioredis.Redis] = None
+
+    @property
+    def client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.Redis(
+                connection_pool=aioredis.BlockingConnectionPool(
+                    host=self.host,
+                    port=self.port,
+                    max_connections=self.max_connections,
+                    timeout=self.pool_timeout,
+                    health_check_interval=self.health_check_interval,
+                    decode_responses=True,
+                ),
+            )
+        return self._redis
+
+    async def execute(
+        self,
+        operation: Callable[[aioredis.Redis], Awaitable[T]],
+        idempotent: bool = True,
+    ) -> T:
+        """Run operation, again after connection errors, up to `retries`
+
+        Operations are run again from the start, since it is not known how
+        much of them Redis applied, so only idempotent ones are retried.
+        """
+        retries = self.retries if idempotent else 0
+        for attempt in range(retries + 1):
+            try:
+                with start_span('redis.execute', attempt=attempt):
+                    return await operation(self.client)
+            except RETRIED_ERRORS as ex:
+                # Redis is fine, waiting longer would only add to the load
+                if _is_pool_exhausted(ex):
+                    raise
+                self.failures += 1
+                self.healthy = False
+                if attempt == retries:
+                    raise
+                logger.warning(f'Redis operation failed, retrying: {ex}')
+                self.retried += 1
+                await self._drop_connections()
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _drop_connections(self) -> None:
+        # Connections in use are dropped by their users when they fail
+        if self._redis is not None:
+            _, idle = _get_pool_connections(self._redis.connection_pool)
+            await asyncio.gather(
+                *[connection.disconnect() for connection in idle],
+                return_exceptions=True,
+            )
+
+    async def check_health(self, timeout: Optional[float] = None) -> bool:
+        """Whether Redis answers a PING, within timeout seconds if given"""
+        try:
+            self.healthy = await asyncio.wait_for(self.client.ping(), timeout)
+        except Exception as ex:
+            if _is_pool_exhausted(ex):
+                logger.warning('Redis health check found no free connection')
+                return bool(self.healthy)
+            logger.warning(f'Redis is not reachable: {ex}')
+            self.healthy = False
+            await self._drop_connections()
+        self.checked_at = time.time()
+        return self.healthy
+
+    async def run_health_check(self, interval: float) -> None:
+        """Check whether Redis is reachable every interval until cancelled
+
+        A check that takes longer than the interval fails, so a Redis that
+        hangs is reported as unhealthy.
+        """
+        while True:
+            await self.check_health(timeout=interval)
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Union[int, bool, float, None]]:
+        """State of the pool and of the operations run by execute"""
+        stats = {
+            'healthy': self.healthy,
+            'checked_at': self.checked_at,
+            'failures': self.failures,
+            'retried': self.retried,
+            'max_connections': self.max_connections,
+            'created_connections': 0,
+            'available_connections': 0,
+            'in_use_connections': 0,
+        }
+        if self._redis is not None:
+            created, idle = _get_pool_connections(self._redis.connection_pool)
+            stats.update(
+                created_connections=len(created),
+                available_connections=len(idle),
+                in_use_connections=len(created) - len(idle),
+            )
+        return stats
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            redis, self._redis = self._redis, None
+            await redis.close()
+            await redis.connection_pool.disconnect()
+
+
+redis_connection = RedisConnection()
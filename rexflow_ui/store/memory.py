@@ -1,6 +1,6 @@
 """Store workflow information"""
 import logging
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 from .base import StoreABC
 from .errors import (
@@ -12,7 +12,9 @@ from ..entities.types import (
     TaskId,
     Workflow,
     WorkflowDeployment,
+    WorkflowDeploymentId,
     WorkflowInstanceId,
+    WorkflowStatus,
 )
 
 logger = logging.getLogger(__name__)
@@ -27,15 +29,15 @@ class Store(StoreABC):
     ] = {}
 
     @classmethod
-    def save_deployments(cls, deployments: List[WorkflowDeployment]):
+    async def save_deployments(cls, deployments: List[WorkflowDeployment]):
         cls._deployments = deployments
 
     @classmethod
-    def get_deployments(cls) -> List[WorkflowDeployment]:
+    async def get_deployments(cls) -> List[WorkflowDeployment]:
         return cls._deployments
 
     @classmethod
-    def add_workflow(cls, workflow: Workflow):
+    async def add_workflow(cls, workflow: Workflow):
         if workflow.iid in cls._data:
             cls._data[workflow.iid]['workflow'] = workflow
             workflow.tasks = list(cls._data[workflow.iid]['tasks'].values())
@@ -43,46 +45,64 @@ class Store(StoreABC):
             cls._data[workflow.iid] = {'workflow': workflow, 'tasks': {}}
 
     @classmethod
-    def get_workflow(cls, workflow_id: WorkflowInstanceId) -> Workflow:
+    async def get_workflow(cls, workflow_id: WorkflowInstanceId) -> Workflow:
         try:
             return cls._data[workflow_id]['workflow']
         except KeyError as e:
             raise WorkflowNotFoundError from e
 
     @classmethod
-    def get_workflow_list(
+    async def get_workflow_list(
         cls,
         iids: List[WorkflowInstanceId] = [],
     ) -> List[Workflow]:
+        workflows = []
+        for iid, d in cls._data.items():
+            if iid in iids or iids == []:
+                d['workflow'].tasks = list(d['tasks'].values())
+                workflows.append(d['workflow'])
+        return workflows
+
+    @classmethod
+    async def find_workflows(
+        cls,
+        status: Optional[WorkflowStatus] = None,
+        session_id: Optional[str] = None,
+        deployment_id: Optional[WorkflowDeploymentId] = None,
+    ) -> List[WorkflowInstanceId]:
         return [
-            d['workflow']
+            iid
             for iid, d in cls._data.items()
-            if iid in iids
-            or iids == []
+            if status in (None, d['workflow'].status)
+            and session_id in (
+                None,
+                d['workflow'].metadata_dict.get('session_id'),
+            )
+            and deployment_id in (None, d['workflow'].did)
         ]
 
     @classmethod
-    def delete_workflow(cls, workflow_id: WorkflowInstanceId):
+    async def delete_workflow(cls, workflow_id: WorkflowInstanceId):
         try:
             del cls._data[workflow_id]
         except KeyError:
             logger.exception('Tried to delete unexisting workflow')
 
     @classmethod
-    def add_task(cls, task: Task):
-        workflow = cls.get_workflow(task.iid)
+    async def add_task(cls, task: Task):
+        workflow = await cls.get_workflow(task.iid)
         if task.tid not in [t.tid for t in workflow.tasks]:
             workflow.tasks.append(task)
         cls._data[task.iid]['tasks'][task.tid] = task
 
     @classmethod
-    def update_task(cls, task: Task):
+    async def update_task(cls, task: Task):
         workflow_data = cls._data.get(task.iid)
         if workflow_data and workflow_data['tasks'].get(task.tid):
             cls._data[task.iid]['tasks'][task.tid] = task
 
     @classmethod
-    def get_workflow_tasks(
+    async def get_workflow_tasks(
         cls,
         workflow_id: WorkflowInstanceId,
     ) -> Dict[TaskId, Task]:
@@ -92,7 +112,7 @@ class Store(StoreABC):
             raise WorkflowNotFoundError from e
 
     @classmethod
-    def get_task(
+    async def get_task(
         cls,
         workflow_id: WorkflowInstanceId,
         task_id: TaskId,
@@ -103,7 +123,7 @@ class Store(StoreABC):
             raise TaskNotFoundError from e
 
     @classmethod
-    def delete_task(
+    async def delete_task(
         cls,
         workflow_id: WorkflowInstanceId,
         task_id: TaskId,
@@ -1,170 +1,682 @@
+import json
 import logging
-from typing import Dict, List
+from collections import defaultdict
+from typing import (
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+import aioredis
 from pydantic.error_wrappers import ValidationError
-from rexredis import RexRedis
 
 from .base import StoreABC
+from .connection import redis_connection
+from ..metrics import STORE_SECONDS, instrument
+from ..tracing import trace_methods
 from .errors import (
     WorkflowNotFoundError,
     TaskNotFoundError,
 )
+from ..entities.trusted import load_task, load_workflow
 from ..entities.types import (
     Task,
     TaskId,
     Workflow,
     WorkflowDeployment,
+    WorkflowDeploymentId,
     WorkflowInstanceId,
+    WorkflowStatus,
 )
+from ..settings import REXFLOW_WORKFLOW_TTL_SEC
 
 logger = logging.getLogger(__name__)
 
 
+@instrument(
+    STORE_SECONDS,
+    lambda store, operation, args, kwargs: {'operation': operation},
+)
+@trace_methods('store.')
 class Store(StoreABC):
-    _redis = None
-
     DEPLOYMENT_KEY = 'rexflow:deployments'
 
-    WORKFLOW_PREFIX = 'workflow:'
+    # Pub/sub channel where workflow status changes are announced
+    STATUS_CHANNEL = 'rexflow:workflow_status'
+
+    # Each workflow instance is a hash, with the workflow under
+    # WORKFLOW_FIELD and every task under its tid
+    INSTANCE_PREFIX = 'instance:'
+
+    WORKFLOW_FIELD = 'workflow'
+
+    # Layout used before instances were hashes, see migrate
+    LEGACY_WORKFLOW_PREFIX = 'workflow:'
+
+    LEGACY_TASK_PREFIX = 'task:'
+
+    # Sets kept up to date when workflows are saved, so they can be found
+    # without scanning the keyspace
+    INDEX_PREFIX = 'index:'
 
-    TASK_PREFIX = 'task:'
+    WORKFLOW_INDEX_KEY = INDEX_PREFIX + 'workflows'
+
+    STATUS_INDEX_PREFIX = INDEX_PREFIX + 'status:'
+
+    SESSION_INDEX_PREFIX = INDEX_PREFIX + 'session:'
+
+    DEPLOYMENT_INDEX_PREFIX = INDEX_PREFIX + 'deployment:'
+
+    SESSION_ID_KEY = 'session_id'
+
+    # Leases of the jobs that only one process sharing the store runs
+    LEASE_PREFIX = 'lease:'
+
+    # Keys inspected by Redis on each step of a scan
+    SCAN_COUNT = 1000
 
     @classmethod
-    def _get_redis(cls):
-        if cls._redis is None or cls._redis.ping() is False:
-            cls._redis = RexRedis()
-        return cls._redis
+    async def close(cls) -> None:
+        await redis_connection.close()
 
     @classmethod
-    def save_deployments(cls, deployments: List[WorkflowDeployment]):
-        redis = cls._get_redis()
-        redis.set_json(
-            cls.DEPLOYMENT_KEY,
-            [deployment.dict() for deployment in deployments],
+    async def save_deployments(cls, deployments: List[WorkflowDeployment]):
+        data = json.dumps([deployment.dict() for deployment in deployments])
+        await redis_connection.execute(
+            lambda redis: redis.set(cls.DEPLOYMENT_KEY, data),
         )
 
     @classmethod
-    def get_deployments(cls) -> List[WorkflowDeployment]:
-        redis = cls._get_redis()
-        deployments = redis.get_from_json(cls.DEPLOYMENT_KEY)
+    async def get_deployments(cls) -> List[WorkflowDeployment]:
+        deployments = await redis_connection.execute(
+            lambda redis: redis.get(cls.DEPLOYMENT_KEY),
+        )
         if deployments:
             return [
                 WorkflowDeployment(**deployment)
-                for deployment in deployments
+                for deployment in json.loads(deployments)
             ]
         else:
             return []
 
     @classmethod
-    def add_workflow(cls, workflow: Workflow):
-        redis = cls._get_redis()
-        redis.set_json(cls.WORKFLOW_PREFIX + workflow.iid, workflow.dict())
+    def _get_instance_key(cls, iid: WorkflowInstanceId) -> str:
+        return cls.INSTANCE_PREFIX + iid
 
     @classmethod
-    def _get_workflow(cls, workflow_key):
-        redis = cls._get_redis()
-        workflow_data = redis.get_from_json(workflow_key)
-        if workflow_data:
-            try:
-                workflow = Workflow(**workflow_data)
-            except ValidationError:
-                redis.delete_keys(workflow_key)
-        else:
-            raise WorkflowNotFoundError
-        tasks = cls.get_workflow_tasks(workflow.iid)
-        workflow.tasks = list(tasks.values())
-        return workflow
+    def _get_status_index_key(cls, status: WorkflowStatus) -> str:
+        return cls.STATUS_INDEX_PREFIX + status.value
+
+    @classmethod
+    def _get_session_index_key(cls, session_id: str) -> str:
+        return cls.SESSION_INDEX_PREFIX + session_id
 
     @classmethod
-    def get_workflow(cls, workflow_id: WorkflowInstanceId) -> Workflow:
-        workflow = cls._get_workflow(cls.WORKFLOW_PREFIX + workflow_id)
+    def _get_deployment_index_key(
+        cls,
+        deployment_id: WorkflowDeploymentId,
+    ) -> str:
+        return cls.DEPLOYMENT_INDEX_PREFIX + deployment_id
+
+    @classmethod
+    def _get_workflow_index_keys(cls, workflow: Workflow) -> List[str]:
+        """Keys of the index sets that should contain the workflow"""
+        index_keys = [
+            cls.WORKFLOW_INDEX_KEY,
+            cls._get_status_index_key(workflow.status),
+        ]
+        session_id = workflow.metadata_dict.get(cls.SESSION_ID_KEY)
+        if session_id is not None:
+            index_keys.append(cls._get_session_index_key(session_id))
+        if workflow.did is not None:
+            index_keys.append(cls._get_deployment_index_key(workflow.did))
+        return index_keys
+
+    @classmethod
+    def _dump_workflow(cls, workflow: Workflow) -> str:
+        # Tasks are saved in their own fields
+        return workflow.json(exclude={'tasks'})
+
+    @classmethod
+    def _load_instance(cls, instance_data: Dict[str, str]) -> Workflow:
+        """Workflow with its tasks from the fields of an instance hash"""
+        workflow = load_workflow(instance_data.pop(cls.WORKFLOW_FIELD))
+        workflow.tasks = [
+            load_task(task_data)
+            for task_data in instance_data.values()
+        ]
         return workflow
 
     @classmethod
-    def get_workflow_list(
+    def _get_ttl(cls, status: WorkflowStatus) -> int:
+        return REXFLOW_WORKFLOW_TTL_SEC.get(status.value, 0)
+
+    @classmethod
+    async def add_workflow(cls, workflow: Workflow):
+        await cls.add_workflows([workflow])
+
+    @classmethod
+    async def add_workflows(cls, workflows: List[Workflow]):
+        if not workflows:
+            return
+
+        async def get_saved(redis: aioredis.Redis) -> List:
+            async with redis.pipeline(transaction=False) as pipe:
+                for workflow in workflows:
+                    instance_key = cls._get_instance_key(workflow.iid)
+                    pipe.ttl(instance_key)
+                    pipe.hget(instance_key, cls.WORKFLOW_FIELD)
+                return await pipe.execute()
+
+        saved = await redis_connection.execute(get_saved)
+        # Saving a finished workflow again must not postpone its expiration
+        ttls = dict(zip([workflow.iid for workflow in workflows], saved[::2]))
+        # Index keys of the previous session of workflows that changed it
+        stale_index_keys = {}
+        for workflow, workflow_data in zip(workflows, saved[1::2]):
+            if workflow_data is None:
+                continue
+            metadata = json.loads(workflow_data).get('metadata_dict', {})
+            session_id = metadata.get(cls.SESSION_ID_KEY)
+            new_session_id = workflow.metadata_dict.get(cls.SESSION_ID_KEY)
+            if session_id is not None and session_id != new_session_id:
+                stale_index_keys[workflow.iid] = cls._get_session_index_key(
+                    session_id,
+                )
+
+        await redis_connection.execute(lambda redis: cls._save_workflows(
+            redis,
+            workflows,
+            ttls,
+            stale_index_keys,
+        ))
+
+    @classmethod
+    async def _save_workflows(
+        cls,
+        redis: aioredis.Redis,
+        workflows: List[Workflow],
+        ttls: Dict[WorkflowInstanceId, int],
+        stale_index_keys: Dict[WorkflowInstanceId, str],
+    ) -> None:
+        async with redis.pipeline(transaction=True) as pipe:
+            for workflow in workflows:
+                instance_key = cls._get_instance_key(workflow.iid)
+                ttl = cls._get_ttl(workflow.status)
+                pipe.hset(
+                    instance_key,
+                    cls.WORKFLOW_FIELD,
+                    cls._dump_workflow(workflow),
+                )
+                if ttl > 0 and ttls[workflow.iid] < 0:
+                    pipe.expire(instance_key, ttl)
+                elif ttl == 0:
+                    pipe.persist(instance_key)
+                # Move the workflow out of the index of its previous status
+                for status in WorkflowStatus:
+                    if status != workflow.status:
+                        pipe.srem(
+                            cls._get_status_index_key(status),
+                            workflow.iid,
+                        )
+                if workflow.iid in stale_index_keys:
+                    pipe.srem(stale_index_keys[workflow.iid], workflow.iid)
+                for index_key in cls._get_workflow_index_keys(workflow):
+                    pipe.sadd(index_key, workflow.iid)
+            await pipe.execute()
+
+    @classmethod
+    async def get_workflow(cls, workflow_id: WorkflowInstanceId) -> Workflow:
+        instance_data = await redis_connection.execute(
+            lambda redis: redis.hgetall(cls._get_instance_key(workflow_id)),
+        )
+        if cls.WORKFLOW_FIELD not in instance_data:
+            raise WorkflowNotFoundError
+        try:
+            return cls._load_instance(instance_data)
+        except ValidationError as e:
+            await cls.delete_workflow(workflow_id)
+            raise WorkflowNotFoundError from e
+
+    @classmethod
+    def _chunks(cls, items: Sequence) -> Iterator[Sequence]:
+        """Split items to keep each pipeline or command reasonably small"""
+        for i in range(0, len(items), cls.SCAN_COUNT):
+            yield items[i:i + cls.SCAN_COUNT]
+
+    @classmethod
+    async def _scan_keys(cls, match: str) -> List[str]:
+        async def scan(redis: aioredis.Redis) -> List[str]:
+            return [
+                key
+                async for key in redis.scan_iter(
+                    match=match,
+                    count=cls.SCAN_COUNT,
+                )
+            ]
+
+        return await redis_connection.execute(scan)
+
+    @classmethod
+    async def get_workflow_list(
         cls,
         iids: List[WorkflowInstanceId] = [],
     ) -> List[Workflow]:
         if len(iids) == 0:
-            redis = cls._get_redis()
-            workflow_keys = redis.find_keys(cls.WORKFLOW_PREFIX)
-        else:
-            workflow_keys = [
-                cls.WORKFLOW_PREFIX + iid
-                for iid in iids
-            ]
+            iids = await cls.find_workflows()
+        if not iids:
+            return []
+
+        async def get_instances(redis: aioredis.Redis) -> List[Dict]:
+            async with redis.pipeline(transaction=False) as pipe:
+                for iid in iids:
+                    pipe.hgetall(cls._get_instance_key(iid))
+                return await pipe.execute()
+
+        instances_data = await redis_connection.execute(get_instances)
 
         workflows = []
-        for workflow_key in workflow_keys:
+        invalid_iids = []
+        for iid, instance_data in zip(iids, instances_data):
+            if cls.WORKFLOW_FIELD not in instance_data:
+                logger.error(f'Data for workflow {iid} not found')
+                continue
             try:
-                workflow = cls._get_workflow(workflow_key)
-            except WorkflowNotFoundError:
-                logger.exception(f'Data for {workflow_key} not found')
-            else:
-                workflows.append(workflow)
+                workflows.append(cls._load_instance(instance_data))
+            except ValidationError:
+                logger.exception(f'Invalid data for workflow {iid}')
+                invalid_iids.append(iid)
+        for iid in invalid_iids:
+            await cls.delete_workflow(iid)
 
         return workflows
 
     @classmethod
-    def delete_workflow(cls, workflow_id: WorkflowInstanceId):
-        workflow_key = cls.WORKFLOW_PREFIX + workflow_id
-        redis = cls._get_redis()
-        redis.delete_keys(workflow_key)
+    async def find_workflows(
+        cls,
+        status: Optional[WorkflowStatus] = None,
+        session_id: Optional[str] = None,
+        deployment_id: Optional[WorkflowDeploymentId] = None,
+    ) -> List[WorkflowInstanceId]:
+        index_keys = [cls.WORKFLOW_INDEX_KEY]
+        if status is not None:
+            index_keys.append(cls._get_status_index_key(status))
+        if session_id is not None:
+            index_keys.append(cls._get_session_index_key(session_id))
+        if deployment_id is not None:
+            index_keys.append(cls._get_deployment_index_key(deployment_id))
+        return list(await redis_connection.execute(
+            lambda redis: redis.sinter(index_keys),
+        ))
 
     @classmethod
-    def _get_task_key(cls, iid: WorkflowInstanceId, tid: TaskId) -> str:
-        return f'{cls.TASK_PREFIX}{iid}:{tid}'
+    async def delete_workflow(cls, workflow_id: WorkflowInstanceId):
+        instance_key = cls._get_instance_key(workflow_id)
+        workflow_data = await redis_connection.execute(
+            lambda redis: redis.hget(instance_key, cls.WORKFLOW_FIELD),
+        )
+
+        async def delete(redis: aioredis.Redis) -> None:
+            async with redis.pipeline(transaction=True) as pipe:
+                # Tasks are fields of the instance, so they go with it
+                pipe.delete(instance_key)
+                pipe.srem(cls.WORKFLOW_INDEX_KEY, workflow_id)
+                for status in WorkflowStatus:
+                    pipe.srem(cls._get_status_index_key(status), workflow_id)
+                if workflow_data is not None:
+                    workflow_dict = json.loads(workflow_data)
+                    metadata = workflow_dict.get('metadata_dict', {})
+                    session_id = metadata.get(cls.SESSION_ID_KEY)
+                    if session_id is not None:
+                        pipe.srem(
+                            cls._get_session_index_key(session_id),
+                            workflow_id,
+                        )
+                    deployment_id = workflow_dict.get('did')
+                    if deployment_id is not None:
+                        pipe.srem(
+                            cls._get_deployment_index_key(deployment_id),
+                            workflow_id,
+                        )
+                await pipe.execute()
+
+        await redis_connection.execute(delete)
 
     @classmethod
-    def add_task(cls, task: Task):
-        redis = cls._get_redis()
-        redis.set_json(cls._get_task_key(task.iid, task.tid), task.dict())
+    async def add_task(cls, task: Task):
+        instance_key = cls._get_instance_key(task.iid)
+        data = task.json()
+
+        async def add_to_workflow(pipe):
+            # Tasks of missing workflows would never expire nor be found
+            if await pipe.hexists(instance_key, cls.WORKFLOW_FIELD):
+                pipe.multi()
+                pipe.hset(instance_key, task.tid, data)
+
+        added = await redis_connection.execute(lambda redis: redis.transaction(
+            add_to_workflow,
+            instance_key,
+        ))
+        if not added:
+            raise WorkflowNotFoundError
 
     @classmethod
-    def update_task(cls, task: Task):
-        redis = cls._get_redis()
-        task_key = cls._get_task_key(task.iid, task.tid)
-        if redis.exists(task_key):
-            redis.set_json(task_key, task.dict())
+    async def update_task(cls, task: Task):
+        instance_key = cls._get_instance_key(task.iid)
+        data = task.json()
+
+        async def update_existing_task(pipe):
+            if await pipe.hexists(instance_key, task.tid):
+                pipe.multi()
+                pipe.hset(instance_key, task.tid, data)
+
+        # Retried if the instance changes between the check and the update
+        await redis_connection.execute(lambda redis: redis.transaction(
+            update_existing_task,
+            instance_key,
+        ))
 
     @classmethod
-    def get_workflow_tasks(
+    async def get_workflow_tasks(
         cls,
         workflow_id: WorkflowInstanceId,
     ) -> Dict[TaskId, Task]:
-        redis = cls._get_redis()
-        if not redis.exists(cls.WORKFLOW_PREFIX + workflow_id):
-            raise WorkflowNotFoundError
-        task_keys = redis.find_keys(cls.TASK_PREFIX + workflow_id)
-        tasks = {}
-        for task_key in task_keys:
-            task_data = redis.get_from_json(task_key)
-            if task_data:
-                task = Task(**task_data)
-                tasks[task.tid] = task
-        return tasks
+        workflow = await cls.get_workflow(workflow_id)
+        return workflow.get_task_dict()
 
     @classmethod
-    def get_task(
+    async def get_task(
         cls,
         workflow_id: WorkflowInstanceId,
         task_id: TaskId,
     ) -> Task:
-        task_key = cls._get_task_key(workflow_id, task_id)
-        redis = cls._get_redis()
-        task_data = redis.get_from_json(task_key)
+        instance_key = cls._get_instance_key(workflow_id)
+        task_data = await redis_connection.execute(
+            lambda redis: redis.hget(instance_key, task_id),
+        )
         if task_data is None:
             raise TaskNotFoundError
-        return Task(**task_data)
+        return load_task(task_data)
 
     @classmethod
-    def delete_task(
+    async def delete_task(
         cls,
         workflow_id: WorkflowInstanceId,
         task_id: TaskId,
     ) -> None:
-        redis = cls._get_redis()
-        if not redis.exists(cls.WORKFLOW_PREFIX + workflow_id):
+        instance_key = cls._get_instance_key(workflow_id)
+
+        async def delete(redis: aioredis.Redis) -> List:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hexists(instance_key, cls.WORKFLOW_FIELD)
+                pipe.hdel(instance_key, task_id)
+                return await pipe.execute()
+
+        workflow_exists, _ = await redis_connection.execute(delete)
+        if not workflow_exists:
             raise WorkflowNotFoundError
-        task_key = cls._get_task_key(workflow_id, task_id)
-        redis.delete_keys(task_key)
+
+    @classmethod
+    async def rebuild_indexes(cls) -> int:
+        indexes: Dict[str, Set[str]] = defaultdict(set)
+
+        instance_keys = await cls._scan_keys(cls.INSTANCE_PREFIX + '*')
+        for chunk in cls._chunks(instance_keys):
+            async def get_workflows(redis: aioredis.Redis) -> List[str]:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for instance_key in chunk:
+                        pipe.hget(instance_key, cls.WORKFLOW_FIELD)
+                    return await pipe.execute()
+
+            workflows_data = await redis_connection.execute(get_workflows)
+            for instance_key, workflow_data in zip(chunk, workflows_data):
+                if workflow_data is None:
+                    continue
+                try:
+                    workflow = Workflow.parse_raw(workflow_data)
+                except ValidationError:
+                    logger.exception(f'Invalid data for {instance_key}')
+                    continue
+                for index_key in cls._get_workflow_index_keys(workflow):
+                    indexes[index_key].add(workflow.iid)
+
+        stale_keys = [
+            index_key
+            for index_key in await cls._scan_keys(cls.INDEX_PREFIX + '*')
+            if index_key not in indexes
+        ]
+        for chunk in cls._chunks(list(indexes.items())):
+            async def replace_indexes(redis: aioredis.Redis) -> None:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for index_key, members in chunk:
+                        # Built aside, so readers never see it empty
+                        building_key = index_key + ':rebuild'
+                        pipe.delete(building_key)
+                        pipe.sadd(building_key, *members)
+                        pipe.rename(building_key, index_key)
+                    await pipe.execute()
+
+            await redis_connection.execute(replace_indexes)
+        if stale_keys:
+            await redis_connection.execute(
+                lambda redis: redis.delete(*stale_keys),
+            )
+
+        return len(indexes[cls.WORKFLOW_INDEX_KEY])
+
+    @classmethod
+    async def migrate(cls) -> int:
+        legacy_tasks: Dict[WorkflowInstanceId, List[str]] = defaultdict(list)
+        for task_key in await cls._scan_keys(cls.LEGACY_TASK_PREFIX + '*'):
+            iid = task_key[len(cls.LEGACY_TASK_PREFIX):].rsplit(':', 1)[0]
+            legacy_tasks[iid].append(task_key)
+
+        migrated = 0
+        workflow_keys = await cls._scan_keys(
+            cls.LEGACY_WORKFLOW_PREFIX + '*',
+        )
+        for workflow_key in workflow_keys:
+            iid = workflow_key[len(cls.LEGACY_WORKFLOW_PREFIX):]
+            task_keys = legacy_tasks.pop(iid, [])
+            workflow_data = await redis_connection.execute(
+                lambda redis: redis.get(workflow_key),
+            )
+            tasks_data = []
+            if task_keys:
+                tasks_data = await redis_connection.execute(
+                    lambda redis: redis.mget(task_keys),
+                )
+            try:
+                workflow = Workflow.parse_raw(workflow_data)
+                tasks = [
+                    Task.parse_raw(task_data)
+                    for task_data in tasks_data
+                    if task_data is not None
+                ]
+            except ValidationError:
+                logger.exception(f'Dropping invalid data for {workflow_key}')
+                await redis_connection.execute(
+                    lambda redis: redis.delete(workflow_key, *task_keys),
+                )
+                continue
+
+            fields = {task.tid: task.json() for task in tasks}
+            fields[cls.WORKFLOW_FIELD] = cls._dump_workflow(workflow)
+
+            async def move(redis: aioredis.Redis) -> None:
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.hset(cls._get_instance_key(iid), mapping=fields)
+                    pipe.delete(workflow_key, *task_keys)
+                    await pipe.execute()
+
+            await redis_connection.execute(move)
+            migrated += 1
+
+        # Tasks whose workflow is gone cannot be read anymore
+        orphan_task_keys = [
+            task_key
+            for task_keys in legacy_tasks.values()
+            for task_key in task_keys
+        ]
+        for chunk in cls._chunks(orphan_task_keys):
+            await redis_connection.execute(lambda redis: redis.delete(*chunk))
+
+        return migrated
+
+    @classmethod
+    async def _find_missing_workflows(
+        cls,
+        instance_keys: List[str],
+    ) -> List[str]:
+        """Instance keys without a workflow, either expired or orphaned"""
+        missing_keys = []
+        for chunk in cls._chunks(instance_keys):
+            async def find(redis: aioredis.Redis) -> List[bool]:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for instance_key in chunk:
+                        pipe.hexists(instance_key, cls.WORKFLOW_FIELD)
+                    return await pipe.execute()
+
+            found = await redis_connection.execute(find)
+            missing_keys.extend(
+                instance_key
+                for instance_key, exists in zip(chunk, found)
+                if not exists
+            )
+        return missing_keys
+
+    @classmethod
+    async def reap(cls) -> Dict[str, int]:
+        reclaimed = {
+            'expiring_workflows': 0,
+            'orphan_instances': 0,
+            'stale_index_entries': 0,
+        }
+
+        # Finished workflows saved before their status had a TTL
+        for status in WorkflowStatus:
+            ttl = cls._get_ttl(status)
+            if ttl == 0:
+                continue
+            status_key = cls._get_status_index_key(status)
+            iids = list(await redis_connection.execute(
+                lambda redis: redis.smembers(status_key),
+            ))
+            for chunk in cls._chunks(iids):
+                async def expire(redis: aioredis.Redis) -> List[bool]:
+                    async with redis.pipeline(transaction=False) as pipe:
+                        for iid in chunk:
+                            pipe.ttl(cls._get_instance_key(iid))
+                        ttls = await pipe.execute()
+                    async with redis.pipeline(transaction=False) as pipe:
+                        for iid, instance_ttl in zip(chunk, ttls):
+                            # -1 is a key without expiration
+                            if instance_ttl == -1:
+                                pipe.expire(cls._get_instance_key(iid), ttl)
+                        return await pipe.execute()
+
+                expired = await redis_connection.execute(expire)
+                reclaimed['expiring_workflows'] += sum(expired)
+
+        # Tasks saved after their workflow expired or was deleted
+        async def delete_orphan(pipe):
+            if not await pipe.hexists(instance_key, cls.WORKFLOW_FIELD):
+                pipe.multi()
+                pipe.delete(instance_key)
+
+        for instance_key in await cls._find_missing_workflows(
+            await cls._scan_keys(cls.INSTANCE_PREFIX + '*'),
+        ):
+            # Nothing is deleted if the workflow was saved in the meantime
+            deleted = await redis_connection.execute(
+                lambda redis: redis.transaction(delete_orphan, instance_key),
+            )
+            reclaimed['orphan_instances'] += sum(deleted)
+
+        # Index entries of expired workflows
+        iids = list(await redis_connection.execute(
+            lambda redis: redis.smembers(cls.WORKFLOW_INDEX_KEY),
+        ))
+        missing_iids = [
+            instance_key[len(cls.INSTANCE_PREFIX):]
+            for instance_key in await cls._find_missing_workflows([
+                cls._get_instance_key(iid) for iid in iids
+            ])
+        ]
+        if missing_iids:
+            index_keys = [
+                cls.WORKFLOW_INDEX_KEY,
+                *[cls._get_status_index_key(s) for s in WorkflowStatus],
+                *await cls._scan_keys(cls.SESSION_INDEX_PREFIX + '*'),
+                *await cls._scan_keys(cls.DEPLOYMENT_INDEX_PREFIX + '*'),
+            ]
+            for chunk in cls._chunks(index_keys):
+                async def remove(redis: aioredis.Redis) -> List[int]:
+                    async with redis.pipeline(transaction=False) as pipe:
+                        for index_key in chunk:
+                            pipe.srem(index_key, *missing_iids)
+                        return await pipe.execute()
+
+                removed = await redis_connection.execute(remove)
+                reclaimed['stale_index_entries'] += sum(removed)
+
+        return reclaimed
+
+    @classmethod
+    async def acquire_lease(cls, name: str, holder: str, ttl: float) -> bool:
+        key = cls.LEASE_PREFIX + name
+        ttl_ms = int(ttl * 1000)
+
+        async def renew(pipe):
+            # Not renewed if another holder took it since it was read
+            if await pipe.get(key) == holder:
+                pipe.multi()
+                pipe.pexpire(key, ttl_ms)
+
+        async def acquire(redis: aioredis.Redis) -> bool:
+            if await redis.set(key, holder, nx=True, px=ttl_ms):
+                return True
+            return bool(await redis.transaction(renew, key))
+
+        return await redis_connection.execute(acquire)
+
+    @classmethod
+    async def publish_workflow_status(
+        cls,
+        workflow_id: WorkflowInstanceId,
+        status: WorkflowStatus,
+    ) -> None:
+        message = json.dumps({'iid': workflow_id, 'status': status.value})
+        # Not retried, listeners would be notified twice
+        await redis_connection.execute(
+            lambda redis: redis.publish(cls.STATUS_CHANNEL, message),
+            idempotent=False,
+        )
+
+    @classmethod
+    async def listen_workflow_status(
+        cls,
+    ) -> AsyncIterator[Tuple[WorkflowInstanceId, WorkflowStatus]]:
+        pubsub = redis_connection.client.pubsub()
+        await pubsub.subscribe(cls.STATUS_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message['type'] != 'message':
+                    continue
+                try:
+                    data = json.loads(message['data'])
+                    status = WorkflowStatus(data['status'])
+                    workflow_id = data['iid']
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(
+                        f'Ignoring invalid status message {message["data"]}'
+                    )
+                    continue
+                yield workflow_id, status
+        finally:
+            await pubsub.close()
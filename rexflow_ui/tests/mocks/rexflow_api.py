@@ -30,6 +30,7 @@ from rexflow_ui.entities.wrappers import (
     ValidatorResults,
 )
 from rexflow_ui.errors import ValidationErrorDetails
+from rexflow_ui.refresh import RefreshReport
 
 
 def _mock_task():
@@ -123,8 +124,12 @@ async def start_workflow_by_name(
     return _mock_workflow(with_tasks=False)
 
 
-async def refresh_workflows():
-    pass
+async def refresh_workflows(on_progress=None) -> List[RefreshReport]:
+    report = RefreshReport(name='workflows', total=1)
+    report.succeeded.append(MOCK_IID)
+    if on_progress is not None:
+        on_progress(report)
+    return [report]
 
 
 @validate_arguments
@@ -135,16 +140,35 @@ async def get_active_workflows(
     return [_mock_workflow()]
 
 
+async def get_workflows_tasks(
+    iids: List[WorkflowInstanceId],
+) -> Dict[WorkflowInstanceId, List[Task]]:
+    return {iid: [_mock_task()] for iid in iids}
+
+
 async def complete_workflow(instance_id: WorkflowInstanceId) -> None:
     pass
 
 
+async def notify_workflow_status(
+    iid: WorkflowInstanceId,
+    status: WorkflowStatus,
+) -> None:
+    pass
+
+
 async def cancel_workflow(
     instance_id: WorkflowInstanceId,
 ) -> bool:
     return True
 
 
+async def cancel_workflows(
+    instance_ids: List[WorkflowInstanceId],
+) -> Dict[WorkflowInstanceId, bool]:
+    return {iid: True for iid in instance_ids}
+
+
 @validate_arguments
 async def start_tasks(
     iid: WorkflowInstanceId,
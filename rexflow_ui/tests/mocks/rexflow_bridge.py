@@ -14,6 +14,7 @@ from rexflow_ui.entities.types import (
     Validator,
     ValidatorEnum,
     Workflow,
+    WorkflowInstanceId,
     WorkflowInstanceInfo,
     WorkflowStatus,
 )
@@ -58,6 +59,16 @@ class FakeREXFlowBridge(REXFlowBridgeABC):
         }
         return workflow
 
+    @classmethod
+    @validate_arguments
+    async def cancel_workflows(
+        cls,
+        bridge_url: str,
+        iids: List[WorkflowInstanceId],
+    ) -> List[bool]:
+        await asyncio.sleep(cls.sleep_time)
+        return [True for _ in iids]
+
     @validate_arguments
     def __init__(self, workflow: Workflow) -> None:
         self.workflow = workflow
@@ -75,14 +86,14 @@ class FakeREXFlowBridge(REXFlowBridgeABC):
     ) -> List[Task]:
         await asyncio.sleep(self.sleep_time)
         if len(task_ids) == 0:
-            tasks_dict = self.Store.get_workflow_tasks(self.workflow.iid)
+            tasks_dict = await self.Store.get_workflow_tasks(self.workflow.iid)
             if tasks_dict:
                 return tasks_dict.values()
 
         tasks = []
         for tid in task_ids:
             try:
-                task = self.Store.get_task(self.workflow.iid, tid)
+                task = await self.Store.get_task(self.workflow.iid, tid)
             except TaskNotFoundError:
                 if reset_values:
                     task = Task(
@@ -3,6 +3,7 @@ from unittest import mock
 
 import pytest
 from gql import Client, gql
+from graphql import DocumentNode, print_ast
 
 from .mocks import (
     MOCK_BRIDGE_URL,
@@ -12,7 +13,8 @@ from .mocks import (
 )
 from .mocks.rexflow_schema import schema
 from .utils import run_async
-from rexflow_ui.bridge.gql import REXFlowBridgeGQL
+from rexflow_ui.bridge.gql import REXFlowBridgeGQL, documents, queries
+from rexflow_ui.bridge.gql.batch import BatchDocument, get_batch_document
 from rexflow_ui.entities.types import (
     Task,
     TaskFieldData,
@@ -38,6 +40,57 @@ class TestGraphQLSchema(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+@pytest.mark.ci
+class TestBridgeDocuments(unittest.TestCase):
+    def test_every_query_is_compiled(self):
+        query_names = [name for name in vars(queries) if name.isupper()]
+        self.assertGreater(len(query_names), 0)
+        for name in query_names:
+            self.assertIsInstance(getattr(documents, name), DocumentNode)
+
+
+@pytest.mark.ci
+class TestBatchDocument(unittest.TestCase):
+    def test_batch_document(self):
+        batch = BatchDocument(documents.COMPLETE_TASK_MUTATION, 2)
+        query = print_ast(batch.document)
+        self.assertIn('$completeTaskInput_0', query)
+        self.assertIn('tasks_1: tasks', query)
+        self.assertEqual(batch.response_keys, ['tasks'])
+
+        params = batch.merge_params([
+            {'completeTaskInput': {'tid': 'a'}},
+            {'completeTaskInput': {'tid': 'b'}},
+        ])
+        self.assertEqual(params, {
+            'completeTaskInput_0': {'tid': 'a'},
+            'completeTaskInput_1': {'tid': 'b'},
+        })
+
+        results = batch.split_result({
+            'tasks_0': {'complete': {'tid': 'a'}},
+            'tasks_1': {'complete': {'tid': 'b'}},
+        })
+        self.assertEqual(results, [
+            {'tasks': {'complete': {'tid': 'a'}}},
+            {'tasks': {'complete': {'tid': 'b'}}},
+        ])
+
+    def test_batch_document_invalid(self):
+        for document in (
+            DocumentNode(definitions=[]),
+            gql('fragment TaskId on Task { tid }'),
+        ):
+            with self.assertRaises(ValueError):
+                BatchDocument(document, 2)
+
+    def test_batch_document_is_cached(self):
+        self.assertIs(
+            get_batch_document(documents.GET_TASK_DATA_QUERY, 3),
+            get_batch_document(documents.GET_TASK_DATA_QUERY, 3),
+        )
+
+
 mock_task_data = TaskFieldData(
     data_id='uname',
     type='TEXT',
@@ -88,6 +141,20 @@ class TestBridgeIntegration(unittest.TestCase):
             self.assertIsInstance(task, Task)
             self.assertIn(task.tid, task_ids)
 
+    @run_async
+    @mock.patch('rexflow_ui.bridge.gql.client.REXFLOW_BRIDGE_BATCH_SIZE', 2)
+    async def test_task_get_data_batch(self):
+        workflow = Workflow(
+            iid=MOCK_IID,
+            did=MOCK_DID,
+            status=WorkflowStatus.RUNNING,
+        )
+        rexflow = REXFlowBridgeGQL(workflow)
+
+        task_ids = [f'task_{n}' for n in range(5)]
+        tasks = await rexflow.get_task_data(task_ids)
+        self.assertEqual(task_ids, [task.tid for task in tasks])
+
     @run_async
     async def test_task_validate_data(self):
         workflow = Workflow(
@@ -162,3 +229,11 @@ class TestBridgeIntegration(unittest.TestCase):
 
         result = await rexflow.cancel_workflow()
         self.assertTrue(result)
+
+    @run_async
+    async def test_cancel_workflows(self):
+        result = await REXFlowBridgeGQL.cancel_workflows(
+            MOCK_BRIDGE_URL,
+            [MOCK_IID, MOCK_IID],
+        )
+        self.assertEqual(result, [True, True])
@@ -72,8 +72,9 @@ class TestBridgeConnection(unittest.TestCase):
 
     @run_async
     async def test_api_bridge_connection_failure(self):
-        # Should not trigger error
-        await api._refresh_instance(MOCK_NAME, MOCK_DID, MOCK_BRIDGE_URL)
+        # Should not trigger error, failures are reported
+        report = await api._refresh_instances()
+        self.assertIn(MOCK_NAME, report.failed)
 
         with self.assertRaises(BridgeNotReachableError):
             await api.start_workflow(MOCK_DID)
@@ -81,12 +82,12 @@ class TestBridgeConnection(unittest.TestCase):
         workflow = mock_workflow()
         await api._refresh_workflow(workflow)
 
-        Store.add_workflow(workflow)
+        await Store.add_workflow(workflow)
         with self.assertRaises(BridgeNotReachableError):
             await api.start_tasks(MOCK_IID, [MOCK_TID])
 
         task = mock_task()
-        Store.add_task(task)
+        await Store.add_task(task)
         task_change = mock_task_change()
 
         result = await api._validate_tasks(MOCK_IID, [task_change])
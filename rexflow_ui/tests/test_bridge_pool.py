@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+
+import pytest
+
+from .utils import run_async
+from rexflow_ui.bridge.gql.pool import BridgeConnectionPool
+
+
+@pytest.mark.ci
+class TestBridgeConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = BridgeConnectionPool(
+            limit_per_host=5,
+            keepalive_timeout=10,
+            idle_timeout=60,
+        )
+
+    @run_async
+    async def test_reuse_connector_for_same_bridge(self):
+        first = self.pool.get_connector('http://bridge-a/graphql')
+        second = self.pool.get_connector('http://bridge-a/?did=1')
+        other = self.pool.get_connector('http://bridge-b/graphql')
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.limit_per_host, 5)
+        self.assertEqual(len(self.pool), 2)
+        await self.pool.close()
+
+    @run_async
+    async def test_evict_idle_connectors(self):
+        connector = self.pool.get_connector('http://bridge-a/graphql')
+        await self.pool.evict_idle()
+        self.assertEqual(len(self.pool), 1)
+
+        self.pool.idle_timeout = -1
+        await self.pool.evict_idle()
+        self.assertEqual(len(self.pool), 0)
+        self.assertTrue(connector.closed)
+
+    @run_async
+    async def test_close(self):
+        connector = self.pool.get_connector('http://bridge-a/graphql')
+        await self.pool.close()
+        self.assertTrue(connector.closed)
+        self.assertEqual(len(self.pool), 0)
+
+    def test_new_connector_per_event_loop(self):
+        async def get_connector():
+            return self.pool.get_connector('http://bridge-a/graphql')
+
+        first = asyncio.run(get_connector())
+        second = asyncio.run(get_connector())
+        self.assertIsNot(first, second)
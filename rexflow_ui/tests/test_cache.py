@@ -0,0 +1,97 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import pytest
+
+from .mocks import MOCK_BRIDGE_URL, MOCK_DID, MOCK_NAME
+from .utils import run_async
+from rexflow_ui.cache import DeploymentCache
+from rexflow_ui.entities.types import WorkflowDeployment
+
+
+async def mock_deployments():
+    await asyncio.sleep(0)
+    return [
+        WorkflowDeployment(
+            name=MOCK_NAME,
+            deployments=[MOCK_DID],
+            bridge_url=MOCK_BRIDGE_URL,
+        ),
+    ]
+
+
+@pytest.mark.ci
+class TestDeploymentCache(unittest.TestCase):
+    def setUp(self):
+        self.load_deployments = mock.AsyncMock(side_effect=mock_deployments)
+        self.cache = DeploymentCache(
+            load_deployments=self.load_deployments,
+            ttl=60,
+            max_stale=600,
+        )
+
+    @run_async
+    async def test_cold_start(self):
+        results = await asyncio.gather(*[
+            self.cache.get()
+            for _ in range(3)
+        ])
+        self.assertEqual(results[0][0].name, MOCK_NAME)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.load_deployments.assert_called_once()
+
+        self.assertIs(await self.cache.get(), results[0])
+        self.load_deployments.assert_called_once()
+
+    @run_async
+    async def test_stale_while_revalidate(self):
+        deployments = await self.cache.get()
+        self.cache._loaded_at -= 120
+        self.assertIs(await self.cache.get(), deployments)
+        self.assertIs(await self.cache.get(), deployments)
+        await self.cache._loading
+        self.assertEqual(self.load_deployments.call_count, 2)
+        self.assertIsNot(await self.cache.get(), deployments)
+
+    @run_async
+    async def test_too_stale(self):
+        deployments = await self.cache.get()
+        self.cache._loaded_at -= 1200
+        self.assertIsNot(await self.cache.get(), deployments)
+        self.assertEqual(self.load_deployments.call_count, 2)
+
+    @run_async
+    async def test_failed_refresh(self):
+        deployments = await self.cache.get()
+        self.cache._loaded_at -= 120
+        self.load_deployments.side_effect = ConnectionError
+        with self.assertLogs('rexflow_ui.cache', 'ERROR'):
+            self.assertIs(await self.cache.get(), deployments)
+            await asyncio.wait([self.cache._loading])
+        self.assertIs(await self.cache.get(), deployments)
+
+    @run_async
+    async def test_invalidate(self):
+        deployments = await self.cache.get()
+        self.cache.invalidate()
+        self.assertIsNot(await self.cache.get(), deployments)
+        self.assertEqual(self.load_deployments.call_count, 2)
+
+        # Deployments loading when invalidated are not kept
+        refresh = asyncio.ensure_future(self.cache.refresh())
+        await asyncio.sleep(0)
+        self.cache.invalidate()
+        deployments = await self.cache.get()
+        self.assertIsNot(await refresh, deployments)
+        self.assertIs(await self.cache.get(), deployments)
+        self.assertEqual(self.load_deployments.call_count, 4)
+
+    @run_async
+    async def test_lookups(self):
+        deployment = await self.cache.get_by_did(MOCK_DID)
+        self.assertEqual(deployment.name, MOCK_NAME)
+        self.assertIs(await self.cache.get_by_name(MOCK_NAME), deployment)
+        self.assertIsNone(await self.cache.get_by_did('unknown'))
+        self.assertIsNone(await self.cache.get_by_name('unknown'))
+        self.load_deployments.assert_called_once()
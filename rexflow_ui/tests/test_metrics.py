@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+
+import pytest
+from prometheus_client import REGISTRY, Histogram
+
+from .utils import run_async
+from rexflow_ui.metrics import get_host, instrument
+
+TEST_SECONDS = Histogram(
+    'rexflow_test_seconds',
+    'Time taken by the test operations',
+    ['owner', 'operation'],
+)
+
+
+def get_labels(owner, operation, args, kwargs):
+    return {'owner': getattr(owner, '__name__', 'instance'), 'operation': operation}  # noqa E501
+
+
+@instrument(TEST_SECONDS, get_labels)
+class Instrumented:
+    @classmethod
+    async def load(cls, value):
+        await asyncio.sleep(0)
+        return value
+
+    async def save(self, value):
+        return value
+
+    def name(self):
+        return 'sync'
+
+    async def _private(self):
+        return 'private'
+
+
+def get_count(owner, operation):
+    return REGISTRY.get_sample_value(
+        'rexflow_test_seconds_count',
+        {'owner': owner, 'operation': operation},
+    ) or 0
+
+
+@pytest.mark.ci
+class TestMetrics(unittest.TestCase):
+    @run_async
+    async def test_instrument(self):
+        self.assertEqual(await Instrumented.load(1), 1)
+        self.assertEqual(await Instrumented().save(2), 2)
+        self.assertEqual(Instrumented().name(), 'sync')
+        self.assertEqual(await Instrumented()._private(), 'private')
+        self.assertEqual(Instrumented.load.__name__, 'load')
+
+        self.assertEqual(get_count('Instrumented', 'load'), 1)
+        self.assertEqual(get_count('instance', 'save'), 1)
+        self.assertEqual(get_count('instance', 'name'), 0)
+        self.assertEqual(get_count('instance', '_private'), 0)
+
+    def test_get_host(self):
+        self.assertEqual(get_host('http://bridge:8000/graphql'), 'bridge:8000')
+        self.assertEqual(get_host('bridge'), 'bridge')
@@ -0,0 +1,169 @@
+import asyncio
+import unittest
+from functools import partial
+from unittest import mock
+
+import pytest
+from aioredis import BlockingConnectionPool
+from aioredis.exceptions import ConnectionError
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeConnection, FakeRedis
+
+from .utils import run_async
+from rexflow_ui.store.connection import RedisConnection
+
+
+@pytest.mark.ci
+class TestRedisConnection(unittest.TestCase):
+    def setUp(self):
+        self.connection = RedisConnection(retries=2, retry_backoff=0)
+
+    def use_fake_redis(self):
+        # The client must be created inside the test event loop
+        self.connection._redis = FakeRedis(decode_responses=True)
+
+    @run_async
+    async def test_execute(self):
+        self.use_fake_redis()
+        await self.connection.execute(lambda redis: redis.set('key', 'value'))
+        self.assertEqual(
+            await self.connection.execute(lambda redis: redis.get('key')),
+            'value',
+        )
+        self.assertEqual(self.connection.failures, 0)
+
+    @run_async
+    async def test_execute_retry(self):
+        self.use_fake_redis()
+        operation = mock.AsyncMock(side_effect=[ConnectionError, 'value'])
+        with self.assertLogs('rexflow_ui.store.connection', 'WARNING'):
+            self.assertEqual(await self.connection.execute(operation), 'value')
+        self.assertEqual(operation.call_count, 2)
+        self.assertEqual(self.connection.stats()['retried'], 1)
+        self.assertFalse(self.connection.healthy)
+
+        self.assertTrue(await self.connection.check_health())
+        self.assertIsNotNone(self.connection.checked_at)
+
+    @run_async
+    async def test_execute_failure(self):
+        self.use_fake_redis()
+        operation = mock.AsyncMock(side_effect=ConnectionError)
+        with self.assertLogs('rexflow_ui.store.connection', 'WARNING'):
+            with self.assertRaises(ConnectionError):
+                await self.connection.execute(operation)
+        self.assertEqual(operation.call_count, 3)
+        self.assertEqual(self.connection.failures, 3)
+
+        # Other errors are not retried
+        operation = mock.AsyncMock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            await self.connection.execute(operation)
+        operation.assert_called_once()
+
+    @run_async
+    async def test_execute_not_idempotent(self):
+        self.use_fake_redis()
+        operation = mock.AsyncMock(side_effect=ConnectionError)
+        with self.assertRaises(ConnectionError):
+            await self.connection.execute(operation, idempotent=False)
+        operation.assert_called_once()
+        self.assertEqual(self.connection.retried, 0)
+        self.assertFalse(self.connection.healthy)
+
+    @run_async
+    async def test_unreachable(self):
+        self.connection.port = 1
+        with self.assertLogs('rexflow_ui.store.connection', 'WARNING'):
+            self.assertFalse(await self.connection.check_health())
+        stats = self.connection.stats()
+        self.assertFalse(stats['healthy'])
+        self.assertEqual(stats['in_use_connections'], 0)
+        await self.connection.close()
+        self.assertEqual(self.connection.stats()['created_connections'], 0)
+
+    @run_async
+    async def test_health_check_timeout(self):
+        self.use_fake_redis()
+
+        async def hang():
+            await asyncio.sleep(60)
+
+        with mock.patch.object(self.connection.client, 'ping', hang):
+            with self.assertLogs('rexflow_ui.store.connection', 'WARNING'):
+                self.assertFalse(await self.connection.check_health(0.01))
+        self.assertFalse(self.connection.healthy)
+
+    def test_stats_unknown_pool(self):
+        self.connection._redis = mock.Mock(connection_pool=object())
+        stats = self.connection.stats()
+        self.assertEqual(stats['created_connections'], 0)
+        self.assertEqual(stats['in_use_connections'], 0)
+
+    @run_async
+    async def test_pool_exhausted_waits(self):
+        connection = RedisConnection(max_connections=1, pool_timeout=1)
+        with mock.patch('aioredis.BlockingConnectionPool', partial(
+            BlockingConnectionPool,
+            connection_class=FakeConnection,
+            server=FakeServer(),
+        )):
+            redis = connection.client
+
+        async def increment(redis):
+            # The watching pipeline holds the only connection
+            async with redis.pipeline() as pipe:
+                await pipe.watch('key')
+                await asyncio.sleep(0.01)
+                pipe.multi()
+                pipe.incr('key')
+                return await pipe.execute()
+
+        await asyncio.gather(*[
+            connection.execute(increment)
+            for _ in range(5)
+        ])
+        self.assertEqual(await redis.get('key'), '5')
+        self.assertEqual(connection.failures, 0)
+        self.assertEqual(connection.stats()['created_connections'], 1)
+        await connection.close()
+
+    @run_async
+    async def test_pool_exhausted_not_retried(self):
+        connection = RedisConnection(max_connections=1, pool_timeout=0.01)
+        with mock.patch('aioredis.BlockingConnectionPool', partial(
+            BlockingConnectionPool,
+            connection_class=FakeConnection,
+            server=FakeServer(),
+        )):
+            redis = connection.client
+        await connection.execute(lambda redis: redis.set('key', 'value'))
+        idle_connection, = connection.client.connection_pool._connections
+
+        released = asyncio.Event()
+
+        async def hold(redis):
+            async with redis.pipeline() as pipe:
+                await pipe.watch('key')
+                await released.wait()
+
+        holding = asyncio.ensure_future(connection.execute(hold))
+        await asyncio.sleep(0)
+        attempts = []
+
+        async def get(redis):
+            attempts.append(redis)
+            return await redis.get('key')
+
+        with self.assertRaisesRegex(ConnectionError, 'No connection'):
+            await connection.execute(get)
+        self.assertEqual(len(attempts), 1)
+        self.assertIsNone(connection.healthy)
+        self.assertEqual(connection.failures, 0)
+        self.assertEqual(connection.retried, 0)
+
+        released.set()
+        await holding
+        self.assertTrue(idle_connection.is_connected)
+        self.assertEqual(await redis.get('key'), 'value')
+        await connection.close()
@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+
+import pytest
+
+from .utils import run_async
+from rexflow_ui.refresh import RefreshEngine, RefreshJob
+
+
+class ConcurrencyCounter:
+    def __init__(self):
+        self.running = {}
+        self.max_running = {}
+
+    def job(self, bridge_url: str, sleep: float = 0.01, error=None):
+        async def run():
+            self.running[bridge_url] = self.running.get(bridge_url, 0) + 1
+            total = sum(self.running.values())
+            self.max_running[bridge_url] = max(
+                self.max_running.get(bridge_url, 0),
+                self.running[bridge_url],
+            )
+            self.max_running['total'] = max(
+                self.max_running.get('total', 0),
+                total,
+            )
+            try:
+                await asyncio.sleep(sleep)
+                if error is not None:
+                    raise error
+            finally:
+                self.running[bridge_url] -= 1
+        return run
+
+
+@pytest.mark.ci
+class TestRefreshEngine(unittest.TestCase):
+    def setUp(self):
+        self.counter = ConcurrencyCounter()
+        self.progress = []
+        self.engine = RefreshEngine(
+            max_concurrency=3,
+            max_per_bridge=2,
+            timeout=0.5,
+            on_progress=lambda report: self.progress.append(report.done),
+        )
+
+    @run_async
+    async def test_concurrency_limits(self):
+        report = await self.engine.run('test', [
+            RefreshJob(
+                name=f'{bridge_url}-{i}',
+                bridge_url=bridge_url,
+                run=self.counter.job(bridge_url),
+            )
+            for bridge_url in ['a', 'b', 'c']
+            for i in range(5)
+        ])
+        self.assertEqual(len(report.succeeded), 15)
+        self.assertEqual(report.failed, {})
+        self.assertEqual(self.counter.max_running['total'], 3)
+        self.assertLessEqual(self.counter.max_running['a'], 2)
+        self.assertEqual(self.progress, list(range(1, 16)))
+
+    @run_async
+    async def test_partial_failures(self):
+        report = await self.engine.run('test', [
+            RefreshJob(name='ok', bridge_url='a', run=self.counter.job('a')),
+            RefreshJob(
+                name='error',
+                bridge_url='b',
+                run=self.counter.job('b', error=ConnectionError('down')),
+            ),
+            RefreshJob(
+                name='slow',
+                bridge_url='c',
+                run=self.counter.job('c', sleep=5),
+            ),
+        ])
+        self.assertEqual(report.succeeded, ['ok'])
+        self.assertEqual(report.failed['error'], 'down')
+        self.assertIn('timed out', report.failed['slow'])
+        self.assertEqual(report.done, report.total)
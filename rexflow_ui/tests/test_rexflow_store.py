@@ -1,107 +1,409 @@
+import asyncio
 import unittest
 from unittest import mock
 
 import pytest
-from rexredis import RexRedis
+from fakeredis.aioredis import FakeRedis
 
 from .mocks.rexflow_entities import mock_task, mock_workflow
-from rexflow_ui.store.errors import WorkflowNotFoundError
+from .utils import run_async
+from rexflow_ui.entities.types import TaskStatus, WorkflowStatus
+from rexflow_ui.store.connection import RedisConnection
+from rexflow_ui.store.errors import TaskNotFoundError, WorkflowNotFoundError
 from rexflow_ui.store.redis import Store as RedisStore
 
 
-REXREDIS_PATH = 'rexflow_ui.store.redis.Store._get_redis'
-
-
-def mock_redis_client():
-    return mock.MagicMock(spec=RexRedis)
+REDIS_PATH = 'rexflow_ui.store.redis.redis_connection'
+TTL_PATH = 'rexflow_ui.store.redis.REXFLOW_WORKFLOW_TTL_SEC'
 
 
 @pytest.mark.ci
 class TestREXFlowStore(unittest.TestCase):
     def setUp(self):
-        self.mock_redis = mock_redis_client()
+        self.redis_connection = RedisConnection(retries=0)
+        for patcher in (
+            mock.patch(REDIS_PATH, self.redis_connection),
+            mock.patch.object(
+                RedisConnection,
+                'client',
+                new_callable=mock.PropertyMock,
+                side_effect=self.get_redis,
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
         self.workflow = mock_workflow()
-        self.workflow_key = RedisStore.WORKFLOW_PREFIX + self.workflow.iid
+        self.instance_key = RedisStore._get_instance_key(self.workflow.iid)
         self.task = mock_task()
-        self.task_key = RedisStore._get_task_key(self.task.iid, self.task.tid)
-
-    def test_add_workflow(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            RedisStore.add_workflow(self.workflow)
-            self.mock_redis.set_json.assert_called_with(
-                self.workflow_key,
-                self.workflow.dict(),
-            )
-
-    def test_get_workflow(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            self.mock_redis.get_from_json.return_value = None
-            with self.assertRaises(WorkflowNotFoundError):
-                RedisStore.get_workflow(self.workflow.iid)
-            self.mock_redis.get_from_json.assert_called()
-
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            self.mock_redis.get_from_json.return_value = self.workflow.dict()
-            returned_workflow = RedisStore.get_workflow(self.workflow.iid)
-            self.assertEqual(self.workflow, returned_workflow)
-
-    def test_get_workflow_list(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            self.mock_redis.find_keys.side_effect = lambda x: \
-                [self.workflow_key] if x == RedisStore.WORKFLOW_PREFIX else []
-            self.mock_redis.get_from_json.return_value = self.workflow.dict()
-            workflow_list = RedisStore.get_workflow_list()
-            self.mock_redis.get_from_json.assert_called_with(self.workflow_key)
-            self.assertIn(self.workflow, workflow_list)
-
-    def test_delete_workflow(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            RedisStore.delete_workflow(self.workflow.iid)
-            self.mock_redis.delete_keys.assert_called_with(self.workflow_key)
-
-    def test_add_task(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            RedisStore.add_task(self.task)
-            self.mock_redis.set_json.assert_called_with(
-                self.task_key,
-                self.task.dict(),
-            )
-
-    def test_update_task(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            self.mock_redis.exists.return_value = False
-            RedisStore.update_task(self.task)
-            self.mock_redis.exists.assert_called_with(self.task_key)
-            self.mock_redis.set_json.assert_not_called()
-
-            self.mock_redis.exists.return_value = True
-            RedisStore.update_task(self.task)
-            self.mock_redis.exists.assert_called_with(self.task_key)
-            self.mock_redis.set_json.assert_called_with(
-                self.task_key,
-                self.task.dict(),
-            )
-
-    def test_get_workflow_tasks(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            self.mock_redis.find_keys.return_value = [self.task_key]
-            self.mock_redis.get_from_json.return_value = self.task.dict()
-            tasks_list = RedisStore.get_workflow_tasks(self.workflow.iid)
-            self.assertIn(self.task.tid, tasks_list)
-            self.assertEqual(self.task, tasks_list[self.task.tid])
-            self.mock_redis.find_keys.assert_called_with(
-                RedisStore.TASK_PREFIX + self.workflow.iid
-            )
-            self.mock_redis.get_from_json.assert_called_with(self.task_key)
-
-    def test_get_task(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            self.mock_redis.get_from_json.return_value = self.task.dict()
-            task = RedisStore.get_task(self.task.iid, self.task.tid)
-            self.mock_redis.get_from_json.assert_called_with(self.task_key)
-            self.assertEqual(task, self.task)
-
-    def test_delete_task(self):
-        with mock.patch(REXREDIS_PATH, return_value=self.mock_redis):
-            RedisStore.delete_task(self.task.iid, self.task.tid)
-            self.mock_redis.delete_keys.assert_called_with(self.task_key)
+
+    def get_redis(self):
+        # The client must be created inside the test event loop
+        if self.redis_connection._redis is None:
+            self.redis_connection._redis = FakeRedis(decode_responses=True)
+        return self.redis_connection._redis
+
+    @run_async
+    async def test_add_workflow(self):
+        await RedisStore.add_workflow(self.workflow)
+        self.assertEqual(
+            await self.get_redis().hget(
+                self.instance_key,
+                RedisStore.WORKFLOW_FIELD,
+            ),
+            self.workflow.json(exclude={'tasks'}),
+        )
+
+    @run_async
+    async def test_add_workflows(self):
+        other_workflow = self.workflow.copy(update={
+            'iid': self.workflow.iid + '1',
+            'status': WorkflowStatus.CANCELED,
+        })
+        with mock.patch.dict(TTL_PATH, {'CANCELED': 60}):
+            await RedisStore.add_workflows([self.workflow, other_workflow])
+        self.assertEqual(
+            await RedisStore.get_workflow_list([
+                self.workflow.iid,
+                other_workflow.iid,
+            ]),
+            [self.workflow, other_workflow],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(status=WorkflowStatus.CANCELED),
+            [other_workflow.iid],
+        )
+        self.assertGreater(
+            await self.get_redis().ttl(
+                RedisStore._get_instance_key(other_workflow.iid),
+            ),
+            0,
+        )
+
+    @run_async
+    async def test_get_workflow(self):
+        with self.assertRaises(WorkflowNotFoundError):
+            await RedisStore.get_workflow(self.workflow.iid)
+
+        await RedisStore.add_workflow(self.workflow)
+        returned_workflow = await RedisStore.get_workflow(self.workflow.iid)
+        self.assertEqual(self.workflow, returned_workflow)
+
+    @run_async
+    async def test_get_invalid_workflow(self):
+        await self.get_redis().hset(
+            self.instance_key,
+            RedisStore.WORKFLOW_FIELD,
+            '{}',
+        )
+        with self.assertRaises(WorkflowNotFoundError):
+            await RedisStore.get_workflow(self.workflow.iid)
+        self.assertFalse(await self.get_redis().exists(self.instance_key))
+
+    @run_async
+    async def test_get_workflow_list(self):
+        await RedisStore.add_workflow(self.workflow)
+        workflow_list = await RedisStore.get_workflow_list()
+        self.assertIn(self.workflow, workflow_list)
+
+        workflow_list = await RedisStore.get_workflow_list(['unknown'])
+        self.assertEqual(workflow_list, [])
+
+    @run_async
+    async def test_get_workflow_list_tasks(self):
+        other_workflow = self.workflow.copy(update={
+            'iid': self.workflow.iid + '1',
+        })
+        other_task = self.task.copy(update={'iid': other_workflow.iid})
+        await RedisStore.add_workflow(self.workflow)
+        await RedisStore.add_workflow(other_workflow)
+        await RedisStore.add_task(self.task)
+        await RedisStore.add_task(other_task)
+
+        workflow_list = await RedisStore.get_workflow_list([
+            self.workflow.iid,
+            other_workflow.iid,
+        ])
+        self.assertEqual(
+            [workflow.tasks for workflow in workflow_list],
+            [[self.task], [other_task]],
+        )
+
+    @run_async
+    async def test_find_workflows(self):
+        self.workflow.metadata_dict = {'session_id': 'anon'}
+        self.workflow.status = WorkflowStatus.RUNNING
+        await RedisStore.add_workflow(self.workflow)
+        self.assertEqual(
+            await RedisStore.find_workflows(
+                status=WorkflowStatus.RUNNING,
+                session_id='anon',
+            ),
+            [self.workflow.iid],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(session_id='other'),
+            [],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(deployment_id=self.workflow.did),
+            [self.workflow.iid],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(),
+            [self.workflow.iid],
+        )
+
+        self.workflow.status = WorkflowStatus.COMPLETED
+        await RedisStore.add_workflow(self.workflow)
+        self.assertEqual(
+            await RedisStore.find_workflows(status=WorkflowStatus.RUNNING),
+            [],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(status=WorkflowStatus.COMPLETED),
+            [self.workflow.iid],
+        )
+
+        await RedisStore.delete_workflow(self.workflow.iid)
+        self.assertEqual(
+            await RedisStore.find_workflows(session_id='anon'),
+            [],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(status=WorkflowStatus.COMPLETED),
+            [],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(deployment_id=self.workflow.did),
+            [],
+        )
+
+    @run_async
+    async def test_find_workflows_session_changed(self):
+        self.workflow.metadata_dict = {'session_id': 'anon'}
+        await RedisStore.add_workflow(self.workflow)
+        self.workflow.metadata_dict = {'session_id': 'user'}
+        await RedisStore.add_workflow(self.workflow)
+        self.assertEqual(
+            await RedisStore.find_workflows(session_id='anon'),
+            [],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(session_id='user'),
+            [self.workflow.iid],
+        )
+
+        self.workflow.metadata_dict = {}
+        await RedisStore.add_workflow(self.workflow)
+        self.assertEqual(
+            await RedisStore.find_workflows(session_id='user'),
+            [],
+        )
+
+    @run_async
+    async def test_delete_workflow(self):
+        await RedisStore.add_workflow(self.workflow)
+        await RedisStore.add_task(self.task)
+        await RedisStore.delete_workflow(self.workflow.iid)
+        self.assertFalse(await self.get_redis().exists(self.instance_key))
+
+    @run_async
+    async def test_add_task(self):
+        with self.assertRaises(WorkflowNotFoundError):
+            await RedisStore.add_task(self.task)
+        self.assertFalse(await self.get_redis().exists(self.instance_key))
+
+        await RedisStore.add_workflow(self.workflow)
+        await RedisStore.add_task(self.task)
+        self.assertEqual(
+            await self.get_redis().hget(self.instance_key, self.task.tid),
+            self.task.json(),
+        )
+
+    @run_async
+    async def test_update_task(self):
+        await RedisStore.update_task(self.task)
+        self.assertFalse(await self.get_redis().exists(self.instance_key))
+
+        await RedisStore.add_workflow(self.workflow)
+        await RedisStore.add_task(self.task)
+        self.task.status = TaskStatus.DOWN
+        await RedisStore.update_task(self.task)
+        self.assertEqual(
+            await self.get_redis().hget(self.instance_key, self.task.tid),
+            self.task.json(),
+        )
+
+    @run_async
+    async def test_get_workflow_tasks(self):
+        with self.assertRaises(WorkflowNotFoundError):
+            await RedisStore.get_workflow_tasks(self.workflow.iid)
+
+        await RedisStore.add_workflow(self.workflow)
+        await RedisStore.add_task(self.task)
+        tasks_list = await RedisStore.get_workflow_tasks(self.workflow.iid)
+        self.assertIn(self.task.tid, tasks_list)
+        self.assertEqual(self.task, tasks_list[self.task.tid])
+
+    @run_async
+    async def test_get_task(self):
+        with self.assertRaises(TaskNotFoundError):
+            await RedisStore.get_task(self.task.iid, self.task.tid)
+
+        await RedisStore.add_workflow(self.workflow)
+        await RedisStore.add_task(self.task)
+        task = await RedisStore.get_task(self.task.iid, self.task.tid)
+        self.assertEqual(task, self.task)
+
+    @run_async
+    async def test_delete_task(self):
+        with self.assertRaises(WorkflowNotFoundError):
+            await RedisStore.delete_task(self.task.iid, self.task.tid)
+
+        await RedisStore.add_workflow(self.workflow)
+        await RedisStore.add_task(self.task)
+        await RedisStore.delete_task(self.task.iid, self.task.tid)
+        self.assertFalse(
+            await self.get_redis().hexists(self.instance_key, self.task.tid),
+        )
+
+    @run_async
+    async def test_rebuild_indexes(self):
+        redis = self.get_redis()
+        self.workflow.metadata_dict = {'session_id': 'anon'}
+        self.workflow.status = WorkflowStatus.RUNNING
+        # Instance saved without updating the indexes
+        await redis.hset(
+            self.instance_key,
+            RedisStore.WORKFLOW_FIELD,
+            self.workflow.json(exclude={'tasks'}),
+        )
+        stale_key = RedisStore._get_session_index_key('gone')
+        await redis.sadd(stale_key, 'deleted-iid')
+
+        self.assertEqual(await RedisStore.rebuild_indexes(), 1)
+        self.assertEqual(
+            await RedisStore.find_workflows(
+                status=WorkflowStatus.RUNNING,
+                session_id='anon',
+            ),
+            [self.workflow.iid],
+        )
+        self.assertFalse(await redis.exists(stale_key))
+
+    @run_async
+    async def test_migrate(self):
+        redis = self.get_redis()
+        legacy_workflow_key = (
+            RedisStore.LEGACY_WORKFLOW_PREFIX + self.workflow.iid
+        )
+        legacy_task_key = (
+            f'{RedisStore.LEGACY_TASK_PREFIX}{self.task.iid}:{self.task.tid}'
+        )
+        orphan_task_key = RedisStore.LEGACY_TASK_PREFIX + 'gone:tid'
+        await redis.set(legacy_workflow_key, self.workflow.json())
+        await redis.set(legacy_task_key, self.task.json())
+        await redis.set(orphan_task_key, self.task.json())
+
+        self.assertEqual(await RedisStore.migrate(), 1)
+        self.assertEqual(
+            await redis.exists(
+                legacy_workflow_key,
+                legacy_task_key,
+                orphan_task_key,
+            ),
+            0,
+        )
+        await RedisStore.rebuild_indexes()
+        workflow = await RedisStore.get_workflow(self.workflow.iid)
+        self.assertEqual(workflow.tasks, [self.task])
+        self.assertIn(workflow, await RedisStore.get_workflow_list())
+
+    @run_async
+    async def test_workflow_ttl(self):
+        redis = self.get_redis()
+        self.workflow.status = WorkflowStatus.RUNNING
+        await RedisStore.add_workflow(self.workflow)
+        self.assertEqual(await redis.ttl(self.instance_key), -1)
+
+        self.workflow.status = WorkflowStatus.COMPLETED
+        with mock.patch.dict(TTL_PATH, {'COMPLETED': 60}):
+            await RedisStore.add_workflow(self.workflow)
+            self.assertGreater(await redis.ttl(self.instance_key), 30)
+
+            # Saving it again keeps the expiration
+            await redis.expire(self.instance_key, 30)
+            await RedisStore.add_workflow(self.workflow)
+            self.assertLessEqual(await redis.ttl(self.instance_key), 30)
+
+    @run_async
+    async def test_acquire_lease(self):
+        self.assertTrue(await RedisStore.acquire_lease('job', 'a', 60))
+        self.assertFalse(await RedisStore.acquire_lease('job', 'b', 60))
+        # Renewed by its holder
+        await self.get_redis().expire('lease:job', 1)
+        self.assertTrue(await RedisStore.acquire_lease('job', 'a', 60))
+        self.assertGreater(await self.get_redis().ttl('lease:job'), 1)
+
+        await self.get_redis().delete('lease:job')
+        self.assertTrue(await RedisStore.acquire_lease('job', 'b', 60))
+        self.assertFalse(await RedisStore.acquire_lease('job', 'a', 60))
+
+    @run_async
+    async def test_reap(self):
+        redis = self.get_redis()
+        # Finished workflow saved before it had a TTL
+        self.workflow.status = WorkflowStatus.COMPLETED
+        with mock.patch.dict(TTL_PATH, {'COMPLETED': 0}):
+            await RedisStore.add_workflow(self.workflow)
+        # Task saved after its workflow was gone
+        orphan_key = RedisStore._get_instance_key('orphan')
+        await redis.hset(orphan_key, self.task.tid, self.task.json())
+        # Workflow that expired
+        expired = self.workflow.copy(update={
+            'iid': 'expired',
+            'metadata_dict': {'session_id': 'anon'},
+        })
+        await RedisStore.add_workflow(expired)
+        await redis.delete(RedisStore._get_instance_key(expired.iid))
+
+        with mock.patch.dict(TTL_PATH, {'COMPLETED': 60}):
+            reclaimed = await RedisStore.reap()
+        self.assertEqual(reclaimed, {
+            'expiring_workflows': 1,
+            'orphan_instances': 1,
+            'stale_index_entries': 4,
+        })
+        self.assertGreater(await redis.ttl(self.instance_key), 0)
+        self.assertFalse(await redis.exists(orphan_key))
+        self.assertEqual(
+            await RedisStore.find_workflows(),
+            [self.workflow.iid],
+        )
+        self.assertEqual(
+            await RedisStore.find_workflows(session_id='anon'),
+            [],
+        )
+
+    @run_async
+    async def test_workflow_status_messages(self):
+        messages = RedisStore.listen_workflow_status()
+        received = asyncio.ensure_future(messages.__anext__())
+        # Invalid messages are skipped, so wait for the subscription with one
+        with self.assertLogs('rexflow_ui.store.redis', 'WARNING'):
+            while not await self.get_redis().publish(
+                RedisStore.STATUS_CHANNEL,
+                'invalid',
+            ):
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+
+        await RedisStore.publish_workflow_status(
+            self.workflow.iid,
+            WorkflowStatus.RUNNING,
+        )
+        self.assertEqual(
+            await asyncio.wait_for(received, 1),
+            (self.workflow.iid, WorkflowStatus.RUNNING),
+        )
+        await messages.aclose()
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pytest
+
+from .utils import run_async
+from rexflow_ui import tracing
+from rexflow_ui.tracing import (
+    JsonLinesExporter,
+    Tracer,
+    get_trace_headers,
+    parse_traceparent,
+    start_span,
+    trace_methods,
+    traced,
+)
+
+
+@traced()
+async def load(value):
+    with start_span('load.step'):
+        await asyncio.sleep(0)
+    return value
+
+
+@trace_methods('test.', lambda owner, name, args, kwargs: {'args': args})
+class Traced:
+    @classmethod
+    async def save(cls, value):
+        return await load(value)
+
+
+@pytest.mark.ci
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'spans.jsonl')
+        self.exporter = JsonLinesExporter(self.path, batch_size=100)
+        patcher = mock.patch.object(tracing, 'tracer', Tracer(self.exporter))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_spans(self):
+        self.exporter.flush()
+        with open(self.exporter.worker_path) as trace_file:
+            return {
+                span['name']: span
+                for span in map(json.loads, trace_file)
+            }
+
+    @run_async
+    async def test_spans(self):
+        parent = parse_traceparent(
+            '00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01',
+        )
+        with start_span('request', parent=parent):
+            headers = get_trace_headers()
+            results = await asyncio.gather(*[
+                Traced.save(value)
+                for value in range(2)
+            ])
+        self.assertEqual(results, [0, 1])
+        self.assertEqual(get_trace_headers(), {})
+
+        spans = self.read_spans()
+        request = spans['request']
+        self.assertEqual(request['trace_id'], parent.trace_id)
+        self.assertEqual(request['parent_id'], parent.span_id)
+        self.assertEqual(
+            headers['traceparent'],
+            f'00-{parent.trace_id}-{request["span_id"]}-01',
+        )
+        self.assertEqual(spans['test.save']['parent_id'], request['span_id'])
+        load_span = spans[f'{__name__}.load']
+        self.assertEqual(
+            load_span['parent_id'],
+            spans['test.save']['span_id'],
+        )
+        self.assertEqual(
+            spans['load.step']['parent_id'],
+            load_span['span_id'],
+        )
+        self.assertTrue(all(
+            span['trace_id'] == parent.trace_id
+            for span in spans.values()
+        ))
+        self.assertGreaterEqual(request['end'], request['start'])
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            with start_span('failing'):
+                raise ValueError('Invalid')
+        span = self.read_spans()['failing']
+        self.assertIsNone(span['parent_id'])
+        self.assertEqual(span['error'], 'ValueError: Invalid')
+
+    def test_disabled(self):
+        with mock.patch.object(tracing, 'tracer', Tracer()):
+            with start_span('ignored') as span:
+                self.assertIsNone(span)
+                self.assertEqual(get_trace_headers(), {})
+        self.assertFalse(os.path.exists(self.exporter.worker_path))
+
+    @run_async
+    async def test_export_off_loop(self):
+        self.assertEqual(
+            self.exporter.worker_path,
+            self.path.replace('.jsonl', f'.{os.getpid()}.jsonl'),
+        )
+        written = threading.Event()
+        threads = []
+        write = self.exporter._write
+
+        def record_write(spans):
+            threads.append(threading.current_thread())
+            write(spans)
+            written.set()
+
+        self.exporter.batch_size = 2
+        with mock.patch.object(self.exporter, '_write', record_write):
+            with start_span('first'):
+                pass
+            self.assertEqual(threads, [])
+            with start_span('second'):
+                pass
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                written.wait,
+                1,
+            )
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertEqual(set(self.read_spans()), {'first', 'second'})
+
+    def test_parse_traceparent(self):
+        self.assertIsNone(parse_traceparent(None))
+        self.assertIsNone(parse_traceparent('invalid'))
@@ -0,0 +1,49 @@
+import unittest
+
+import pytest
+from pydantic import ValidationError
+
+from .mocks.rexflow_entities import mock_task, mock_workflow
+from rexflow_ui.entities.trusted import load_task, load_workflow
+from rexflow_ui.entities.types import (
+    DataType,
+    Task,
+    TaskStatus,
+    ValidatorEnum,
+    Workflow,
+)
+
+
+@pytest.mark.ci
+class TestTrustedLoad(unittest.TestCase):
+    def test_load_task(self):
+        task = mock_task(field_number=3, task_status=TaskStatus.DOWN)
+        loaded = load_task(task.json())
+        self.assertEqual(loaded, task)
+        self.assertEqual(loaded, Task.parse_raw(task.json()))
+        self.assertIs(loaded.status, TaskStatus.DOWN)
+        field_data = loaded.data[0]
+        self.assertIs(field_data.type, DataType.TEXT)
+        self.assertIs(field_data.validators[0].type, ValidatorEnum.REGEX)
+        self.assertIn(field_data.data_id, loaded.get_data_dict())
+
+    def test_load_workflow(self):
+        workflow = mock_workflow()
+        raw = workflow.json(exclude={'tasks'})
+        loaded = load_workflow(raw)
+        self.assertEqual(loaded, Workflow.parse_raw(raw))
+        self.assertIs(loaded.status, workflow.status)
+        self.assertEqual(loaded.metadata_dict, workflow.metadata_dict)
+        self.assertEqual(loaded.tasks, [])
+
+    def test_validated_fallback(self):
+        # Shapes that are not expected are parsed with validation
+        task = mock_task()
+        loaded = load_task(task.json(by_alias=True))
+        self.assertEqual(loaded, task)
+
+        for raw in ['{"iid": "1"}', '{"iid": "1", "status": "?"}', 'null']:
+            with self.assertRaises(ValidationError):
+                load_workflow(raw)
+        with self.assertRaises(ValidationError):
+            load_task('{"iid": "1"}')
@@ -1,13 +1,19 @@
+import asyncio
 import unittest
 from unittest import mock
 
 import pytest
+from prometheus_client import REGISTRY
 
-from .mocks import MOCK_BRIDGE_URL, MOCK_DID, MOCK_NAME, MOCK_TID
+from .mocks import MOCK_BRIDGE_URL, MOCK_DID, MOCK_IID, MOCK_NAME, MOCK_TID
 from .mocks.rexflow_bridge import FakeREXFlowBridge
 from .utils import run_async
 from rexflow_ui import api
-from rexflow_ui.entities.types import MetaData, WorkflowDeployment
+from rexflow_ui.entities.types import (
+    MetaData,
+    WorkflowDeployment,
+    WorkflowStatus,
+)
 from rexflow_ui.entities.wrappers import TaskChange, TaskDataChange
 from rexflow_ui.store.memory import Store
 
@@ -26,10 +32,25 @@ async def get_deployments():
     ]
 
 
+class StartingREXFlowBridge(FakeREXFlowBridge):
+    """Bridge where workflows stay STARTING until started is set"""
+    started = False
+    polled: asyncio.Event
+
+    async def update_workflow_data(self):
+        self.polled.set()
+        status = (
+            WorkflowStatus.RUNNING if self.started
+            else WorkflowStatus.STARTING
+        )
+        return self.workflow.copy(update={'status': status})
+
+
 @pytest.mark.ci
 class TestWorkflow(unittest.TestCase):
     def tearDown(self):
         Store.clear()
+        api.deployment_cache.invalidate()
 
     @run_async
     @mock.patch('rexflow_ui.api.Store', Store)
@@ -52,7 +73,7 @@ class TestWorkflow(unittest.TestCase):
 
         created = await api.start_tasks(workflow.iid, [MOCK_TID])
         new_task = created.pop()
-        workflow = api.Store.get_workflow(workflow.iid)
+        workflow = await api.Store.get_workflow(workflow.iid)
         self.assertIn(new_task, workflow.tasks)
 
         await api.refresh_workflows()
@@ -118,7 +139,7 @@ class TestWorkflow(unittest.TestCase):
             )
         ])
         self.assertIn(task, completed.successful)
-        workflow = api.Store.get_workflow(task.iid)
+        workflow = await api.Store.get_workflow(task.iid)
         self.assertNotIn(task, workflow.tasks)
 
         # Finish workflow
@@ -138,5 +159,206 @@ class TestWorkflow(unittest.TestCase):
         result = await api.cancel_workflow(workflow.iid)
         self.assertTrue(result)
 
-        workflow = api.Store.get_workflow(workflow.iid)
+        workflow = await api.Store.get_workflow(workflow.iid)
+        self.assertEqual(workflow.status, api.WorkflowStatus.CANCELED)
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    @mock.patch('rexflow_ui.api.REXFlowBridge', FakeREXFlowBridge)
+    @mock.patch('rexflow_ui.api.get_deployments', get_deployments)
+    async def test_cancel_workflows(self):
+        workflow = await api.start_workflow(deployment_id=MOCK_DID)
+        results = await api.cancel_workflows([workflow.iid, 'unknown'])
+        self.assertEqual(results, {workflow.iid: True, 'unknown': False})
+
+        workflow = await api.Store.get_workflow(workflow.iid)
         self.assertEqual(workflow.status, api.WorkflowStatus.CANCELED)
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    @mock.patch('rexflow_ui.api.REXFlowBridge', FakeREXFlowBridge)
+    @mock.patch('rexflow_ui.api.get_deployments', get_deployments)
+    async def test_cancel_repeated_workflows(self):
+        workflow = await api.start_workflow(deployment_id=MOCK_DID)
+        with mock.patch.object(
+            Store,
+            'get_workflow_list',
+            wraps=Store.get_workflow_list,
+        ) as get_workflow_list, mock.patch.object(
+            Store,
+            'add_workflows',
+            wraps=Store.add_workflows,
+        ) as add_workflows:
+            results = await api.cancel_workflows([workflow.iid, workflow.iid])
+        self.assertEqual(results, {workflow.iid: True})
+        get_workflow_list.assert_called_once_with([workflow.iid])
+        (canceled,), _ = add_workflows.call_args
+        self.assertEqual([w.iid for w in canceled], [workflow.iid])
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    async def test_run_leased(self):
+        job = mock.AsyncMock()
+        with mock.patch.object(
+            Store,
+            'acquire_lease',
+            side_effect=[False, True, asyncio.CancelledError],
+        ) as acquire_lease:
+            with self.assertRaises(asyncio.CancelledError):
+                await api._run_leased('job', 0, job)
+        # Only run while the lease is held
+        job.assert_called_once()
+        acquire_lease.assert_called_with('job', api.LEASE_HOLDER, 0)
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    async def test_workflow_refresher_leased(self):
+        with mock.patch.object(
+            Store,
+            'acquire_lease',
+            side_effect=[False, asyncio.CancelledError],
+        ) as acquire_lease, mock.patch.object(
+            api,
+            'refresh_workflows',
+        ) as refresh_workflows:
+            with self.assertRaises(asyncio.CancelledError):
+                await api.run_workflow_refresher(0)
+        refresh_workflows.assert_not_called()
+        acquire_lease.assert_called_with(
+            'workflow_refresher',
+            api.LEASE_HOLDER,
+            0,
+        )
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    async def test_migrate_store_on_startup(self):
+        with mock.patch.object(
+            Store,
+            'migrate',
+            return_value=2,
+        ) as migrate, mock.patch.object(
+            Store,
+            'rebuild_indexes',
+        ) as rebuild_indexes:
+            self.assertEqual(await api.migrate_store_on_startup(), 2)
+            rebuild_indexes.assert_called_once()
+
+            # Another process is migrating
+            with mock.patch.object(Store, 'acquire_lease', return_value=False):
+                self.assertEqual(await api.migrate_store_on_startup(), 0)
+        migrate.assert_called_once()
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    async def test_reap_store_metrics(self):
+        def get_reclaimed():
+            return REGISTRY.get_sample_value(
+                'rexflow_store_reclaimed_total',
+                {'kind': 'orphan_instances'},
+            ) or 0
+
+        reclaimed = get_reclaimed()
+        with mock.patch.object(
+            Store,
+            'reap',
+            return_value={'orphan_instances': 2},
+        ):
+            await api.reap_store()
+        self.assertEqual(get_reclaimed(), reclaimed + 2)
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    async def test_available_workflows_without_flowd(self):
+        deployments = await get_deployments()
+        await Store.save_deployments(deployments)
+        with mock.patch(
+            'rexflow_ui.api.get_deployments',
+            side_effect=api.REXFlowNotReachable,
+        ):
+            self.assertEqual(
+                await api.get_available_workflows(),
+                deployments,
+            )
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    @mock.patch('rexflow_ui.api.REXFlowBridge', StartingREXFlowBridge)
+    @mock.patch('rexflow_ui.api.get_deployments', get_deployments)
+    @mock.patch('rexflow_ui.api.REXFLOW_START_POLL_SEC', 60)
+    async def test_start_workflow_notified(self):
+        StartingREXFlowBridge.started = False
+        StartingREXFlowBridge.polled = asyncio.Event()
+        start = asyncio.ensure_future(api.start_workflow(MOCK_DID))
+        await StartingREXFlowBridge.polled.wait()
+
+        StartingREXFlowBridge.started = True
+        await api.notify_workflow_status(MOCK_IID, WorkflowStatus.RUNNING)
+        workflow = await asyncio.wait_for(start, 1)
+        self.assertEqual(workflow.status, WorkflowStatus.RUNNING)
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    @mock.patch('rexflow_ui.api.REXFlowBridge', StartingREXFlowBridge)
+    @mock.patch('rexflow_ui.api.get_deployments', get_deployments)
+    @mock.patch('rexflow_ui.api.REXFLOW_START_POLL_SEC', 0.05)
+    @mock.patch('rexflow_ui.api.REXFLOW_START_TIMEOUT_SEC', 0.2)
+    async def test_start_workflow_timeout(self):
+        StartingREXFlowBridge.started = False
+        StartingREXFlowBridge.polled = asyncio.Event()
+        with self.assertRaises(api.REXFlowError):
+            await api.start_workflow(MOCK_DID)
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    @mock.patch('rexflow_ui.api.REXFlowBridge', FakeREXFlowBridge)
+    async def test_refresh_instance_changes(self):
+        deployment = (await get_deployments())[0]
+        self.assertEqual(
+            await api._refresh_instance(deployment),
+            {'added': 1, 'updated': 0, 'removed': 0},
+        )
+        workflow = await Store.get_workflow(MOCK_IID)
+        self.assertEqual(workflow.did, MOCK_DID)
+        self.assertEqual(workflow.metadata_dict, {'session_id': 'anon'})
+
+        with mock.patch.object(Store, 'add_workflow') as add_workflow:
+            self.assertEqual(
+                await api._refresh_instance(deployment),
+                {'added': 0, 'updated': 0, 'removed': 0},
+            )
+        add_workflow.assert_not_called()
+
+        await Store.add_workflow(workflow.copy(update={
+            'status': WorkflowStatus.STARTING,
+        }))
+        await Store.add_workflow(workflow.copy(update={'iid': 'gone'}))
+        self.assertEqual(
+            await api._refresh_instance(deployment),
+            {'added': 0, 'updated': 1, 'removed': 1},
+        )
+        workflow = await Store.get_workflow(MOCK_IID)
+        self.assertEqual(workflow.status, WorkflowStatus.RUNNING)
+        self.assertEqual(await Store.find_workflows(), [MOCK_IID])
+
+    @run_async
+    @mock.patch('rexflow_ui.api.Store', Store)
+    @mock.patch('rexflow_ui.api.REXFlowBridge', FakeREXFlowBridge)
+    async def test_refresh_instance_keeps_finished(self):
+        deployment = (await get_deployments())[0]
+        await api._refresh_instance(deployment)
+        workflow = await Store.get_workflow(MOCK_IID)
+        for status in api.FINISHED_STATUSES:
+            await Store.add_workflow(workflow.copy(update={
+                'iid': status.value,
+                'status': status,
+            }))
+
+        self.assertEqual(
+            await api._refresh_instance(deployment),
+            {'added': 0, 'updated': 0, 'removed': 0},
+        )
+        self.assertEqual(
+            sorted(await Store.find_workflows()),
+            sorted([MOCK_IID, 'COMPLETED', 'CANCELED', 'ERROR']),
+        )
@@ -0,0 +1,228 @@
+"""Trace spans following a request through the api, bridges and store
+
+The current span is kept in a context variable, so tasks started while it
+is open, e.g. by asyncio.gather, add their spans to the same trace. Trace
+context is passed to bridges in a W3C `traceparent` header, and finished
+spans are written as JSON lines, with OpenTelemetry-like fields, to a file
+per worker that a collector can ship. Without an exporter no span is
+recorded.
+"""
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from inspect import isawaitable, isfunction
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .settings import REXFLOW_TRACE_BATCH_SIZE, REXFLOW_TRACE_FILE
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = 'traceparent'
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+# Attributes of a call, from the class or instance, method name and arguments
+GetAttributes = Callable[[Any, str, tuple, dict], Dict[str, Any]]
+
+
+@dataclass
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(trace_id=self.trace_id, span_id=self.span_id)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar(
+    'rexflow_current_span',
+    default=None,
+)
+
+
+class JsonLinesExporter:
+    """Write finished spans to path, with the pid of the worker before its
+    extension, batch_size at a time from a thread off the event loop
+    """
+
+    def __init__(self, path: str, batch_size: int = REXFLOW_TRACE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._spans: List[Span] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+
+    @property
+    def worker_path(self) -> str:
+        root, ext = os.path.splitext(self.path)
+        return f'{root}.{os.getpid()}{ext}'
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Forked workers do not inherit the thread of their parent, and a
+        # single thread keeps the batches in order
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix='trace-exporter',
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+        if len(self._spans) >= self.batch_size:
+            spans, self._spans = self._spans, []
+            self._get_executor().submit(self._write, spans)
+
+    def flush(self) -> None:
+        """Write the buffered spans, waiting for every pending write"""
+        spans, self._spans = self._spans, []
+        self._get_executor().submit(self._write, spans).result()
+
+    def _write(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        path = self.worker_path
+        try:
+            with open(path, 'a') as trace_file:
+                trace_file.writelines(
+                    json.dumps(asdict(span), default=str) + '\n'
+                    for span in spans
+                )
+        except OSError:
+            logger.exception(f'Could not write trace spans to {path}')
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[JsonLinesExporter] = None):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        **attributes,
+    ) -> Iterator[Optional[Span]]:
+        """Span of the block, child of parent or of the current span"""
+        if self.exporter is None:
+            yield None
+            return
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as ex:
+            span.error = f'{type(ex).__name__}: {ex}'
+            raise
+        finally:
+            span.end = time.time()
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+tracer = Tracer(
+    JsonLinesExporter(REXFLOW_TRACE_FILE) if REXFLOW_TRACE_FILE else None,
+)
+
+
+def start_span(name: str, parent: Optional[SpanContext] = None, **attributes):
+    return tracer.span(name, parent, **attributes)
+
+
+def get_trace_headers() -> Dict[str, str]:
+    """Headers passing the current span to other services"""
+    span = _current_span.get()
+    if span is None:
+        return {}
+    return {TRACEPARENT_HEADER: f'00-{span.trace_id}-{span.span_id}-01'}
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    match = TRACEPARENT_RE.match(value or '')
+    if match is None:
+        return None
+    return SpanContext(trace_id=match.group(1), span_id=match.group(2))
+
+
+def traced(name: Optional[str] = None):
+    """Decorator of coroutine functions run in their own span"""
+    def decorate(func):
+        span_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+async def _traced(awaitable, name: str, attributes: Dict[str, Any]):
+    with start_span(name, **attributes):
+        return await awaitable
+
+
+def trace_methods(
+    prefix: str,
+    get_attributes: Optional[GetAttributes] = None,
+):
+    """Class decorator running the coroutines of public methods in spans"""
+    def wrap(method: Callable) -> Callable:
+        name = prefix + method.__name__
+
+        @wraps(method)
+        def wrapper(owner, *args, **kwargs):
+            result = method(owner, *args, **kwargs)
+            if not isawaitable(result):
+                return result
+            attributes = {}
+            if get_attributes is not None:
+                attributes = get_attributes(owner, method.__name__, args, kwargs)  # noqa E501
+            return _traced(result, name, attributes)
+        return wrapper
+
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if name.startswith('_'):
+                continue
+            if isinstance(attr, classmethod):
+                setattr(cls, name, classmethod(wrap(attr.__func__)))
+            elif isfunction(attr):
+                setattr(cls, name, wrap(attr))
+        return cls
+    return decorate
@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # Metrics of exited workers are merged, so their files can be dropped
+    multiprocess.mark_process_dead(worker.pid)
@@ -3,5 +3,10 @@
 source activate prism-api
 export PYTHONPATH=${PYTHONPATH}:.
 
+# Workers write their metrics there, it must be emptied before they start
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prism_metrics}
+rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+
 echo 'starting gunicorn with uvicorn workers now'
-gunicorn prism_api.app:app -w 4 -k uvicorn.workers.UvicornWorker --timeout 60 --bind 0.0.0.0:8000
+gunicorn prism_api.app:app -c scripts/gunicorn.conf.py -w 4 -k uvicorn.workers.UvicornWorker --timeout 60 --bind 0.0.0.0:8000
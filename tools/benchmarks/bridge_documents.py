@@ -0,0 +1,37 @@
+"""Compare per-call cost of preparing a bridge query document
+
+Run from the project root with `PYTHONPATH=. python tools/benchmarks/bridge_documents.py`
+"""  # noqa E501
+import timeit
+
+from gql import gql
+from graphql import validate
+
+from rexflow_ui.bridge.gql import documents, queries
+from rexflow_ui.bridge.gql.schema import schema
+
+NUMBER_OF_CALLS = 1000
+
+
+def parse_and_validate():
+    document = gql(queries.GET_TASK_DATA_QUERY)
+    validate(schema, document)
+    return document
+
+
+def precompiled():
+    return documents.GET_TASK_DATA_QUERY
+
+
+def main():
+    for name, function in [
+        ('parse + validate per call', parse_and_validate),
+        ('precompiled document', precompiled),
+    ]:
+        total = timeit.timeit(function, number=NUMBER_OF_CALLS)
+        per_call = total / NUMBER_OF_CALLS * 1e6
+        print(f'{name}: {per_call:.2f} us per call')
+
+
+if __name__ == '__main__':
+    main()
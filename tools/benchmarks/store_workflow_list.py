@@ -0,0 +1,130 @@
+"""Compare reading workflows one by one with the bulk Store.get_workflow_list
+
+Run from the project root with `PYTHONPATH=. python tools/benchmarks/store_workflow_list.py`.
+It writes to the Redis database given by --db on REX_DS_REDIS_HOST, and
+flushes it when done. Pass --fake to run against fakeredis instead, where
+there is no network so only the number of round trips is meaningful.
+"""  # noqa E501
+import argparse
+import asyncio
+import time
+
+import aioredis
+
+from rexflow_ui.entities.types import Task, Workflow, WorkflowStatus
+from rexflow_ui.settings import REDIS_HOST, REDIS_PORT
+from rexflow_ui.store.redis import Store
+
+
+class RoundTripCounter:
+    def __init__(self, redis: aioredis.Redis):
+        self.count = 0
+        execute_command = redis.execute_command
+
+        async def counted_execute_command(*args, **kwargs):
+            self.count += 1
+            return await execute_command(*args, **kwargs)
+
+        redis.execute_command = counted_execute_command
+        pipeline = redis.pipeline
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counted_execute(*args, **kwargs):
+                self.count += 1
+                return await execute(*args, **kwargs)
+
+            pipe.execute = counted_execute
+            return pipe
+
+        redis.pipeline = counted_pipeline
+
+
+async def per_workflow_reads(redis, iids):
+    """Read path used before the bulk path, one workflow at a time
+
+    Workflows and tasks are read from the layout of that time, where each
+    one was a JSON string in its own key.
+    """
+    workflows = []
+    for iid in iids:
+        workflow_key = Store.LEGACY_WORKFLOW_PREFIX + iid
+        workflow = Workflow.parse_raw(await redis.get(workflow_key))
+        await redis.exists(workflow_key)
+        workflow.tasks = [
+            Task.parse_raw(await redis.get(task_key))
+            async for task_key in redis.scan_iter(
+                match=f'{Store.LEGACY_TASK_PREFIX}{iid}:*',
+                count=Store.SCAN_COUNT,
+            )
+        ]
+        workflows.append(workflow)
+    return workflows
+
+
+async def bulk_reads(redis, iids):
+    return await Store.get_workflow_list(iids)
+
+
+async def populate(redis, workflows, tasks):
+    iids = [f'benchmark-{i}' for i in range(workflows)]
+    for iid in iids:
+        workflow = Workflow(
+            iid=iid,
+            status=WorkflowStatus.RUNNING,
+            metadata_dict={'session_id': 'benchmark'},
+        )
+        await Store.add_workflow(workflow)
+        await redis.set(Store.LEGACY_WORKFLOW_PREFIX + iid, workflow.json())
+        for tid in range(tasks):
+            task = Task(iid=iid, tid=f'task-{tid}')
+            await Store.add_task(task)
+            await redis.set(
+                f'{Store.LEGACY_TASK_PREFIX}{iid}:{task.tid}',
+                task.json(),
+            )
+    return iids
+
+
+async def main(args):
+    if args.fake:
+        from fakeredis.aioredis import FakeRedis
+        redis = FakeRedis(decode_responses=True)
+    else:
+        redis = aioredis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=args.db,
+            decode_responses=True,
+        )
+    Store._redis = redis
+    try:
+        iids = await populate(redis, args.workflows, args.tasks)
+        counter = RoundTripCounter(redis)
+        for name, function in [
+            ('per workflow reads', per_workflow_reads),
+            ('bulk get_workflow_list', bulk_reads),
+        ]:
+            counter.count = 0
+            start = time.perf_counter()
+            workflows = await function(redis, iids)
+            elapsed = (time.perf_counter() - start) * 1e3
+            assert len(workflows) == args.workflows
+            print(
+                f'{name}: {elapsed:.1f} ms, '
+                f'{counter.count} round trips'
+            )
+    finally:
+        await redis.flushdb()
+        await Store.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workflows', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=5)
+    parser.add_argument('--db', type=int, default=15)
+    parser.add_argument('--fake', action='store_true')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""Compare per-workflow cost of decoding store data with and without validation
+
+Run from the project root with `PYTHONPATH=. python tools/benchmarks/trusted_decode.py`.
+Each workflow is decoded as Store does it, from the JSON of the workflow and
+of each of its tasks.
+"""  # noqa E501
+import argparse
+import timeit
+
+from rexflow_ui.entities.trusted import load_task, load_workflow
+from rexflow_ui.entities.types import (
+    DataType,
+    Task,
+    TaskFieldData,
+    Validator,
+    ValidatorEnum,
+    Workflow,
+    WorkflowStatus,
+)
+
+
+def make_instance(tasks, fields):
+    workflow = Workflow(
+        iid='benchmark',
+        did='benchmark-deployment',
+        name='Benchmark',
+        status=WorkflowStatus.RUNNING,
+        metadata_dict={'session_id': 'benchmark'},
+        bridge_url='http://bridge/graphql',
+    )
+    task_data = [
+        Task(
+            iid=workflow.iid,
+            tid=f'task-{tid}',
+            data=[
+                TaskFieldData(
+                    dataId=f'field-{order}',
+                    type=DataType.TEXT,
+                    order=order,
+                    label=f'Field {order}',
+                    data='value',
+                    validators=[Validator(type=ValidatorEnum.REQUIRED)],
+                )
+                for order in range(fields)
+            ],
+        ).json()
+        for tid in range(tasks)
+    ]
+    return workflow.json(exclude={'tasks'}), task_data
+
+
+def validated(workflow_data, task_data):
+    workflow = Workflow.parse_raw(workflow_data)
+    workflow.tasks = [Task.parse_raw(data) for data in task_data]
+    return workflow
+
+
+def trusted(workflow_data, task_data):
+    workflow = load_workflow(workflow_data)
+    workflow.tasks = [load_task(data) for data in task_data]
+    return workflow
+
+
+def main(args):
+    workflow_data, task_data = make_instance(args.tasks, args.fields)
+    assert (
+        validated(workflow_data, task_data)
+        == trusted(workflow_data, task_data)
+    )
+    for name, function in [
+        ('parse_raw with validation', validated),
+        ('trusted construct', trusted),
+    ]:
+        total = timeit.timeit(
+            lambda: function(workflow_data, task_data),
+            number=args.number,
+        )
+        per_workflow = total / args.number * 1e6
+        print(f'{name}: {per_workflow:.1f} us per workflow')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=5)
+    parser.add_argument('--fields', type=int, default=10)
+    parser.add_argument('--number', type=int, default=2000)
+    main(parser.parse_args())